@@ -0,0 +1,734 @@
+'''
+# bench.py
+# manual benchmarks for the exploration worker and the combat
+# engine. each benchmark prints its throughput to the console. the
+# correctness checks live in the tests folder (python -m pytest).
+# it must be ran from the root of the project like the bot.
+# usage: python bench.py <benchmark> [arguments]
+# date: 10/18/26
+# author: dnglokpor
+'''
+
+# imports
+import sys, os, shutil, signal, subprocess, random, json, platform
+import time as tm
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+# add game world package to path so that internal imports work
+sys.path.insert(0, os.getcwd() + "/world")
+
+from idleUser import IdleUser
+import bg_explorer as bg
+import expQueue as eq
+from world.classes import Fighter, Ranger, Elementalist
+from world.dungeon import DUNGEON
+import confrontation as cf
+import base
+import units
+import metrics as mx
+import monsterLib as ml
+import skillLib as skl
+import skills
+from blocks import BattleBlock, BossBlock
+from collectibles import genHash
+import simulator as sim
+from helpers import Rolls, percents
+from elements import NOELM
+import numpy as np
+from contextlib import redirect_stdout
+from io import StringIO
+
+BENCH_TEMPS = "records/bench/"
+BENCH_QUEUE = BENCH_TEMPS + "explorations.db"
+JOBS = [Fighter, Ranger, Elementalist]
+MAX_Z = 3.0 # |z| bound of each of the 6 simulator scenarios (bonferroni)
+CONFIRM = 5 # times more explorations to confirm the ranged scenario
+POOL_SCALING = 0.5 # least speedup per core of a pool over one worker
+
+# helpers
+def freshTemps(temps = BENCH_TEMPS):
+   '''empty the benchmark temps folder holding the benchmark job
+   table. battles still write their logs in the real temps folder so
+   that one must exist too.'''
+   shutil.rmtree(temps, ignore_errors = True)
+   os.makedirs(temps)
+   os.makedirs("records/temps", exist_ok = True)
+def makeHero(job, name: str, level: int):
+   '''return a hero of class "job" developed up to "level".'''
+   hero = job(name)
+   hero.develup(sum(lvl * 100 for lvl in range(1, level)))
+   return hero
+def makeJob(db, key: int, floor: int, size: int, level = 5) -> int:
+   '''submit to "db" a job for a party of "size" heroes exploring
+   "floor" like the explore command does. return its key.'''
+   going = list()
+   for i in range(size):
+      user = IdleUser(key + i, "bench{}".format(i))
+      user.setHero(makeHero(JOBS[i % len(JOBS)], user.getUname(), level))
+      user.setKey(key)
+      going.append(user)
+   setupData = {"startTime": key, "floor": floor, "users": going,
+      "submitTime": tm.time(), "seed": key}
+   eq.submit(db, key, floor, int(tm.time()) + DUNGEON[floor].getSize() * 120
+      + 1, setupData)
+   return key
+
+# benchmarks
+def benchPool(jobs = "40", floor = "3", most = None):
+   '''time the same batch of jobs through pools of growing size up to
+   "most" workers (cpu count by default). the pool of "most" workers
+   must run the jobs at least POOL_SCALING times faster per core it
+   can use than a single worker.'''
+   cores = os.cpu_count()
+   jobs, floor = int(jobs), int(floor)
+   most = cores if most == None else int(most)
+   counts = sorted({w for w in (1, 2, 4) if w < most} | {most})
+   base = None
+   print("{} jobs on floor {}, {} cores".format(jobs, floor, cores))
+   for workers in counts:
+      freshTemps()
+      db = eq.connect(BENCH_QUEUE)
+      keys = [makeJob(db, k + 1, floor, 3) for k in range(jobs)]
+      db.close()
+      start = tm.perf_counter()
+      with ProcessPoolExecutor(max_workers = workers) as pool:
+         ran = sum(done for done, metrics in pool.map(bg.work, keys,
+            [BENCH_QUEUE] * len(keys)))
+      elapsed = tm.perf_counter() - start
+      if base == None:
+         base = elapsed
+      print("{:3d} workers: {:4d} jobs in {:7.2f}s -> {:6.2f} jobs/s "
+         "(x{:.2f})".format(workers, ran, elapsed, ran / elapsed,
+         base / elapsed))
+   shutil.rmtree(BENCH_TEMPS, ignore_errors = True)
+   # the jobs only run in parallel on as many cores as there are
+   usable = min(most, cores, jobs)
+   if usable < 2:
+      print("a single core: the scaling of the pool is not measured")
+   else:
+      expected = max(1, POOL_SCALING * usable)
+      speedup = base / elapsed
+      print("{} workers over 1: x{:.2f}, at least x{:.2f} expected on {} "
+         "cores".format(most, speedup, expected, usable))
+      print("PASS" if speedup >= expected else "FAIL")
+
+def benchOnce(instances = "4", jobs = "30", floor = "4"):
+   '''exactly-once harness: start several explorers on the same
+   job table, kill one of them while it works and check that
+   every job was still committed exactly once.'''
+   instances, jobs, floor = int(instances), int(jobs), int(floor)
+   freshTemps()
+   ledger = BENCH_TEMPS + "ledger.txt"
+   db = eq.connect(BENCH_QUEUE)
+   keys = [str(makeJob(db, k + 1, floor, 4)) for k in range(jobs)]
+   code = ("import bg_explorer as bg; bg.serve(1, '{}', sweep = 0.2, "
+      "lease = 1, ledger = '{}')").format(BENCH_QUEUE, ledger)
+   explorers = [subprocess.Popen([sys.executable, "-c", code],
+      stdout = subprocess.DEVNULL, start_new_session = True)
+      for i in range(instances)]
+   tm.sleep(2)
+   os.killpg(explorers[0].pid, signal.SIGKILL) # crash one host
+   print("killed explorer 0 with its worker")
+   deadline = tm.time() + 300
+   done = lambda: len([k for k in keys
+      if eq.status(db, int(k))[0] == "done"])
+   while done() < jobs and tm.time() < deadline:
+      tm.sleep(0.5)
+   for p in explorers[1:]:
+      os.killpg(p.pid, signal.SIGKILL)
+   commits = dict()
+   if os.path.isfile(ledger):
+      with open(ledger) as journal:
+         for line in journal.read().split('\n'):
+            if line != "":
+               k, name = line.split()
+               commits[k] = commits.get(k, list()) + [name]
+   twice = [k for k, names in commits.items() if len(names) > 1]
+   missing = [k for k in keys if k not in commits]
+   left = db.execute("SELECT key FROM jobs WHERE state IN "
+      "('wait', 'running')").fetchall()
+   print("{} jobs, {} done, {} committed more than once, {} never "
+      "committed, {} left in queue".format(jobs, done(), len(twice),
+      len(missing), len(left)))
+   print("PASS" if done() == jobs and len(twice) + len(missing) == 0
+      else "FAIL")
+   db.close()
+   shutil.rmtree(BENCH_TEMPS, ignore_errors = True)
+
+def benchMetrics(jobs = "100", floor = "3", rounds = "5"):
+   '''time the same seeded explorations with the metrics recording
+   off, on and with the skills profiled to measure their overhead.'''
+   jobs, floor, rounds = int(jobs), int(floor), int(rounds)
+   freshTemps()
+   db = eq.connect(BENCH_QUEUE)
+   setups = [eq.fetch(db, makeJob(db, k + 1, floor, 3))
+      for k in range(jobs)]
+   db.close()
+   setups = [eq.dumps(setupData) for setupData in setups]
+   modes = {"off": (False, False), "on": (True, False),
+      "profiled": (True, True)}
+   times = {mode: 0 for mode in modes}
+   for r in range(rounds):
+      for mode, (enabled, profiled) in modes.items():
+         bg.mx.ENABLED, bg.mx.PROFILE = enabled, profiled
+         start = tm.perf_counter()
+         for k, setupData in enumerate(setups):
+            random.seed(k)
+            bg.run_exploration(eq.pickle.loads(setupData))
+         times[mode] += tm.perf_counter() - start
+   bg.mx.ENABLED, bg.mx.PROFILE = True, False
+   bg.mx.collect()
+   print("{} explorations of floor {} x {} rounds".format(jobs, floor,
+      rounds))
+   for mode in ("on", "profiled"):
+      print("metrics {}: {:7.2f}s, off: {:7.2f}s -> overhead {:+.2f}%".format(
+         mode, times[mode], times["off"], 100 * (times[mode] /
+         times["off"] - 1)))
+   shutil.rmtree(BENCH_TEMPS, ignore_errors = True)
+
+# turn order as it was before the heap, kept as the reference
+class ListTurnOrder(cf.TurnOrder):
+   '''turn order that rescans every unit on every move.'''
+   def __iter__(self):
+      self.oDexts = [u.getStats().getStat(cf.STATS[5]).getCurrent()
+         for u in self.units]
+      self.mutDexts = dict(zip(self.units, self.oDexts))
+      low = max(self.oDexts)
+      for i, u in enumerate(self.units):
+         if u.isAlive() and low > self.oDexts[i]:
+            low = self.oDexts[i]
+      self.lowDext = max(low, 1)
+      return self
+   def __next__(self):
+      for idx, u in enumerate(self.units):
+         nDext = u.getStats().getStat(cf.STATS[5]).getCurrent()
+         if nDext != self.oDexts[idx]:
+            self.mutDexts[u] += nDext - self.oDexts[idx]
+            self.oDexts[idx] = nDext
+      for u in self.mutDexts:
+         if not u.isAlive():
+            self.mutDexts[u] = -1
+      maxDext = 0
+      fastest = self.units[0]
+      for u, d in self.mutDexts.items():
+         if d > maxDext:
+            maxDext, fastest = d, u
+      if maxDext < self.lowDext:
+         raise StopIteration
+      self.mutDexts[fastest] = maxDext - self.lowDext
+      return fastest
+def traced(order):
+   '''return a subclass of the turn order "order" that records the
+   moves it hands out and the time spent picking them.'''
+   class Traced(order):
+      moves = list()
+      spent = 0
+      def __next__(self):
+         start = tm.perf_counter()
+         try:
+            u = super().__next__()
+         finally:
+            Traced.spent += tm.perf_counter() - start
+         Traced.moves.append(u.getName())
+         return u
+   return Traced
+def clone(template, level: int, rng = None):
+   '''return a copy of the "template" unit. the spawners share their
+   skills between monsters so this keeps the summons of one battle
+   from cooling the skills of the next. the copy needs no "rng".'''
+   return eq.pickle.loads(eq.dumps(template))
+def fight(heroes: int, monsters: int, level: int, summons: bool) -> bytes:
+   '''return a pickled (advs, mons, summonable) encounter.'''
+   advs = cf.Party([makeHero(JOBS[i % len(JOBS)], "bench{}".format(i),
+      level) for i in range(heroes)])
+   mons = cf.Party([ml.s_Honeybeat(level) for i in range(monsters)])
+   summonable = None
+   if summons: # everyone calls for help
+      summonable = [partial(clone, ml.s_Honeybeat(level)),
+         partial(clone, ml.s_Caterkiller(level))]
+      for m in mons:
+         m.getSkillSet().assign("ability", skl.whine)
+   return eq.dumps((advs, mons, summonable))
+
+def benchTurns(battles = "30", level = "8"):
+   '''time the same seeded battles with the heap turn order and the
+   one that rescans every unit on every move.'''
+   battles, level = int(battles), int(level)
+   os.makedirs("records/temps", exist_ok = True)
+   # a party only calls for help while it has less than 5 members
+   scenarios = [("5v5", 5, 5, False), ("5v1 summons", 5, 1, True),
+      ("5v3 summons", 5, 3, True), ("10v10", 10, 10, False),
+      ("16v16", 16, 16, False)]
+   heap = cf.TurnOrder
+   for name, heroes, monsters, summons in scenarios:
+      fights = [fight(heroes, monsters, level, summons)
+         for b in range(battles)]
+      results = dict()
+      for order in (ListTurnOrder, heap):
+         cf.TurnOrder = tracer = traced(order)
+         start = tm.perf_counter()
+         for b, encounter in enumerate(fights):
+            random.seed(b)
+            advs, mons, summonable = eq.pickle.loads(encounter)
+            battle = cf.BattleState(advs, mons, summonable)
+            battle.run()
+         results[order] = (tracer.moves, tracer.spent,
+            tm.perf_counter() - start)
+         cf.TurnOrder = heap
+      (old, oldSpent, oldAll), (new, newSpent, newAll) = results.values()
+      print("{:14s} {:6d} moves | turn order {:7.1f}ms -> {:7.1f}ms "
+         "(x{:.2f}) | battles {:6.2f}s -> {:6.2f}s".format(name,
+         len(new), oldSpent * 1000, newSpent * 1000, oldSpent / newSpent,
+         oldAll, newAll))
+
+def combine(self):
+   '''Playable.getStats() as it was before its cache.'''
+   return self.stats + base.UnitStats(self.equipment.getEqtBonus())
+def counted(cls, name: str, tally: dict, key: str):
+   '''count in "tally[key]" the calls to the "name" method of "cls".
+   return the original method.'''
+   original = cls.__dict__[name]
+   bound = isinstance(original, classmethod)
+   call = original.__func__ if bound else original
+   def wrapper(*args, **kwargs):
+      tally[key] += 1
+      return call(*args, **kwargs)
+   setattr(cls, name, classmethod(wrapper) if bound else wrapper)
+   return original
+
+def benchStats(battles = "30", level = "8"):
+   '''run the same seeded 5v5 battles with the combined stats of the
+   heroes cached and rebuilt on every call. counts the stats objects
+   allocated per round.'''
+   battles, level = int(battles), int(level)
+   os.makedirs("records/temps", exist_ok = True)
+   fights = [fight(5, 5, level, False) for b in range(battles)]
+   cached = units.Playable.getStats
+   order = cf.TurnOrder
+   tally = {"UnitStats": 0, "Stat": 0}
+   methods = [(base.UnitStats, "__init__", "UnitStats"),
+      (base.UnitStats, "__add__", "UnitStats"),
+      (base.Stat, "__init__", "Stat"), (base.Stat, "view", "Stat")]
+   originals = [(cls, name, counted(cls, name, tally, key))
+      for cls, name, key in methods]
+   for name, getStats in (("rebuilt", combine), ("cached", cached)):
+      units.Playable.getStats = getStats
+      cf.TurnOrder = tracer = traced(order)
+      for k in tally:
+         tally[k] = 0
+      mx.collect()
+      start = tm.perf_counter()
+      for b, encounter in enumerate(fights):
+         random.seed(b)
+         advs, mons, summonable = eq.pickle.loads(encounter)
+         battle = cf.BattleState(advs, mons, summonable)
+         battle.run()
+      elapsed = tm.perf_counter() - start
+      rounds = mx.collect()[0]["round"][0]
+      cf.TurnOrder = order
+      moves = len(tracer.moves)
+      print("{:8s} {:4d} rounds, {:5d} moves | per round: {:7.1f} "
+         "UnitStats, {:8.1f} Stat | per move: {:5.1f} UnitStats | "
+         "{:6.2f}s".format(name, rounds, moves, tally["UnitStats"] / rounds,
+         tally["Stat"] / rounds, tally["UnitStats"] / moves, elapsed))
+   units.Playable.getStats = cached
+   for cls, name, original in originals:
+      setattr(cls, name, original)
+
+def benchHeadless(battles = "200", level = "5", rounds = "3"):
+   '''battles per second of the same seeded fights ran with a battle
+   log and headless.'''
+   battles, level, rounds = int(battles), int(level), int(rounds)
+   fights = [fight(3, 3, level, b % 2 == 0) for b in range(battles)]
+   times = {True: 0, False: 0}
+   for r in range(rounds):
+      for verbose in (True, False):
+         start = tm.perf_counter()
+         for b, encounter in enumerate(fights):
+            random.seed(b)
+            advs, mons, summonable = eq.pickle.loads(encounter)
+            cf.BattleState(advs, mons, summonable).run(verbose)
+         times[verbose] += tm.perf_counter() - start
+   print("{} battles x {} rounds".format(battles, rounds))
+   for verbose in (True, False):
+      print("{:8s} {:8.1f} battles/s".format("verbose" if verbose else
+         "headless", battles * rounds / times[verbose]))
+
+def reseeding(maxVal, rng = random) -> int:
+   '''the old monsterLib.choose() that reseeded from the os.'''
+   random.seed()
+   return random.choice(range(maxVal))
+def benchReplay(spawns = "20000", jobs = "20", floor = "4"):
+   '''spawns per second with the old reseeding choose() and the
+   generator passed along. then explorations per second of every job
+   ran from its seed and resumed from each of its checkpoints.'''
+   spawns, jobs, floor = int(spawns), int(jobs), int(floor)
+   seeded = ml.choose
+   for name, choose in (("reseeding", reseeding), ("passed", seeded)):
+      ml.choose = choose
+      rng = random.Random(0)
+      start = tm.perf_counter()
+      for i in range(spawns):
+         ml.s_Honeybeat(1 + i % 5, rng)
+      print("{:10s} {:9.1f} spawns/s".format(name,
+         spawns / (tm.perf_counter() - start)))
+   ml.choose = seeded
+   freshTemps()
+   db = eq.connect(BENCH_QUEUE)
+   setups = [eq.dumps(eq.fetch(db, makeJob(db, k + 1, floor, 1 + k % 3)))
+      for k in range(jobs)]
+   db.close()
+   snapshots = list()
+   def keep(*progress):
+      if progress[3] != None:
+         snapshots.append((k, eq.dumps(progress[3])))
+   with redirect_stdout(StringIO()): # spawners and bosses print
+      start = tm.perf_counter()
+      for k, setupData in enumerate(setups):
+         bg.run_exploration(eq.pickle.loads(setupData), checkpoint = keep)
+      seeded = tm.perf_counter() - start
+      start = tm.perf_counter()
+      for k, snapshot in snapshots:
+         bg.run_exploration(eq.pickle.loads(setups[k]),
+            eq.pickle.loads(snapshot))
+      resumed = tm.perf_counter() - start
+   print("{:10s} {:9.1f} explorations/s ({})".format("seeded",
+      jobs / seeded, jobs))
+   print("{:10s} {:9.1f} explorations/s ({})".format("resumed",
+      len(snapshots) / max(resumed, 1e-9), len(snapshots)))
+   shutil.rmtree(BENCH_TEMPS, ignore_errors = True)
+
+class Ranges:
+   '''the percent rolls as they were drawn before Rolls.'''
+   def randrange(self, n: int) -> int:
+      return random.choice(range(n))
+def benchRolls(hits = "200000", seed = "0"):
+   '''cost of one hit of targetAttack and of one percent roll as
+   targetAttack draws them: one by one from random.Random and straight
+   from the blocks of Rolls, with the evasion and critical rates each
+   generator gave.'''
+   hits, seed = int(hits), int(seed)
+   perp = makeHero(Fighter, "bench", 5)
+   target = ml.s_Honeybeat(5, random.Random(seed))
+   full = target.getStats().getHealth().getFull()
+   gens = [("choice(range)", Ranges()), ("Random", random.Random(seed)),
+      ("Rolls", Rolls(seed, False)), ("Rolls numpy", Rolls(seed))]
+   for name, rng in gens:
+      missed = crits = 0
+      start = tm.perf_counter()
+      for h in range(hits):
+         hit = skl.targetAttack(perp, target, "attack", NOELM, 1.0, rng)
+         if hit[0] == None:
+            missed += 1
+         elif hit[1][0][3]:
+            crits += 1
+         target.heal(full)
+      spent = tm.perf_counter() - start
+      rates = (missed / hits, crits / (hits - missed))
+      percent = percents(rng)
+      start = tm.perf_counter()
+      for h in range(hits):
+         percent() <= 50
+      roll = tm.perf_counter() - start
+      print("{:14s} {:6.0f} ns/hit {:5.0f} ns/roll | missed {:.4f} "
+         "crits {:.4f}".format(name, spent / hits * 1e9,
+         roll / hits * 1e9, *rates))
+
+COMBAT_LEVELS = (1, 5, 10) # hero levels of the combat benchmark
+COMBAT_SIZES = (1, 2, 3, 4) # party sizes of the combat benchmark
+ALLOCATED = [(base.UnitStats, "__init__", "UnitStats"),
+   (base.UnitStats, "__add__", "UnitStats"), (base.Stat, "__init__", "Stat"),
+   (base.Stat, "view", "Stat"), (skills.Effect, "__init__", "Effect"),
+   (cf.TurnOrder, "__init__", "TurnOrder"), (cf.Party, "__init__", "Party")]
+def encounters() -> list:
+   '''return the canonical encounters of the combat benchmark as
+   (name, floor, block, jobs, level). every battle and boss block of
+   every floor is fought by parties of each size led by each class.'''
+   found = list()
+   for f, floor in sorted(DUNGEON.items()):
+      blocks = [b for b in floor.pop if isinstance(b, BattleBlock)]
+      if isinstance(floor.stairs, BossBlock):
+         blocks.append(floor.stairs)
+      for block in blocks:
+         for size in COMBAT_SIZES:
+            for lead in range(len(JOBS)):
+               jobs = [JOBS[(lead + i) % len(JOBS)] for i in range(size)]
+               for level in COMBAT_LEVELS:
+                  name = "{}f {} {} lvl{}".format(f, block.name,
+                     '+'.join(j.__name__ for j in jobs), level)
+                  found.append((name, f, block, jobs, level))
+   return found
+def playEncounters(found: list, battles: int, seed: int) -> dict:
+   '''fight "battles" seeded times each encounter of "found". return
+   by encounter name its battles, rounds, time (sec) and outcomes.'''
+   results = dict()
+   for k, (name, f, block, jobs, level) in enumerate(found):
+      random.seed(name) # the heroes roll their luck
+      heroes = eq.dumps([makeHero(job, "bench{}".format(i), level)
+         for i, job in enumerate(jobs)])
+      haz = DUNGEON[f].getHazardLevel()
+      spent, outcomes = 0, list()
+      mx.collect()
+      for b in range(battles):
+         party = cf.Party(eq.pickle.loads(heroes))
+         rng = Rolls(seed * 1000003 + k * 1009 + b)
+         skl.setCooldowns()
+         with redirect_stdout(StringIO()): # spawners and bosses print
+            start = tm.perf_counter()
+            info = block.explore(party, haz, rng)
+            spent += tm.perf_counter() - start
+         if info[1] != None and os.path.exists(info[1]):
+            os.remove(info[1]) # defeat report
+         outcomes.append([cf.getHP(u) for u in party])
+      timings = mx.collect()[0]
+      results[name] = {
+         "battles": timings["battle"][0],
+         "rounds": timings["round"][0] if "round" in timings else 0,
+         "time": spent,
+         "outcomes": outcomes
+      }
+   return results
+def benchCombat(battles = "10", out = "combat.json", base = None,
+   seed = "0"):
+   '''battles and rounds per second of BattleState.run and the engine
+   objects allocated per round over the canonical encounters, each
+   fought "battles" times with fixed seeds. the results are saved as
+   json in "out". if "base" is the json of an earlier run, the speed
+   of both runs is compared and their outcomes must be the same.'''
+   battles, seed = int(battles), int(seed)
+   os.makedirs("records/temps", exist_ok = True)
+   found = encounters()
+   results = playEncounters(found, battles, seed)
+   # same battles again to count the allocations
+   tally = {key: 0 for cls, name, key in ALLOCATED}
+   originals = [(cls, name, counted(cls, name, tally, key))
+      for cls, name, key in ALLOCATED]
+   counts = dict()
+   for encounter in found:
+      for key in tally:
+         tally[key] = 0
+      playEncounters([encounter], battles, seed)
+      counts[encounter[0]] = dict(tally)
+   for cls, name, original in originals:
+      setattr(cls, name, original)
+   total = {"battles": 0, "rounds": 0, "time": 0, "allocations": 0}
+   for name, r in results.items():
+      rounds = max(1, r["rounds"])
+      r["battles/s"] = round(r["battles"] / r["time"], 1)
+      r["rounds/s"] = round(r["rounds"] / r["time"], 1)
+      r["allocations"] = counts[name]
+      r["allocations/round"] = round(sum(counts[name].values()) / rounds, 2)
+      for key in ("battles", "rounds", "time"):
+         total[key] += r[key]
+      total["allocations"] += sum(counts[name].values())
+   total["battles/s"] = round(total["battles"] / total["time"], 1)
+   total["rounds/s"] = round(total["rounds"] / total["time"], 1)
+   total["allocations/round"] = round(total["allocations"] /
+      max(1, total["rounds"]), 2)
+   try:
+      commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+         capture_output = True, text = True).stdout.strip()
+   except OSError: # no git
+      commit = None
+   report = {"commit": commit, "python": platform.python_version(),
+      "battles": battles, "seed": seed, "total": total,
+      "encounters": results}
+   with open(out, 'w') as saved:
+      json.dump(report, saved, indent = 1)
+   # by floor and block
+   groups = dict()
+   for name, r in results.items():
+      group = ' '.join(name.split()[:2])
+      g = groups.setdefault(group, [0, 0, 0, 0])
+      g[0] += r["battles"]
+      g[1] += r["rounds"]
+      g[2] += r["time"]
+      g[3] += sum(r["allocations"].values())
+   for group, (b, rounds, spent, allocs) in groups.items():
+      print("{:20s} {:6d} battles {:7d} rounds | {:8.1f} battles/s "
+         "{:9.1f} rounds/s | {:6.1f} allocations/round".format(group, b,
+         rounds, b / spent, rounds / spent, allocs / max(1, rounds)))
+   print("{:20s} {:6d} battles {:7d} rounds | {:8.1f} battles/s "
+      "{:9.1f} rounds/s | {:6.1f} allocations/round".format("total",
+      total["battles"], total["rounds"], total["battles/s"],
+      total["rounds/s"], total["allocations/round"]))
+   print("saved to {} ({})".format(out, commit))
+   if base != None: # compare with an earlier run
+      with open(base) as saved:
+         old = json.load(saved)
+      same = True
+      for name, r in results.items():
+         o = old["encounters"].get(name)
+         same = same and o != None and o["outcomes"] == r["outcomes"]
+      print("vs {} ({}): battles/s x{:.2f} rounds/s x{:.2f} "
+         "allocations/round x{:.2f}".format(base, old["commit"],
+         total["battles/s"] / old["total"]["battles/s"],
+         total["rounds/s"] / old["total"]["rounds/s"],
+         total["allocations/round"] / max(1e-9,
+         old["total"]["allocations/round"])))
+      print("PASS" if same else "FAIL: the outcomes changed")
+
+def explore(heroes: list, floor: int) -> bool:
+   '''play one exploration of "floor" with the reference engine.
+   return True if "heroes" cleared it. they are modified.'''
+   party = cf.Party(heroes)
+   f = DUNGEON[floor]
+   skl.setCooldowns() # started over like in the explorer
+   with redirect_stdout(StringIO()): # spawners and bosses print
+      for block in f.build():
+         info = block.explore(party, f.getHazardLevel())
+         if info != None and info[1] != None and os.path.exists(info[1]):
+            os.remove(info[1]) # defeat report
+         if not party.stillStands():
+            break
+   return party.stillStands()
+def zScore(ref: np.ndarray, est: np.ndarray) -> float:
+   '''z score of the difference of the means of two samples.'''
+   error = (ref.var() / len(ref) + est.var() / len(est)) ** 0.5
+   return 0 if error == 0 else (est.mean() - ref.mean()) / error
+def compare(jobs: list, level: int, floor: int, runs: int, lanes: int,
+   seed: int) -> list:
+   '''clear rate of a party of "jobs" on "floor" over "runs"
+   reference explorations and "lanes" simulated ones. print both and
+   return the z scores of their difference and, if the party shoots,
+   of the difference of the arrows they have left.'''
+   heroes = [makeHero(job, "bench{}".format(i), level)
+      for i, job in enumerate(jobs)]
+   saved = eq.pickle.dumps(heroes)
+   arrow = genHash("arrow")
+   quiver = lambda party: sum(len(h.getBag().getStackOf(arrow))
+      for h in party)
+   cleared, left = np.zeros(runs), np.zeros(runs)
+   start = tm.perf_counter()
+   for r in range(runs):
+      party = eq.pickle.loads(saved)
+      cleared[r] = explore(party, floor)
+      left[r] = quiver(party)
+   refTime = tm.perf_counter() - start
+   start = tm.perf_counter()
+   simulated = sim.Simulation(heroes, lanes, np.random.default_rng(seed))
+   est = simulated.explore(DUNGEON[floor])
+   simTime = tm.perf_counter() - start
+   scores = [zScore(cleared, est)]
+   print("{:32s} lvl {} floor {} | reference {:.3f} ({:6.1f} "
+      "explorations/s) | simulator {:.3f} ({:8.1f} explorations/s) | "
+      "z {:+.2f}".format('+'.join(j.__name__ for j in jobs), level,
+      floor, cleared.mean(), runs / refTime, est.mean(),
+      lanes / simTime, scores[0]))
+   if quiver(heroes) > 0:
+      kept = simulated.arrows.sum(1)
+      scores.append(zScore(left, kept))
+      print("{:32s} arrows left of {} | reference {:.2f} | simulator "
+         "{:.2f} | z {:+.2f}".format("", quiver(heroes), left.mean(),
+         kept.mean(), scores[1]))
+   return scores
+def benchSimulate(runs = "400", lanes = "4000", seed = "0"):
+   '''clear rates of the same parties estimated by the simulator and
+   by exploring with the reference engine. the estimates must agree
+   within the sampling error (|z| < MAX_Z over the scenarios). the
+   ranged party is then compared again over CONFIRM times more
+   explorations, along with the arrows it has left, since a bias of
+   the shots would only show there.'''
+   runs, lanes, seed = int(runs), int(lanes), int(seed)
+   random.seed(seed)
+   os.makedirs("records/temps", exist_ok = True)
+   scenarios = [ # (jobs, level, floor)
+      ([Elementalist], 1, 1),
+      ([Ranger], 1, 2),
+      ([Fighter], 1, 3),
+      ([Fighter, Ranger, Elementalist], 1, 4),
+      ([Fighter, Elementalist], 5, 5),
+      ([Ranger, Ranger], 6, 5)
+   ]
+   passed = True
+   for jobs, level, floor in scenarios:
+      z = compare(jobs, level, floor, runs, lanes, seed)[0]
+      passed = passed and abs(z) < MAX_Z
+   print("confirming the ranged party over x{} explorations".format(
+      CONFIRM))
+   jobs, level, floor = scenarios[-1]
+   scores = compare(jobs, level, floor, runs * CONFIRM, lanes * CONFIRM,
+      seed + 1)
+   passed = passed and max(abs(z) for z in scores) < MAX_Z
+   print("PASS" if passed else "FAIL")
+
+def farmed(heroes: bytes, block, haz: int, seed: int, sweep: bool) -> tuple:
+   '''fight the battle "block" once with the pickled "heroes". return
+   the (swept, hp, exp, loot, fight) of the battle. the loot is the
+   count of every item the bags gained and the fight is the time (sec)
+   spent in the battle itself.'''
+   party = cf.Party(eq.pickle.loads(heroes))
+   loot = lambda: [{k: len(stack) for k, stack in u.getBag().contents.items()}
+      for u in party]
+   before = loot()
+   cf.SWEEP = sweep
+   skl.setCooldowns()
+   mx.collect()
+   with redirect_stdout(StringIO()): # spawners print
+      info = block.explore(party, haz, Rolls(seed))
+   if info[1] != None and os.path.exists(info[1]):
+      os.remove(info[1]) # defeat report
+   timings, counts = mx.collect()
+   swept = "battle.swept" in counts
+   gained = [{k: n - old.get(k, 0) for k, n in bag.items()
+      if n > old.get(k, 0)} for bag, old in zip(loot(), before)]
+   return (swept, [cf.getHP(u) for u in party],
+      [u.getLevel().getExpSum() for u in party], gained,
+      timings["battle"][1])
+def looted(results: list) -> int:
+   '''return the number of items looted over the "results" of
+   farmed().'''
+   return sum(n for r in results for bag in r[3] for n in bag.values())
+def benchSweep(battles = "200", level = "20", floor = "1"):
+   '''farm the battle blocks of "floor" with level "level" parties,
+   every battle played out then with the foregone ones swept. the
+   blocks (spawns, loot) and the fights alone are timed.'''
+   battles, level, floor = int(battles), int(level), int(floor)
+   os.makedirs("records/temps", exist_ok = True)
+   blocks = [b for b in DUNGEON[floor].pop if isinstance(b, BattleBlock)]
+   haz = DUNGEON[floor].getHazardLevel()
+   for jobs in ([Fighter], [Fighter, Fighter], [Fighter, Elementalist],
+      [Elementalist], [Ranger], [Ranger, Elementalist]):
+      random.seed(level) # the heroes roll their luck
+      heroes = [makeHero(job, "bench{}".format(i), level)
+         for i, job in enumerate(jobs)]
+      heroes = eq.dumps(heroes)
+      spent, results = [0, 0], [list(), list()]
+      for mode in (0, 1):
+         start = tm.perf_counter()
+         for b in range(battles):
+            results[mode].append(farmed(heroes, blocks[b % len(blocks)],
+               haz, b, mode == 1))
+         spent[mode] = tm.perf_counter() - start
+      swept = sum(1 for fast in results[1] if fast[0])
+      fights = [sum(r[4] for r in results[mode]) for mode in (0, 1)]
+      print("{:24s} lvl {} floor {} | swept {:4d}/{} | blocks {:7.1f} -> "
+         "{:7.1f}/s (x{:.2f}) | fights {:8.1f} -> {:8.1f}/s (x{:.2f}) | "
+         "loot {} -> {}".format('+'.join(j.__name__ for j in jobs), level,
+         floor, swept, battles, battles / spent[0], battles / spent[1],
+         spent[0] / spent[1], battles / fights[0], battles / fights[1],
+         fights[0] / fights[1], looted(results[0]), looted(results[1])))
+   cf.SWEEP = True
+
+BENCHES = {
+   "pool": benchPool,
+   "once": benchOnce,
+   "metrics": benchMetrics,
+   "turns": benchTurns,
+   "stats": benchStats,
+   "headless": benchHeadless,
+   "replay": benchReplay,
+   "rolls": benchRolls,
+   "combat": benchCombat,
+   "simulate": benchSimulate,
+   "sweep": benchSweep
+}
+
+# run
+if __name__ == "__main__":
+   if len(sys.argv) < 2 or sys.argv[1] not in BENCHES:
+      print("usage: python bench.py <{}> [arguments]".format(
+         '|'.join(BENCHES.keys())))
+   else:
+      BENCHES[sys.argv[1]](*sys.argv[2:])
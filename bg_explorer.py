@@ -7,58 +7,100 @@
 # complete.
 # author: dnglokpor
 # date: 10/5/21
+# update: 10/18/26
+# jobs now live in the exploration table (see expQueue.py) and are
+# picked up as soon as the bot notifies them. the table sweep is only
+# a slow fallback. jobs are handed to a pool of worker processes; a
+# worker owns a job once it claimed it in the table and for as long
+# as it renews its lease on it. this allows several explorers on
+# different hosts to share the same table. progress is checkpointed
+# after each cleared block so that a job taken over from a dead worker
+# resumes where it stopped. waiting jobs are handed to the workers
+# earliest deadline first and jobs due far away are held back during
+# bursts so that the urgent ones always find a free worker.
+# usage: python bg_explorer.py [number of workers]
+# set EXPLORE_PROFILE to a file to get the skill profile of every job.
 '''
 
 # imports
-import sys, os
-try:
-   import cPickle as pickle
-except ModuleNotFoundError:
-   import pickle
-from glob import glob
+import sys, os, socket, threading, json
 import time as tm
-from idleUser import USER_TEMPS_PATH
+import heapq as hq
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+import expQueue as eq
 
 # add game world package to path so that internal imports work
 sys.path.insert(0, os.getcwd() + "/world")
 
+from idleUser import heroSummary, makeDelta
 from world.confrontation import Party
 from world.dungeon import DUNGEON
+import skillLib as skl
+from helpers import Rolls
+import metrics as mx # same module object as the one the world uses
 
-def run_exploration(file: str):
-   '''the unique function of this process. it checks for the existence
-   of specific files that tells it if exploration must happen or 
-   not. if found, it runs the required exploration and compute the
-   results that it then saves back in a file with a different name.
+SNAPSHOT_BLOCKS = 4 # cleared blocks between two resume snapshots
+
+def run_exploration(setupData: dict, resume = None,
+   checkpoint = None) -> dict:
+   '''the unique function of this process. it runs the exploration
+   described by the setup data of a claimed job and compute the
+   results that it then returns so they can be saved back in the
+   exploration table. the exploration restarts from the "resume"
+   snapshot if one is given. after each cleared block, the progress
+   is passed to "checkpoint" if it is set, as (block, blocks,
+   monsters, snapshot). the snapshot is None but every
+   SNAPSHOT_BLOCKS blocks.
    '''
-   # recover data
-   setupData = None
-   with open(file, "rb") as setupFile:
-      setupData = pickle.load(setupFile)
    # shape of the recovered data:
    # setupData = {
    #    "startTime": x,
    #    "floor": x,
-   #    "users": [xxx,xxxx,xxxxx]
+   #    "users": [xxx,xxxx,xxxxx],
+   #    "seed": x # optional
    # }
    # setup
    f = setupData["floor"]
    start = setupData["startTime"]
    floor = DUNGEON[f]
-   blocks = floor.build()
+   # heroes as they left. when resuming, the snapshot holds its own
+   # copy of the heroes so the setup data is still untouched.
+   before = [heroSummary(u) for u in setupData["users"]]
+   # every roll of the exploration comes from its own generator. it
+   # is seeded once from the job so an exploration can be replayed
+   # and its state is checkpointed to resume the same rolls.
+   rng = Rolls(setupData.get("seed"))
+   if resume == None: # fresh start
+      resume = {
+         "layout": floor.getLayout(floor.build(rng = rng)),
+         "block": 0,
+         "users": setupData["users"],
+         "hostiles": list(),
+         "loot": list(),
+         "miscs": "miscellaneous:\n",
+         "file": ""
+      }
+   if "rng" in resume: # same rolls and cooldowns as when it stopped
+      rng.setstate(resume["rng"])
+   skl.setCooldowns(resume.get("cooldowns"))
+   blocks = floor.rebuild(resume["layout"])
+   users = resume["users"]
    party = list()
-   for u in setupData["users"]:
+   for u in users:
       party.append(u.getHero())
    party = Party(party)
-   hostiles = list() # report
-   loot = list() # report
-   file = ""
-   miscs = "miscellaneous:\n" # report
+   hostiles = resume["hostiles"] # report
+   loot = resume["loot"] # report
+   file = resume["file"]
+   miscs = resume["miscs"] # report
    # exploration loop
-   current = 0
+   current = resume["block"]
    while current < len(blocks) and party.stillStands():
       block = blocks[current] 
-      returned = block.explore(party, floor.getHazardLevel())
+      begin = mx.clock()
+      returned = block.explore(party, floor.getHazardLevel(), rng)
+      mx.observe("block." + type(block).__name__, mx.clock() - begin)
       if returned != None:
          for t, descr in returned[0]:
             if t == 'm': # monster
@@ -70,6 +112,21 @@ def run_exploration(file: str):
          file = returned[1]
       if party.stillStands():
          current += 1
+         if checkpoint != None and current < len(blocks):
+            snapshot = None # counters only, the heroes are heavy
+            if current % SNAPSHOT_BLOCKS == 0:
+               snapshot = {
+                  "layout": resume["layout"],
+                  "block": current,
+                  "users": users,
+                  "hostiles": hostiles,
+                  "loot": loot,
+                  "miscs": miscs,
+                  "file": file,
+                  "rng": rng.getstate(),
+                  "cooldowns": skl.getCooldowns()
+               }
+            checkpoint(current, len(blocks), len(hostiles), snapshot)
    # end of exploration loop
    for adv in party.getMembers():
       adv.getSkillSet().resetAll() # reset all skills cooldowns
@@ -88,8 +145,6 @@ def run_exploration(file: str):
       report += "number of monster defeated: `"
       defeated = len(hostiles)
       report += "{}`\n".format(defeated)
-      for u in setupData["users"]:
-         u.updateDefeated(defeated)
       # loot report
       report += "items found: `"
       itemSet = set(loot)
@@ -100,37 +155,280 @@ def run_exploration(file: str):
       report += "`\n"
       report += miscs + '\n'
    else: # party died
+      defeated = 0 # nothing is kept anyway
       report = "Floor {} exploration failed!\n".format(f)
       report += "your party has fallen...\n"
       report += "your rescue key is **{}**. ".format(
-         setupData["users"][0].getKey())
+         users[0].getKey())
       report += "send it to a friend so they can rescue you.\n\n"
       report += "see attached file for death conditions.\n"
+      if miscs.count('\n') > 1: # notable events
+         report += '\n' + miscs
       # last fight info
       # with open(info[1], 'r') as fightInfo:
       #   report += fightInfo.read()
       #os.remove(info[1]) # delete file
-   # save all data into one object
+   # save all data into one object. the heroes are reduced to what
+   # changed about them.
    expData = {
       "endTime": start + floor.getSize() * 120 + 1,
       "floor": f,
       "cleared": cleared,
-      "users": setupData["users"],
+      "users": [makeDelta(u, b, defeated) for u, b in zip(users, before)],
       "report": report,
       "file": file
    }
-   # dump object in a file
-   with open(USER_TEMPS_PATH + str(start) + ".done", "wb") as expFile:
-      pickle.dump(expData, expFile, pickle.HIGHEST_PROTOCOL)
-   # erase ".wait"
-   os.remove(USER_TEMPS_PATH + str(start) + ".wait")
-   
+   return expData
+
+# job ownership
+# a job is owned through a lease in the exploration table that the
+# worker keeps renewing as long as it works on it (heartbeat). a job
+# whose lease has not been renewed for "lease" seconds belongs to a
+# dead worker and any explorer can put it back in the queue. results
+# are fenced: a worker only publishes them if it still owns the lease
+# when it is done.
+LEASE_TIME = 60 # sec
+
+def owner() -> str:
+   '''return the name under which this process claims jobs.'''
+   return "{}-{}".format(socket.gethostname(), os.getpid())
+def heartbeat(key: int, name: str, queue: str, lease: float,
+   stop: threading.Event):
+   '''renew the lease of "name" on job "key" every quarter of lease
+   until "stop" is set or the lease is lost.'''
+   db = eq.connect(queue)
+   while not stop.wait(lease / 4):
+      if not eq.renew(db, key, name, lease): # reclaimed
+         break
+   db.close()
+def work(key: int, queue = eq.QUEUE_PATH, lease = LEASE_TIME,
+   ledger = None, profile = None) -> tuple:
+   '''worker process entry point. claim, run and commit the job.
+   return True if this worker published the job results along with
+   the metrics of the job. every commit is appended to the "ledger"
+   file if one is given. if a "profile" file is given, the skills
+   are profiled and the profile of the job is appended to it as one
+   json line.'''
+   name = owner()
+   mx.PROFILE = profile != None
+   db = eq.connect(queue)
+   setupData = eq.claim(db, key, name, lease)
+   if setupData == None: # someone else claimed it
+      db.close()
+      mx.count("jobs.skipped")
+      return False, mx.collect()
+   mx.observe("pickup", tm.time() - setupData.get("submitTime", key))
+   begin = mx.clock()
+   stop = threading.Event()
+   beat = threading.Thread(target = heartbeat,
+      args = (key, name, queue, lease, stop), daemon = True)
+   beat.start()
+   try:
+      expData = run_exploration(setupData, eq.snapshot(db, key),
+         partial(eq.checkpoint, db, key, name))
+   finally:
+      stop.set()
+   elapsed = mx.clock() - begin
+   mx.observe("job", elapsed)
+   mx.observe("job.floor{}".format(setupData["floor"]), elapsed)
+   done = eq.complete(db, key, name, expData)
+   db.close()
+   if not done:
+      mx.count("jobs.lost") # lease lost: results dropped
+   elif not expData["cleared"]:
+      mx.count("jobs.fallen")
+   else:
+      mx.count("jobs.cleared")
+   if done and ledger != None:
+      with open(ledger, 'a') as journal:
+         journal.write("{} {}\n".format(key, name))
+   collected = mx.collect()
+   if profile != None:
+      with open(profile, 'a') as journal:
+         journal.write(json.dumps({"key": key, "owner": name,
+            "floor": setupData["floor"], "cleared": expData["cleared"],
+            "profile": mx.profile(collected)}) + '\n')
+   return done, collected
+
+# scheduling
+# results only matter once the exploration end time is reached so the
+# waiting jobs are kept in a heap by end time (deadline). the slack of
+# a job is the time left before its deadline once it is ran.
+FAR_SLACK = 600 # sec of slack above which a job can be held back
+STATS_PATH = "records/stats/" # one json file of statistics per explorer
+STATS_INTERVAL = 10 # sec between two writes of the statistics
+
+class Scheduler:
+   '''earliest deadline first queue of the jobs of an explorer. it
+   never hands out more jobs than there are workers so that the order
+   is not lost in the pool's own queue. during a burst (more jobs than
+   workers), the jobs due far away can only use half of the workers.
+   the object is shared with the pool callbacks thus locked.'''
+   def __init__(self, workers: int):
+      self.workers = workers
+      self.heap = list() # (endTime, key) of the waiting jobs
+      self.waiting = set() # keys in the heap
+      self.inflight = dict() # key: (endTime, start, far) of running jobs
+      self.lock = threading.Lock()
+      self.estimate = 0 # average wall time of a job (sec)
+      self.stats = {
+         "dispatched": 0,
+         "completed": 0,
+         "late": 0,      # completed after their deadline
+         "deferred": 0,  # times the far jobs were held back
+         "maxDepth": 0,
+         "slackMin": None,
+         "slackSum": 0
+      }
+
+   # getters
+   def slack(self, endTime: int, now: float) -> float:
+      '''return the time that would be left before "endTime" if a
+      job was started "now".'''
+      return endTime - now - self.estimate
+   def getStats(self) -> dict:
+      '''return the queue depth and slack statistics.'''
+      with self.lock:
+         stats = dict(self.stats)
+         stats["depth"] = len(self.heap)
+         stats["inflight"] = len(self.inflight)
+         stats["workers"] = self.workers
+         stats["estimate"] = round(self.estimate, 3)
+         stats["slackMean"] = None
+         if stats["completed"] > 0:
+            stats["slackMean"] = round(stats["slackSum"] /
+               stats["completed"], 3)
+         stats.pop("slackSum")
+         if len(self.heap) > 0: # most urgent waiting job
+            stats["nextSlack"] = round(self.slack(self.heap[0][0],
+               tm.time()), 3)
+      return stats
+
+   # setters
+   def push(self, key: int, endTime: int):
+      '''add a waiting job unless it is already known.'''
+      with self.lock:
+         if key not in self.waiting and key not in self.inflight:
+            hq.heappush(self.heap, (endTime, key))
+            self.waiting.add(key)
+            self.stats["maxDepth"] = max(self.stats["maxDepth"],
+               len(self.heap))
+   def pop(self, now: float) -> list:
+      '''take out the jobs to hand to the workers right now, most
+      urgent first. return their keys.'''
+      out = list()
+      with self.lock:
+         burst = len(self.heap) + len(self.inflight) > self.workers
+         far = len([j for j in self.inflight.values() if j[2]])
+         while len(self.heap) > 0 and len(self.inflight) < self.workers:
+            endTime, key = self.heap[0]
+            isFar = self.slack(endTime, now) > FAR_SLACK
+            if burst and isFar and far >= max(1, self.workers // 2):
+               # the next ones are due even later: wait for the burst
+               # to end or for a far job to be done
+               self.stats["deferred"] += 1
+               break
+            hq.heappop(self.heap)
+            far += isFar
+            self.waiting.discard(key)
+            self.inflight[key] = (endTime, now, isFar)
+            self.stats["dispatched"] += 1
+            out.append(key)
+      return out
+   def done(self, key: int, now: float, ran: bool):
+      '''record the end of job "key". "ran" is False if the job was
+      not ran by this explorer after all.'''
+      with self.lock:
+         endTime, start, isFar = self.inflight.pop(key)
+         if not ran: # claimed by another explorer or crashed
+            return
+         n = self.stats["completed"]
+         self.estimate = (self.estimate * n + now - start) / (n + 1)
+         slack = endTime - now
+         self.stats["completed"] += 1
+         self.stats["late"] += slack < 0
+         self.stats["slackSum"] += slack
+         if self.stats["slackMin"] == None or slack < self.stats["slackMin"]:
+            self.stats["slackMin"] = round(slack, 3)
+
+def writeStats(stats: dict, path = STATS_PATH):
+   '''write the explorer "stats" in the "path" folder. the file is
+   replaced in one go so that it can be read at any time.'''
+   os.makedirs(path, exist_ok = True)
+   with open(path + owner() + ".tmp", 'w') as file:
+      json.dump(stats, file, indent = 3)
+   os.replace(path + owner() + ".tmp", path + owner() + ".json")
+
+# explorer main loop
+def serve(workers: int, queue = eq.QUEUE_PATH, listener = None,
+   sweep = eq.SWEEP_INTERVAL, lease = LEASE_TIME, ledger = None,
+   stats = STATS_PATH, profile = None):
+   '''run jobs from the "queue" table on a pool of "workers"
+   processes forever. the table is swept every "sweep" seconds, in
+   between jobs are only picked up when notified on "listener". the
+   scheduler statistics and the metrics of the jobs are written in
+   the "stats" folder every STATS_INTERVAL seconds. the skill
+   profile of every job goes to the "profile" file if one is given.'''
+   db = eq.connect(queue)
+   pool = ProcessPoolExecutor(max_workers = workers)
+   sched = Scheduler(workers)
+   wake = threading.Event() # a worker is free (no listener)
+   poke = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+   lock = threading.Lock() # metrics are merged by the pool callbacks
+   def finished(key: int, job):
+      '''pool callback: free the worker, keep the metrics of the job
+      and wake the main loop.'''
+      ran = False
+      with lock:
+         if job.exception() != None:
+            mx.count("jobs.crashed")
+         else:
+            ran, collected = job.result()
+            mx.merge(collected)
+      sched.done(key, tm.time(), ran)
+      if listener == None:
+         wake.set()
+      else:
+         poke.sendto(b"free", listener.getsockname())
+   lastSweep = 0
+   lastStats = 0
+   while(True):
+      # fallback sweep catches jobs whose notification got lost
+      # and the ones of dead workers
+      if tm.time() - lastSweep >= sweep:
+         eq.reclaim(db)
+         for key, endTime in eq.pending(db):
+            sched.push(key, endTime)
+         lastSweep = tm.time()
+      if stats != None and tm.time() - lastStats >= STATS_INTERVAL:
+         with lock:
+            metrics = mx.report()
+         writeStats({"scheduler": sched.getStats(), "metrics": metrics},
+            stats)
+         lastStats = tm.time()
+      for key in sched.pop(tm.time()):
+         job = pool.submit(work, key, queue, lease, ledger, profile)
+         job.add_done_callback(lambda j, key = key: finished(key, j))
+      # sleep until notified, a worker is free or the next sweep
+      wait = max(0, sweep - (tm.time() - lastSweep))
+      if stats != None:
+         wait = min(wait, max(0, STATS_INTERVAL - (tm.time() - lastStats)))
+      if listener == None:
+         wake.wait(wait)
+         wake.clear()
+         keys = list()
+      else:
+         keys = eq.receive(listener, wait)
+      for key in keys: # notified jobs
+         job = eq.status(db, key)
+         if job != None and job[0] == "wait":
+            sched.push(key, job[2])
+
 # run
 if __name__ == "__main__":
-   while(True):
-      queue = glob(USER_TEMPS_PATH + "*.wait")
-      if len(queue) == 0: # no exploration task waiting
-         tm.sleep(10) # sleep 10 sec
-      else: # tasks available
-         for path in queue:
-            run_exploration(path) # run exploration task
\ No newline at end of file
+   workers = os.cpu_count()
+   if len(sys.argv) > 1:
+      workers = int(sys.argv[1])
+   # EXPLORE_PROFILE=<file> profiles the skills of every job
+   serve(workers, eq.QUEUE_PATH, eq.listen(),
+      profile = os.getenv("EXPLORE_PROFILE"))
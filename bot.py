@@ -16,6 +16,9 @@ import discord.ext.commands.errors as err # errors
 from discord.ext.commands import DefaultHelpCommand # help object
 import random as rnd                      # randomizer
 from math import ceil
+import asyncio                            # in-process explorations
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 try:
    import cPickle as pickle               # pickle
 except ModuleNotFoundError:
@@ -27,9 +30,11 @@ sys.path.insert(0, os.getcwd() + "/world")
 sys.path.insert(0, os.getcwd())
 
 # game world package imports
-from idleUser import IdleUser, save, load, USER_PICS_PATH,\
+from idleUser import IdleUser, save, load, applyDelta, USER_PICS_PATH,\
    USER_RECORDS_PATH, USER_TEMPS_PATH, HERO_SAVES_PATH
 import picsGen as pg
+import expQueue as eq
+from bg_explorer import work
 from world.helpers import timeString
 import collectibles as c
 from world.collectibles import Gear, Weapon, Armor, Accessory
@@ -37,11 +42,24 @@ import world.itemLib as il
 from world.classes import Fighter, Ranger, Elementalist
 from world.confrontation import Party
 from world.dungeon import DUNGEON
+from forecast import Forecasts, ESTIMATING
 
 # bot config
 load_dotenv()        # loads .env data
 # attach bot commands prefixes
 PREFIXES = ['>', '/', ';' ]
+# exploration jobs table. opened once the records folder exists
+QUEUE = None
+# exploration mode. "split" hands the explorations over to the
+# bg_explorer.py process(es) through the jobs table. "local" runs them
+# on a pool of processes owned by the bot, the only explorer then. the
+# jobs still go through the table so they outlive a restart of the bot.
+EXPLORE_MODE = os.getenv("EXPLORE_MODE", "split")
+EXPLORE_WORKERS = int(os.getenv("EXPLORE_WORKERS", os.cpu_count()))
+EXPLORER = None # process pool of the local mode
+RUNNING = dict() # key: future of the explorations ran by the pool
+# predicted clear chances shown by ;scout. estimated in the background
+FORECASTS = Forecasts()
 
 # override bot help command
 class CustomHelpCommand(DefaultHelpCommand):
@@ -172,14 +190,44 @@ async def isRegisteredWithHero(ctx):
          await waitThenSend(ctx, nHeroMSG.format(mention))
    return valid
 
-# transfer sensitive data
-def recoverData(u: IdleUser):
-   '''transfer some data from the current user file to 
-   the passed user object.'''
-   current = load(u.getID())
-   u.open = current.open # coop status
-   u.friendbook = current.friendbook # friendbook
-   u.getHero().wallet = current.getHero().getWallet() # wallet
+# local explorations
+def exploreLocally(key: int):
+   '''run the exploration job "key" of the table on the bot's pool.'''
+   global EXPLORER
+   loop = asyncio.get_running_loop()
+   try:
+      RUNNING[key] = loop.run_in_executor(EXPLORER, work, key,
+         eq.QUEUE_PATH)
+   except BrokenProcessPool: # a worker died and took the pool along
+      EXPLORER = ProcessPoolExecutor(max_workers = EXPLORE_WORKERS)
+      RUNNING[key] = loop.run_in_executor(EXPLORER, work, key,
+         eq.QUEUE_PATH)
+def resumeLocally():
+   '''run again the explorations left in the table by the pool of a
+   previous bot. their workers are gone so they are put back in the
+   queue, or marked failed once they crashed too often.'''
+   for key in eq.running(QUEUE):
+      if key not in RUNNING:
+         eq.release(QUEUE, key)
+   for key, end in eq.pending(QUEUE):
+      if key not in RUNNING:
+         exploreLocally(key)
+def localStatus(key: int) -> tuple:
+   '''return the (state, floor, endTime) of the exploration "key" ran
+   in local mode, as eq.status() does. a run that crashed is ran
+   again until the job is marked failed.'''
+   job = RUNNING.get(key)
+   if job != None and job.done():
+      RUNNING.pop(key)
+      if job.cancelled() or job.exception() != None: # crashed
+         if not job.cancelled():
+            print("exploration {} crashed: {}".format(key,
+               job.exception()))
+         eq.release(QUEUE, key)
+   status = eq.status(QUEUE, key)
+   if status != None and status[0] == "wait" and key not in RUNNING:
+      exploreLocally(key)
+   return status
 
 # rescue algorithm
 async def rescueFallen(key: int, floor: int) -> list:
@@ -187,36 +235,36 @@ async def rescueFallen(key: int, floor: int) -> list:
    on the floor the player is exploring. return a list
    representing things recovered from the fallen as reward.
    if no reward was found, return '''
-   temp = USER_TEMPS_PATH + str(key) + ".resq"
    rewards = None
-   if os.path.isfile(temp): # fallen party exist
-      with open(temp, "rb") as file:
-         data = pickle.load(file) # recover data
-         if data["floor"] == floor:
-            rewards = list()
-            for fallen in data["users"]:
-               # possible reward from fallen
-               bag = fallen.getHero().getBag()
-               if not bag.isEmpty():
-                  stack = rnd.choice(list(bag.contents.values()))
-                  rewards.append((stack[0], len(stack)))
-               # free user
-               fUser = load(fallen.getID())
-               fUser.inCity = True
-               fUser.setKey(0) # reset exploration key
-               recoverData(fUser)
-               save(fUser)
-               # tell fallen user he was rescued
-               dm = await getDM(fUser)
-               await dm.send("`you have been rescued. please be careful "
-                  "next time.`")
-      os.remove(temp) # erase the file
+   job = eq.status(QUEUE, key)
+   if job != None and job[0] == "resq": # fallen party exist
+      if job[1] == floor:
+         data = eq.fetch(QUEUE, key) # recover data
+         rewards = list()
+         for fallen in data["users"]:
+            fUser = load(fallen["id"])
+            # possible reward from fallen
+            bag = fUser.getHero().getBag()
+            if not bag.isEmpty():
+               stack = rnd.choice(list(bag.contents.values()))
+               rewards.append((stack[0], len(stack)))
+            # free user
+            fUser.inCity = True
+            fUser.setKey(0) # reset exploration key
+            save(fUser)
+            # tell fallen user he was rescued
+            dm = await getDM(fUser)
+            await dm.send("`you have been rescued. please be careful "
+               "next time.`")
+      eq.remove(QUEUE, key) # erase the job
    return rewards
 
 @bot.event
 async def on_ready():
    readyMSG = "We have logged in as {}\n".format(bot.user)
    print(readyMSG)
+   if EXPLORE_MODE == "local": # explorations of the last run
+      resumeLocally()
    # get all guilds
    readyMSG += "online in servers:\n"
    for g in bot.guilds:
@@ -499,6 +547,14 @@ async def scout(ctx, floor: int):
          else: # never explored
             info += DUNGEON[floor].__str__()
             info += "\n*explore it to unlock more info.*"
+         if user.hasHero(): # predicted chances to clear it alone
+            chances = FORECASTS.predict(user.getHero(), floor)
+            if chances == ESTIMATING:
+               info += "\n*clear chances for {}: {}*".format(
+                  user.getHero().getName(), ESTIMATING)
+            elif chances != None:
+               info += "\nclear chances for {}: **{:.0%}**".format(
+                  user.getHero().getName(), chances)
          await waitThenSend(ctx, info)
    else:
       await waitThenSend(ctx, nRegMSG)
@@ -584,11 +640,17 @@ async def explore(ctx, f: int, allies: str=None):
       setupData = {
          "startTime": start,
          "floor": f,
-         "users": going
+         "users": going,
+         "seed": rnd.randrange(2**32) # replays the exploration
       }
-      with open(USER_TEMPS_PATH + str(start) + ".wait", "wb") as setupFile:
-         pickle.dump(setupData, setupFile, pickle.HIGHEST_PROTOCOL)
-      # the rest will be ran by the bg_explorer.py process
+      end = start + DUNGEON[f].getSize() * 120 + 1
+      setupData["submitTime"] = tm.time() # for the pickup latency
+      eq.submit(QUEUE, start, f, end, setupData)
+      if EXPLORE_MODE == "local": # ran by the bot's own pool
+         exploreLocally(start)
+      else:
+         eq.notify(start) # wake up the explorer
+         # the rest will be ran by the bg_explorer.py process
       # announce that the party has left
       msg = ""
       for u in going:
@@ -613,77 +675,88 @@ async def report(ctx):
          await waitThenSend(ctx,
             "you didn't go on any exploration {}.".format(mention))
       else: # was on an exploration
-         # try loading temp file
-         temp = USER_TEMPS_PATH + str(user.getKey()) + ".done"
-         if os.path.isfile(temp): # report file exists
-            data = None
-            with open(temp, 'rb') as expFile:
-               data = pickle.load(expFile)
-            current = int(tm.time())
-            if current < data["endTime"]: # not completed
-               remain = timeString(data["endTime"] - current)
-               await waitThenSend(ctx,
-                  "`{}` until end of your exploration {}.".format(remain,
-                     mention))
-            else: # completed
-               # two cases based on data['cleared']
-               if data["cleared"]: # success
-                  for u in data["users"]:
-                     u.getHero().resurrect() # resurrect hero if needed
-                     # rescue fallen adventurer
-                     rewards = await rescueFallen(u.getRescueKey(), 
-                        data["floor"])
-                     report = data["report"]
-                     if rewards != None:
-                        report += "rescue rewards: "
-                        for i, (itm, q) in enumerate(rewards):
-                           u.getHero().getBag().addMulti(itm, q)
-                           report += itm.getName() + " x " + str(q)
-                           if i < len(rewards) - 1:
-                              report += ", "
-                     u.setRescueKey(0) # reset rescue key
-                     u.inCity = True # set as in town
-                     u.setKey(0) # reset exploration key
-                     u.setTopFloor(data["floor"]) # update top
-                     recoverData(u) # keep important data before overwriting
-                     # overwrite/update user account and hero
-                     save(u)
-                     await (await getDM(u)).send(report) # dm
-                  os.remove(temp) # erase temp file
-               else: # failure
-                  # in case of failure, the player(s) hero(es) is(are) 
-                  # stuck in the dungeon until rescued.
-                  # rename ".wait" into a ".resq"
-                  os.rename(temp, 
-                        USER_TEMPS_PATH + str(user.getKey()) + ".resq")
-                  # send the DMs
-                  name = data["file"]
-                   # change extension to .txt
-                  name = name.split('.')[0] + ".txt"
-                  os.rename(data["file"], name)
-                  # send failure DMs
-                  for u in data["users"]:
-                     await (await getDM(u)).send(data["report"],
-                        file = discord.File(name)) # dm
-                  os.remove(name) # delete failure file
-               # announce to the user(s) to check their DM
-               await waitThenSend(ctx, 
-                     mention + " check your DMs for the report.")
-         else: # ".done" file doesn't exist
-            temp = USER_TEMPS_PATH + str(user.getKey()) + ".resq"
-            if os.path.isfile(temp): # ".resq" exists
-               msg = "your party has fallen {}. ".format(mention)
-               msg += "use the key {} to ask for help.".format(
-                  user.getKey())
-               await waitThenSend(ctx, msg)
-            else: # problem with exploration
-               # so we free the user
-               user.setKey(0)
-               user.inCity = True
-               save(user)
-               msg = "something went wrong. your hero comes back "
-               msg += "to the city {}".format(mention)
-               await waitThenSend(ctx, msg)
+         # look the exploration up
+         key = user.getKey()
+         if EXPLORE_MODE == "local": # ran by the bot's own pool
+            job = localStatus(key)
+         else:
+            job = eq.status(QUEUE, key)
+         current = int(tm.time())
+         if job != None and job[0] in ("wait", "running", "done") and\
+            current < job[2]: # not completed
+            remain = timeString(job[2] - current)
+            msg = "`{}` until end of your exploration {}.".format(remain,
+               mention)
+            done = None
+            if job[0] != "done": # last checkpoint
+               done = eq.progress(QUEUE, key)
+            if done != None: # still exploring
+               msg += " block {}/{} cleared, {} monsters so far.".format(
+                  *done)
+            await waitThenSend(ctx, msg)
+         elif job != None and job[0] == "done": # completed
+            data = eq.fetch(QUEUE, key)
+            # two cases based on data['cleared']
+            if data["cleared"]: # success
+               for delta in data["users"]:
+                  u = load(delta["id"]) # current save
+                  applyDelta(u, delta) # exploration gains
+                  u.getHero().resurrect() # resurrect hero if needed
+                  # rescue fallen adventurer
+                  rewards = await rescueFallen(u.getRescueKey(), 
+                     data["floor"])
+                  report = data["report"]
+                  if rewards != None:
+                     report += "rescue rewards: "
+                     for i, (itm, q) in enumerate(rewards):
+                        u.getHero().getBag().addMulti(itm, q)
+                        report += itm.getName() + " x " + str(q)
+                        if i < len(rewards) - 1:
+                           report += ", "
+                  u.setRescueKey(0) # reset rescue key
+                  u.inCity = True # set as in town
+                  u.setKey(0) # reset exploration key
+                  u.setTopFloor(data["floor"]) # update top
+                  # overwrite/update user account and hero
+                  save(u)
+                  await (await getDM(u)).send(report) # dm
+               eq.remove(QUEUE, key) # erase job and checkpoint
+            else: # failure
+               # in case of failure, the player(s) hero(es) is(are) 
+               # stuck in the dungeon until rescued.
+               eq.setState(QUEUE, key, "resq")
+               # send the DMs
+               name = data["file"]
+                # change extension to .txt
+               name = name.split('.')[0] + ".txt"
+               os.rename(data["file"], name)
+               # send failure DMs
+               for delta in data["users"]:
+                  u = load(delta["id"])
+                  await (await getDM(u)).send(data["report"],
+                     file = discord.File(name)) # dm
+               os.remove(name) # delete failure file
+            # announce to the user(s) to check their DM
+            await waitThenSend(ctx, 
+                  mention + " check your DMs for the report.")
+         elif job != None and job[0] == "resq": # party has fallen
+            msg = "your party has fallen {}. ".format(mention)
+            msg += "use the key {} to ask for help.".format(key)
+            await waitThenSend(ctx, msg)
+         elif job != None and job[0] in ("wait", "running"):
+            # over but the explorer is behind: leave the job be
+            msg = "your exploration is over but still being processed "
+            msg += "{}. try again in a moment.".format(mention)
+            await waitThenSend(ctx, msg)
+         else: # problem with exploration (lost or failed job)
+            # so we free the user
+            eq.remove(QUEUE, key) # leftover checkpoint
+            user.setKey(0)
+            user.inCity = True
+            save(user)
+            msg = "something went wrong. your hero comes back "
+            msg += "to the city {}".format(mention)
+            await waitThenSend(ctx, msg)
 
 # take on a rescue mission
 @bot.command(name = "rescue", help = "use this command and pass it the "
@@ -695,14 +768,13 @@ async def getRescueKey(ctx, key: str):
    if (await isRegisteredWithHero(ctx)):
       user = load(ctx.message.author.id)
       mention = ctx.message.author.mention
-      resq = USER_TEMPS_PATH + str(key) + ".resq"
-      if os.path.isfile(resq): # fallen party exist
+      job = None
+      if key.isdigit():
+         job = eq.status(QUEUE, int(key))
+      if job != None and job[0] == "resq": # fallen party exist
          user.setRescueKey(key) # set rescue key
          save(user) # to record key
-         floor = 0
-         with open(resq, "rb") as rescueFile:
-            contents = pickle.load(rescueFile)
-            floor = contents["floor"]
+         floor = job[1]
          msg = "{}, you're set to go rescue a fallen party on `floor {}`".format(
             mention, floor)
          msg += ". make sure to explore that floor immediatly."
@@ -724,17 +796,16 @@ async def saveme(ctx):
    if (await isRegisteredWithHero(ctx)):
       user = load(ctx.message.author.id)
       mention = ctx.message.author.mention
-      resq = USER_TEMPS_PATH + str(user.getKey()) + ".resq"
+      key = user.getKey()
+      job = eq.status(QUEUE, key)
       msg = str()
-      if (not user.isInCity()) and os.path.isfile(resq): # fallen party exists
-         # recover data
-         data = None
-         with open(resq, "rb") as file:
-            data = pickle.load(file) 
+      if (not user.isInCity()) and job != None and job[0] == "resq":
+         # fallen party exists so recover data
+         data = eq.fetch(QUEUE, key)
          idx = 0
          found = False
          while idx < len(data["users"]) and not found:
-            found = data["users"][idx].getUname() == user.getUname()
+            found = data["users"][idx]["id"] == user.getID()
             if not found:
                idx += 1
          if found: # user is in party
@@ -745,13 +816,12 @@ async def saveme(ctx):
                user.inCity = True
                user.setKey(0)
                save(user)
-               # update rescue file
+               # update rescue job
                data["users"].remove(data["users"][idx])
                if len(data["users"]) > 0: # there's other heroes
-                  with open(resq, "wb") as file:
-                     data = pickle.dump(file, pickle.HIGHEST_PROTOCOL)
+                  eq.store(QUEUE, key, data)
                else:
-                  os.remove(resq) # erase rescue file
+                  eq.remove(QUEUE, key) # erase rescue job
                # send a response message
                msg += "an elite team from the city went to save your "
                msg += "ass for `{} coins` {}. ".format(fee, mention)
@@ -1172,6 +1242,9 @@ if __name__ == "__main__":
       os.mkdir("records")
       for subRep in ["generated", "pics", "saves", "temps", "users"]:
          os.mkdir("records/" + subRep)
+   QUEUE = eq.connect() # exploration jobs table
+   if EXPLORE_MODE == "local":
+      EXPLORER = ProcessPoolExecutor(max_workers = EXPLORE_WORKERS)
    # run bot / catch and log errors
    try:
       bot.run(os.getenv("BOT_TOKEN"))
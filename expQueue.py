@@ -0,0 +1,244 @@
+'''
+# expQueue.py
+# this module holds what the bot and the background explorer
+# share about exploration jobs. jobs live in a sqlite table: the
+# bot submits a job in the "wait" state and then pings the explorer
+# through a local udp socket so that the job is picked up right
+# away. the explorer still sweeps the table from time to time in
+# case a ping got lost (explorer restarted, full socket buffer...).
+# a job then goes "running" under the lease of a worker, "done"
+# with the exploration results and "resq" if the party fell. a job
+# whose worker died or crashed MAX_ATTEMPTS times is marked "failed"
+# instead of being ran again forever. while
+# it runs, a checkpoint is written after each cleared block: a few
+# counters for ;report and, every few blocks, a snapshot to resume
+# the job from.
+# date: 10/18/26
+# author: dnglokpor
+'''
+
+# imports
+import socket
+import sqlite3
+try:
+   import cPickle as pickle
+except ModuleNotFoundError:
+   import pickle
+import time as tm
+
+# wakeup channel
+EXPLORER_HOST = "127.0.0.1"
+EXPLORER_PORT = 50321
+# every explorer that must be woken up when a job is written. add
+# the other hosts here when several explorers share the temps folder
+# (their EXPLORER_HOST must then be an address the bot can reach).
+EXPLORERS = [(EXPLORER_HOST, EXPLORER_PORT)]
+SWEEP_INTERVAL = 60 # sec between two fallback sweeps of the folder
+MAX_ATTEMPTS = 3 # claims of a job before it is marked failed
+
+def notify(key: int):
+   '''tells the background explorers that the job "key" has been
+   written. fails silently because the fallback sweep will find
+   the job anyway.'''
+   with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+      for address in EXPLORERS:
+         try:
+            sock.sendto(str(key).encode(), address)
+         except OSError:
+            pass # explorer not listening
+
+def listen() -> socket.socket:
+   '''return the socket on which the explorer receives the job
+   notifications.'''
+   sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+   sock.bind((EXPLORER_HOST, EXPLORER_PORT))
+   return sock
+
+def receive(sock: socket.socket, timeout: float) -> list:
+   '''wait at most "timeout" seconds for notifications on "sock".
+   return the list of keys received (empty if it timed out). all
+   notifications already queued are drained in one go.'''
+   keys = list()
+   sock.settimeout(timeout)
+   try:
+      while True:
+         data = sock.recv(64)
+         try:
+            keys.append(int(data.decode()))
+         except ValueError:
+            pass # not one of ours
+         sock.settimeout(0) # drain without blocking
+   except (socket.timeout, BlockingIOError):
+      pass
+   return keys
+
+# job table
+QUEUE_PATH = "records/explorations.db"
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+   key INTEGER PRIMARY KEY, -- exploration key: its start time
+   floor INTEGER NOT NULL,
+   state TEXT NOT NULL,     -- wait, running, done, resq or failed
+   owner TEXT,              -- worker holding the lease
+   lease REAL,              -- epoch at which the lease expires
+   endTime INTEGER,         -- epoch at which the exploration ends
+   data BLOB,               -- pickled setup data or results
+   attempts INTEGER NOT NULL DEFAULT 0 -- times the job was claimed
+);
+CREATE INDEX IF NOT EXISTS jobsByState ON jobs (state, endTime);
+CREATE INDEX IF NOT EXISTS jobsByOwner ON jobs (owner);
+CREATE TABLE IF NOT EXISTS progress (
+   key INTEGER PRIMARY KEY, -- exploration key
+   block INTEGER NOT NULL,  -- number of blocks cleared
+   blocks INTEGER NOT NULL, -- number of blocks of the floor
+   monsters INTEGER NOT NULL, -- number of monsters defeated
+   data BLOB                -- pickled snapshot to resume from
+);
+'''
+
+def connect(path = QUEUE_PATH) -> sqlite3.Connection:
+   '''open the job table at "path", creating it if needed. every
+   statement is committed on its own so each state change is
+   atomic.'''
+   db = sqlite3.connect(path, timeout = 30, isolation_level = None)
+   db.executescript(SCHEMA)
+   columns = [row[1] for row in db.execute("PRAGMA table_info(jobs)")]
+   if "attempts" not in columns: # table made before the attempts
+      db.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL "
+         "DEFAULT 0")
+   return db
+def dumps(data) -> bytes:
+   '''return the pickled version of "data" for the data column.'''
+   return pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+
+# bot side
+def submit(db: sqlite3.Connection, key: int, floor: int, endTime: int,
+   setupData: dict):
+   '''add a waiting exploration job to the table.'''
+   db.execute("INSERT INTO jobs (key, floor, state, endTime, data) "
+      "VALUES (?, ?, 'wait', ?, ?)", (key, floor, endTime,
+      dumps(setupData)))
+def put(db: sqlite3.Connection, key: int, floor: int, state: str,
+   endTime: int, data):
+   '''write job "key" straight in "state", replacing any previous
+   job of that key.'''
+   db.execute("INSERT OR REPLACE INTO jobs (key, floor, state, endTime, "
+      "data) VALUES (?, ?, ?, ?, ?)", (key, floor, state, endTime,
+      dumps(data)))
+   db.execute("DELETE FROM progress WHERE key = ?", (key,))
+def status(db: sqlite3.Connection, key: int) -> tuple:
+   '''return the (state, floor, endTime) of job "key" or None if
+   there is no such job. the data is not loaded.'''
+   return db.execute("SELECT state, floor, endTime FROM jobs "
+      "WHERE key = ?", (key,)).fetchone()
+def fetch(db: sqlite3.Connection, key: int):
+   '''return the unpickled data of job "key" or None if there is
+   no such job.'''
+   row = db.execute("SELECT data FROM jobs WHERE key = ?",
+      (key,)).fetchone()
+   if row == None:
+      return None
+   return pickle.loads(row[0])
+def progress(db: sqlite3.Connection, key: int) -> tuple:
+   '''return the (block, blocks, monsters) of the last checkpoint of
+   job "key" or None if it has none. the snapshot is not loaded.'''
+   return db.execute("SELECT block, blocks, monsters FROM progress "
+      "WHERE key = ?", (key,)).fetchone()
+def store(db: sqlite3.Connection, key: int, data):
+   '''overwrite the data of job "key".'''
+   db.execute("UPDATE jobs SET data = ? WHERE key = ?", (dumps(data), key))
+def setState(db: sqlite3.Connection, key: int, state: str):
+   '''move job "key" to "state".'''
+   db.execute("UPDATE jobs SET state = ? WHERE key = ?", (state, key))
+def remove(db: sqlite3.Connection, key: int):
+   '''erase job "key" and its checkpoint from the table.'''
+   db.execute("DELETE FROM jobs WHERE key = ?", (key,))
+   db.execute("DELETE FROM progress WHERE key = ?", (key,))
+
+# explorer side
+# a worker owns a running job as long as its lease is not expired.
+# leases are renewed by the worker and checked by the others with
+# their own clocks so hosts sharing the table must agree on the time
+# within a fraction of the lease.
+def pending(db: sqlite3.Connection) -> list:
+   '''return the (key, endTime) of the jobs waiting to be ran,
+   earliest end time first.'''
+   return db.execute("SELECT key, endTime FROM jobs WHERE "
+      "state = 'wait' ORDER BY endTime").fetchall()
+def claim(db: sqlite3.Connection, key: int, owner: str, lease: float):
+   '''take ownership of job "key" for "lease" seconds and count the
+   attempt. return the setup data or None if the job was not waiting
+   anymore.'''
+   cursor = db.execute("UPDATE jobs SET state = 'running', owner = ?, "
+      "lease = ?, attempts = attempts + 1 WHERE key = ? AND "
+      "state = 'wait'",
+      (owner, tm.time() + lease, key))
+   if cursor.rowcount != 1: # someone else claimed it
+      return None
+   return fetch(db, key)
+def renew(db: sqlite3.Connection, key: int, owner: str,
+   lease: float) -> bool:
+   '''extend the lease of "owner" on job "key". return False if
+   the lease was lost.'''
+   cursor = db.execute("UPDATE jobs SET lease = ? WHERE key = ? AND "
+      "owner = ? AND state = 'running'", (tm.time() + lease, key, owner))
+   return cursor.rowcount == 1
+UPSERT = ("ON CONFLICT (key) DO UPDATE SET block = excluded.block, "
+   "blocks = excluded.blocks, monsters = excluded.monsters, "
+   "data = COALESCE(excluded.data, data)") # keeps the last snapshot
+def checkpoint(db: sqlite3.Connection, key: int, owner: str, block: int,
+   blocks: int, monsters: int, snapshot = None) -> bool:
+   '''save the progress of job "key" if "owner" still holds the lease
+   on the job. the counters are always written but the last snapshot
+   is only replaced if a new one is given. return True if it was
+   saved.'''
+   if snapshot != None:
+      snapshot = dumps(snapshot)
+   cursor = db.execute("INSERT INTO progress SELECT ?, ?, ?, ?, ? "
+      "WHERE EXISTS (SELECT 1 FROM jobs WHERE key = ? AND owner = ? "
+      "AND state = 'running') " + UPSERT, (key, block, blocks, monsters,
+      snapshot, key, owner))
+   return cursor.rowcount == 1
+def snapshot(db: sqlite3.Connection, key: int):
+   '''return the snapshot of the last checkpoint of job "key" or
+   None if it has none.'''
+   row = db.execute("SELECT data FROM progress WHERE key = ?",
+      (key,)).fetchone()
+   if row == None or row[0] == None:
+      return None
+   return pickle.loads(row[0])
+def complete(db: sqlite3.Connection, key: int, owner: str,
+   expData: dict) -> bool:
+   '''publish the results of job "key" if "owner" still holds its
+   lease. return True if they were published.'''
+   cursor = db.execute("UPDATE jobs SET state = 'done', owner = NULL, "
+      "lease = NULL, endTime = ?, data = ? WHERE key = ? AND owner = ? "
+      "AND state = 'running'", (expData["endTime"], dumps(expData),
+      key, owner))
+   if cursor.rowcount != 1: # lease lost
+      return False
+   db.execute("DELETE FROM progress WHERE key = ?", (key,))
+   return True
+def running(db: sqlite3.Connection) -> list:
+   '''return the keys of the jobs being ran.'''
+   return [row[0] for row in db.execute("SELECT key FROM jobs WHERE "
+      "state = 'running'")]
+def release(db: sqlite3.Connection, key: int, attempts = MAX_ATTEMPTS):
+   '''put the running job "key" back in the queue whatever its lease:
+   its worker is known to be gone. it is marked failed instead if it
+   was already claimed "attempts" times.'''
+   db.execute("UPDATE jobs SET state = CASE WHEN attempts >= ? THEN "
+      "'failed' ELSE 'wait' END, owner = NULL, lease = NULL WHERE "
+      "key = ? AND state = 'running'", (attempts, key))
+def reclaim(db: sqlite3.Connection, attempts = MAX_ATTEMPTS) -> int:
+   '''put back in the queue the running jobs whose lease expired.
+   the ones already claimed "attempts" times are marked failed
+   instead: they crash every worker that runs them. return how many
+   were put back.'''
+   now = tm.time()
+   db.execute("UPDATE jobs SET state = 'failed', owner = NULL, "
+      "lease = NULL WHERE state = 'running' AND lease < ? AND "
+      "attempts >= ?", (now, attempts))
+   cursor = db.execute("UPDATE jobs SET state = 'wait', owner = NULL, "
+      "lease = NULL WHERE state = 'running' AND lease < ?", (now,))
+   return cursor.rowcount
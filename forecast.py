@@ -0,0 +1,104 @@
+'''
+# forecast.py
+# predicted chances of a hero to clear a floor, shown by ;scout. the
+# predictions are estimated by the simulator in a background process
+# and kept in a small cache. the cache key is a rough signature of
+# the hero so that heroes alike share a prediction: class, level
+# band, gear, skills and floor. when the cache is full, the least
+# recently used prediction goes first. a prediction older than
+# MAX_AGE is still shown but estimated again in the background.
+# date: 10/18/26
+# author: dnglokpor
+'''
+
+# imports
+import sys, os
+import asyncio
+import time as tm
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+# add game world package to path so that internal imports work
+sys.path.insert(0, os.getcwd() + "/world")
+
+import simulator as sim
+from world.dungeon import DUNGEON
+
+LEVEL_BAND = 3 # levels sharing a prediction
+CACHE_SIZE = 512 # predictions kept
+MAX_AGE = 6 * 3600 # sec before a prediction is estimated again
+RUNS = 2000 # simulated explorations per estimate
+ESTIMATING = "estimating…" # shown until the first estimate is done
+
+def signature(hero, floor: int) -> tuple:
+   '''return the cache key of "hero" exploring "floor".'''
+   gear = tuple(g.getName() if g != None else None
+      for g in hero.getEquipped().values())
+   skills = tuple(s.getName() if s != None else None
+      for s in hero.getSkillSet().values())
+   band = (hero.getLevel().getCurrent() - 1) // LEVEL_BAND
+   return (hero.getClassName(), band, gear, skills, floor)
+
+def estimate(hero, floor: int, runs = RUNS) -> float:
+   '''return the chances of "hero" to clear "floor" on their own.
+   ran in the background process on a copy of the hero that gets
+   rested first: predictions don't depend on the current health.'''
+   hero.heal(hero.getStats().getHealth().getFull())
+   return sim.clearRate([hero], DUNGEON[floor], runs)
+
+# Forecasts object
+class Forecasts:
+   '''the cache of the predictions. it must be used from the event
+   loop of the bot. the estimates run on "executor", a process pool
+   of one worker by default so that they never hold the bot.'''
+   def __init__(self, size = CACHE_SIZE, maxAge = MAX_AGE,
+      executor = None):
+      self.entries = OrderedDict() # key: (chances, time)
+      self.pending = dict() # key: future of its estimate
+      self.size = size
+      self.maxAge = maxAge
+      self.executor = executor
+
+   # getters
+   def predict(self, hero, floor: int):
+      '''return the predicted chances of "hero" to clear "floor".
+      never waits: the first time, ESTIMATING is returned while the
+      estimate is made in the background. None if the hero can't be
+      simulated.'''
+      key = signature(hero, floor)
+      entry = self.entries.get(key)
+      if entry != None:
+         self.entries.move_to_end(key) # recently used
+      if entry == None or tm.time() - entry[1] > self.maxAge:
+         self.refresh(key, hero, floor)
+      if entry == None:
+         return ESTIMATING
+      return entry[0]
+
+   # setters
+   def refresh(self, key: tuple, hero, floor: int):
+      '''start estimating the prediction "key" unless it already is.'''
+      if key in self.pending:
+         return
+      if self.executor == None:
+         self.executor = ProcessPoolExecutor(max_workers = 1)
+      job = asyncio.get_running_loop().run_in_executor(self.executor,
+         estimate, hero, floor)
+      self.pending[key] = job
+      job.add_done_callback(partial(self.store, key))
+   def store(self, key: tuple, job):
+      '''keep the result of the estimate "job" and evict the least
+      recently used predictions past the size of the cache.'''
+      self.pending.pop(key, None)
+      chances = None
+      if job.cancelled():
+         return # estimated again on the next call
+      if job.exception() != None:
+         print("forecast {} failed: {}".format(key, job.exception()))
+      else:
+         chances = job.result()
+      self.entries[key] = (chances, tm.time())
+      self.entries.move_to_end(key)
+      while len(self.entries) > self.size:
+         self.entries.popitem(last = False)
@@ -21,6 +21,7 @@ import time as tm
 sys.path.insert(0, os.getcwd() + "/world")
 
 from world.classes import Adventurer
+from world.itemLib import spawn
 
 # helpers
 def boolEvaluate(string: str):
@@ -293,4 +294,56 @@ def load(id: int) -> IdleUser:
    else:
       user.hero = None
    save(user) # save to keep the healed data
-   return user
\ No newline at end of file
+   return user
+
+# exploration results
+# an exploration only sends back what changed for each hero so that
+# the bot can apply it to the current save of the user.
+def heroSummary(user: IdleUser) -> tuple:
+   '''return what an exploration can change about the hero of
+   "user": the exp absorbed and the quantity of each item ID in the
+   bag.'''
+   hero = user.getHero()
+   bag = {k: len(stack) for k, stack in hero.getBag().contents.items()}
+   return (hero.getLevel().getExpSum(), bag)
+def makeDelta(user: IdleUser, before: tuple, defeated: int) -> dict:
+   '''return the changes of the hero of "user" since its "before"
+   summary as a small record. "lost" is the health missing at the
+   end of the exploration and "stats" the full stats the level ups
+   rolled.'''
+   after = heroSummary(user)
+   health = user.getHero().stats.getHealth()
+   loot = list()
+   for k in set(before[1]) | set(after[1]):
+      qty = after[1].get(k, 0) - before[1].get(k, 0)
+      if qty != 0: # negative for consumed items
+         loot.append((k, qty))
+   return {
+      "id": user.getID(),
+      "exp": after[0] - before[0],
+      "lost": health.getFull() - health.getCurrent(),
+      "stats": user.getHero().stats.getFullStats(),
+      "loot": loot,
+      "defeated": defeated
+   }
+def applyDelta(user: IdleUser, delta: dict):
+   '''apply an exploration record made by makeDelta() to the hero
+   of "user". the level ups are not rolled again: the stats rolled
+   during the exploration are set as they are.'''
+   hero = user.getHero()
+   if "stats" in delta:
+      hero.getLevel().levelup(delta["exp"])
+      hero.stats = type(hero.stats)(delta["stats"])
+   else: # record made before the stats were kept
+      hero.develup(delta["exp"])
+   full = hero.stats.getHealth().getFull()
+   hero.stats.setStat("health", max(0, full - delta["lost"]))
+   bag = hero.getBag()
+   for k, qty in delta["loot"]:
+      if qty > 0: # found
+         bag.addMulti(spawn(k), qty)
+      else: # consumed
+         qty = min(-qty, len(bag.getStackOf(k)))
+         if qty > 0:
+            bag.takeOut(bag.getStackOf(k)[0].getName(), qty)
+   user.updateDefeated(delta["defeated"])
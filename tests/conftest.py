@@ -0,0 +1,67 @@
+'''
+# conftest.py
+# shared setup of the tests. the game world modules are imported
+# bare like the bot imports them and every test runs from an empty
+# folder where the battles can write their reports. the world is
+# linked in it for the paths of the icons.
+# date: 10/18/26
+# author: dnglokpor
+'''
+
+# imports
+import sys, os, random, pickle
+from functools import partial
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "world"))
+
+import confrontation as cf
+import monsterLib as ml
+import skillLib as skl
+from classes import Fighter, Ranger, Elementalist
+
+JOBS = [Fighter, Ranger, Elementalist]
+
+# fixtures
+@pytest.fixture(autouse = True)
+def records(tmp_path, monkeypatch):
+   '''run the test from an empty folder with a records/temps.'''
+   monkeypatch.chdir(tmp_path)
+   os.symlink(os.path.join(ROOT, "world"), "world")
+   os.makedirs("records/temps")
+   return tmp_path
+@pytest.fixture
+def makeHero():
+   '''return a function making a hero of class "job" developed up to
+   "level". the luck rolls are seeded by "seed".'''
+   def make(job, name: str, level: int, seed = 0):
+      random.seed(seed)
+      hero = job(name)
+      hero.develup(sum(lvl * 100 for lvl in range(1, level)))
+      return hero
+   return make
+def clone(template, level: int, rng = None):
+   '''return a copy of the "template" unit. the spawners share their
+   skills between monsters so this keeps the summons of one battle
+   from cooling the skills of the next.'''
+   return pickle.loads(pickle.dumps(template))
+@pytest.fixture
+def encounter(makeHero):
+   '''return a function making a pickled (advs, mons, summonable)
+   battle of "heroes" adventurers of every class against "monsters"
+   honeybeats, all of "level". with "summons", the monsters call for
+   help.'''
+   def make(heroes: int, monsters: int, level: int, summons = False):
+      advs = cf.Party([makeHero(JOBS[i % len(JOBS)], "test{}".format(i),
+         level, i) for i in range(heroes)])
+      mons = cf.Party([ml.s_Honeybeat(level) for i in range(monsters)])
+      summonable = None
+      if summons: # everyone calls for help
+         summonable = [partial(clone, ml.s_Honeybeat(level)),
+            partial(clone, ml.s_Caterkiller(level))]
+         for m in mons:
+            m.getSkillSet().assign("ability", skl.whine)
+      return pickle.dumps((advs, mons, summonable))
+   return make
@@ -0,0 +1,37 @@
+'''
+# test_base.py
+# tests of the UnitStats saves.
+# date: 10/18/26
+# author: dnglokpor
+'''
+
+# imports
+import os, pickle
+from base import UnitStats, STATS
+
+DATA = os.path.join(os.path.dirname(__file__), "data") # older saves
+
+# tests
+def testUnitStatsRoundTrip():
+   '''a pickled UnitStats loads with the same values and its views
+   still write to its arrays.'''
+   stats = UnitStats([50, 13, 12, 8, 7, 15, 4])
+   stats.changeBy("health", -20)
+   stats.setStat("dexterity", 30)
+   stats.getStat("attack") # views are not saved
+   loaded = pickle.loads(pickle.dumps(stats, pickle.HIGHEST_PROTOCOL))
+   assert (loaded.full, loaded.current) == (stats.full, stats.current)
+   assert loaded.changes == 0
+   loaded.getStat("defense").setCurrent(3)
+   assert loaded.current[STATS.index("defense")] == 3
+def testDictSaveLoads():
+   '''a Ranger saved while UnitStats and Stat were dicts loads with
+   the same values.'''
+   with open(os.path.join(DATA, "ranger_v0.her"), "rb") as save:
+      hero = pickle.load(save)
+   assert hero.stats.full == [152, 42, 32, 17, 15, 60, 13]
+   assert hero.stats.current == [145, 42, 32, 17, 15, 60, 13]
+   assert hero.getLevel().getCurrent() == 7
+   assert hero.getStats().getHealth().getCurrent() < hero.getStats(
+      ).getHealth().getFull()
+   assert pickle.loads(pickle.dumps(hero)).stats.full == hero.stats.full
@@ -0,0 +1,142 @@
+'''
+# test_confrontation.py
+# seeded regression tests of the battles.
+# date: 10/18/26
+# author: dnglokpor
+'''
+
+# imports
+import pickle, random
+from statistics import mean, pvariance
+from contextlib import redirect_stdout
+from io import StringIO
+import confrontation as cf
+import metrics as mx
+import skillLib as skl
+import units
+from base import UnitStats
+from blocks import BattleBlock
+from classes import Fighter, Ranger, Elementalist
+from dungeon import DUNGEON
+from helpers import Rolls
+
+# helpers
+class RescanOrder(cf.TurnOrder):
+   '''the turn order by its definition: the dexterity of every unit
+   is read again on every move.'''
+   def __iter__(self):
+      self.oDexts = [u.getStats().getStat("dexterity").getCurrent()
+         for u in self.units]
+      self.mutDexts = list(self.oDexts)
+      alive = [d for u, d in zip(self.units, self.oDexts) if u.isAlive()]
+      self.lowDext = max(min(alive, default = 0), 1)
+      return self
+   def __next__(self):
+      for i, u in enumerate(self.units):
+         nDext = u.getStats().getStat("dexterity").getCurrent()
+         self.mutDexts[i] += nDext - self.oDexts[i]
+         self.oDexts[i] = nDext
+         if not u.isAlive():
+            self.mutDexts[i] = -1
+      fastest = max(range(len(self.units)),
+         key = lambda i: (self.mutDexts[i], -i))
+      if self.mutDexts[fastest] < self.lowDext:
+         raise StopIteration
+      self.mutDexts[fastest] -= self.lowDext
+      return self.units[fastest]
+def play(fights: list, order, verbose = False) -> list:
+   '''run the pickled "fights" seeded by their position with the turn
+   order "order". return the moves, healths and infos of each.'''
+   moves = list()
+   class Traced(order):
+      def __next__(self):
+         u = super().__next__()
+         moves.append(u.getName())
+         return u
+   played = list()
+   for b, fight in enumerate(fights):
+      random.seed(b)
+      advs, mons, summonable = pickle.loads(fight)
+      battle = cf.BattleState(advs, mons, summonable)
+      cf.TurnOrder, heap = Traced, cf.TurnOrder
+      try:
+         info = battle.run(verbose)[0]
+      finally:
+         cf.TurnOrder = heap
+      played.append((battle.getHealths(), info))
+   return moves, played
+def farm(heroes: bytes, block, haz: int, seed: int) -> tuple:
+   '''fight the battle "block" with the pickled "heroes". return if
+   it was swept and the hp, exp, stats and bags of the heroes.'''
+   party = cf.Party(pickle.loads(heroes))
+   skl.setCooldowns()
+   mx.collect()
+   with redirect_stdout(StringIO()): # spawners print
+      block.explore(party, haz, Rolls(seed))
+   swept = "battle.swept" in mx.collect()[1]
+   bags = [{k: len(stack) for k, stack in u.getBag().contents.items()
+      if k != cf.genHash("arrow")} for u in party]
+   return swept, [(cf.getHP(u), u.getLevel().getExpSum(),
+      u.stats.getFullStats()) for u in party], bags
+
+# tests
+def testTurnOrderMoves(encounter):
+   '''the heap turn order hands out the moves of its definition.'''
+   fights = [encounter(5, 5, 8) for b in range(6)]
+   fights += [encounter(5, 2, 8, True) for b in range(6)]
+   fights += [encounter(12, 12, 8) for b in range(3)]
+   assert play(fights, RescanOrder) == play(fights, cf.TurnOrder)
+def testHeadlessLikeVerbose(encounter):
+   '''a battle ran headless ends like it does with a battle log.'''
+   fights = [encounter(3, 3, 5, b % 2 == 0) for b in range(10)]
+   # the log prints the turn order so only the outcomes are compared
+   assert (play(fights, cf.TurnOrder, True)[1] ==
+      play(fights, cf.TurnOrder)[1])
+def testCachedCombinedStats(encounter, monkeypatch):
+   '''the cached combined stats of the heroes play like the stats
+   combined again on every call.'''
+   fights = [encounter(5, 5, 8) for b in range(8)]
+   cached = play(fights, cf.TurnOrder)
+   monkeypatch.setattr(units.Playable, "getStats", lambda self:
+      self.stats + UnitStats(self.equipment.getEqtBonus()))
+   assert play(fights, cf.TurnOrder) == cached
+def testSweptBattleLikePlayed(makeHero, monkeypatch):
+   '''a swept battle brings the same exp and loot, and the same
+   level ups, as the same battle played out.'''
+   blocks = [b for b in DUNGEON[1].pop if isinstance(b, BattleBlock)]
+   haz = DUNGEON[1].getHazardLevel()
+   swept = 0
+   for jobs in ([Fighter], [Ranger], [Fighter, Ranger, Elementalist]):
+      heroes = pickle.dumps([makeHero(job, "test{}".format(i), 20)
+         for i, job in enumerate(jobs)])
+      for seed in range(20):
+         block = blocks[seed % len(blocks)]
+         monkeypatch.setattr(cf, "SWEEP", False)
+         played = farm(heroes, block, haz, seed)
+         monkeypatch.setattr(cf, "SWEEP", True)
+         fast = farm(heroes, block, haz, seed)
+         assert not played[0]
+         assert fast[1:] == played[1:]
+         swept += fast[0]
+   assert swept == 60
+def testSweptArrowsLikePlayed(makeHero, monkeypatch):
+   '''a swept battle spends as many arrows as the same battle played
+   out, on average: the dodged shots cost arrows too.'''
+   blocks = [b for b in DUNGEON[1].pop if isinstance(b, BattleBlock)]
+   haz = DUNGEON[1].getHazardLevel()
+   heroes = pickle.dumps([makeHero(Ranger, "test", 20)])
+   quiver = lambda party: cf.arrows(party[0])
+   full = quiver(pickle.loads(heroes))
+   spent = {False: list(), True: list()}
+   for sweep in spent:
+      monkeypatch.setattr(cf, "SWEEP", sweep)
+      for seed in range(200):
+         party = cf.Party(pickle.loads(heroes))
+         skl.setCooldowns()
+         with redirect_stdout(StringIO()): # spawners print
+            blocks[seed % len(blocks)].explore(party, haz, Rolls(seed))
+         spent[sweep].append(full - quiver(party))
+   # the same monsters both ways: only the dodges differ
+   diffs = [s - p for s, p in zip(spent[True], spent[False])]
+   error = (pvariance(diffs) / len(diffs)) ** 0.5
+   assert abs(mean(diffs)) < 3.0 * error
@@ -0,0 +1,52 @@
+'''
+# test_explorer.py
+# tests of the replays of the explorations.
+# date: 10/18/26
+# author: dnglokpor
+'''
+
+# imports
+import pickle
+from contextlib import redirect_stdout
+from io import StringIO
+import bg_explorer as bg
+from idleUser import IdleUser
+from world.classes import Fighter, Ranger, Elementalist
+
+JOBS = [Fighter, Ranger, Elementalist]
+
+# helpers
+def setup(makeHero, key: int, floor: int, size: int) -> bytes:
+   '''return the pickled setup data of a party of "size" heroes
+   exploring "floor" like the explore command makes it.'''
+   going = list()
+   for i in range(size):
+      user = IdleUser(key + i, "test{}".format(i))
+      user.setHero(makeHero(JOBS[i % len(JOBS)], user.getUname(), 5, i))
+      user.setKey(key)
+      going.append(user)
+   return pickle.dumps({"startTime": key, "floor": floor,
+      "users": going, "seed": key})
+
+# tests
+def testReplayFromSeed(makeHero):
+   '''an exploration ran again from its seed, or resumed from any of
+   its snapshots, gives the same results.'''
+   resumed = 0
+   for key, floor, size in ((1, 2, 1), (2, 3, 2), (3, 4, 3)):
+      setupData = setup(makeHero, key, floor, size)
+      snapshots = list()
+      def keep(*progress):
+         if progress[3] != None:
+            snapshots.append(pickle.dumps(progress[3]))
+      with redirect_stdout(StringIO()): # spawners and bosses print
+         first = bg.run_exploration(pickle.loads(setupData),
+            checkpoint = keep)
+         runs = [bg.run_exploration(pickle.loads(setupData))]
+         runs += [bg.run_exploration(pickle.loads(setupData),
+            pickle.loads(snapshot)) for snapshot in snapshots]
+      for run in runs:
+         assert (run["cleared"], run["users"], run["report"]) == (
+            first["cleared"], first["users"], first["report"])
+      resumed += len(snapshots)
+   assert resumed > 0
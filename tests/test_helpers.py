@@ -0,0 +1,35 @@
+'''
+# test_helpers.py
+# tests of the battle random generator.
+# date: 10/18/26
+# author: dnglokpor
+'''
+
+# imports
+import pickle
+from helpers import Rolls, percents
+
+# tests
+def testRollsUniform():
+   '''the percent rolls of a block are uniform (chi2 with 99 dof
+   under 148.2, p = 0.001) whichever generator draws it.'''
+   for fast in (True, False):
+      roll = percents(Rolls(0, fast))
+      counts = [0] * 100
+      for i in range(50000):
+         counts[roll()] += 1
+      chi2 = sum((n - 500) ** 2 / 500 for n in counts)
+      assert chi2 < 148.2
+def testRollsReplay():
+   '''a Rolls set back to a state, or pickled, rolls the same as from
+   that state on.'''
+   rng = Rolls(7, size = 64)
+   for i in range(100): # in the middle of a block
+      rng.randrange(100)
+   state, saved = rng.getstate(), pickle.dumps(rng)
+   rolls = [rng.randrange(100) for i in range(200)] + [rng.choice(range(9))]
+   rng.setstate(state)
+   again = pickle.loads(saved)
+   for other in (rng, again):
+      assert [other.randrange(100) for i in range(200)] + [
+         other.choice(range(9))] == rolls
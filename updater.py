@@ -15,13 +15,16 @@ try:
 except ModuleNotFoundError:
    import pickle
 from glob import glob
-from idleUser import IdleUser, save, load, Friendbook
+from idleUser import IdleUser, save, load, Friendbook, USER_TEMPS_PATH,\
+   heroSummary, makeDelta
+import expQueue as eq
 
 
 # add game world package to path so that internal imports work
 sys.path.insert(0, os.getcwd() + "/world")
 
 import world.skillLib as skl
+from world.dungeon import DUNGEON
 
 USERS_FILES = "records/users/"
 HERO_FILES = "records/saves/"
@@ -91,7 +94,7 @@ def friendBookUpdate():
          try:
             old = user.getFriendBook()
             new = Friendbook()
-            new.seed = old.seed - len((old.keys())
+            new.seed = old.seed - len(old.keys())
             for id, uname in list(old.values()):
                new.addFriend(id, uname)
             user.friendbook = new # change to new friendbook
@@ -101,6 +104,59 @@ def friendBookUpdate():
             print("error updating ", file)
             print(data)
 
+def tempsImport():
+   '''move the exploration files of the temps folder into the
+   exploration table. jobs that were running when the explorer
+   stopped are queued again. the heroes of the results are reduced
+   to what changed since their save.'''
+   if os.path.exists(USER_TEMPS_PATH): # folder exists
+      db = eq.connect()
+      states = {"wait": "wait", "running": "wait", "done": "done",
+         "resq": "resq"}
+      for ext, state in states.items():
+         tQueue = glob(USER_TEMPS_PATH + "*." + ext) # update queue
+         print("all {} files: ".format(ext), tQueue, "\n\n") # DEBUG
+         for file in tQueue:
+            try:
+               key = int(os.path.basename(file).split('.')[0])
+               data = None
+               with open(file, "rb") as tempfile:
+                  data = pickle.load(tempfile)
+               f = data["floor"]
+               if state == "wait": # setup data
+                  end = key + DUNGEON[f].getSize() * 120 + 1
+               else: # exploration data
+                  end = data["endTime"]
+                  deltas = list()
+                  for u in data["users"]:
+                     saved = load(u.getID()) # hero as it left
+                     deltas.append(makeDelta(u, heroSummary(saved),
+                        u.getDefeated() - saved.getDefeated()))
+                  data["users"] = deltas
+               eq.put(db, key, f, state, end, data)
+               os.remove(file)
+            except Exception:
+               data = sys.exc_info() # information on error
+               print("error updating ", file)
+               print(data)
+      db.close()
+   else:
+      print("Directory ", USER_TEMPS_PATH, "not found.")
+
+# updates by name. the friendbook one is ran by default.
+UPDATES = {
+   "friendbook": friendBookUpdate,
+   "mastery": masteryUpdate,
+   "pickle": pickleProtocoleUpdate,
+   "temps": tempsImport
+}
+
 if __name__ == "__main__":
-   # masteryUpdate()
-   friendBookUpdate()
\ No newline at end of file
+   # usage: python updater.py [friendbook|mastery|pickle|temps]
+   name = "friendbook"
+   if len(sys.argv) > 1:
+      name = sys.argv[1]
+   if name in UPDATES:
+      UPDATES[name]()
+   else:
+      print("usage: python updater.py [{}]".format('|'.join(UPDATES)))
\ No newline at end of file
@@ -5,53 +5,76 @@
 # Stat, Gauge, Skill etc...
 # date: 6/25/21
 # author: dnglokpor
+# [U] 10/18/26: UnitStats keeps its values in two arrays and
+# Stat became a view on them. dict based saves still load.
 '''
 
 # Stat object
-class Stat(dict):
-   '''subclass of dict that define a collection of values
-   that represent the full and current values of a unit
-   combat attribute.'''
+class Stat:
+   '''a view on the full and current values of a unit combat
+   attribute. the values live in the arrays of a UnitStats so
+   the view is just those arrays and an index in them. a Stat
+   created on its own gets one slot arrays.'''
+   __slots__ = ("fulls", "currents", "idx")
+   
    def __init__(self, full = 0, current = None):
-      # create base dict
+      # create standalone arrays
       if current == None:
          current = full
-      super().__init__({"full": full, "current": current})
+      self.fulls = [full]
+      self.currents = [current]
+      self.idx = 0
+   @classmethod
+   def view(cls, fulls: list, currents: list, idx: int):
+      '''return the Stat at "idx" of the "fulls" and "currents"
+      arrays. changes made through it go to the arrays.'''
+      stat = cls.__new__(cls)
+      stat.fulls = fulls
+      stat.currents = currents
+      stat.idx = idx
+      return stat
       
    # getters
    def getFull(self) -> int:
       '''return the full value of the stat.'''
-      return self.get("full")
+      return self.fulls[self.idx]
    def getCurrent(self) -> int:
       '''return the current value of the stat.'''
-      return self.get("current")
+      return self.currents[self.idx]
     
    # setters
    def reset(self):
       '''return current to full value.'''
-      self.__setitem__("current", self.get("full"))
+      self.currents[self.idx] = self.fulls[self.idx]
    def setFull(self, val: int):
       '''set the full value of the stat to "val". "val"
       must be positive (>= 0).'''
       if 0 <= val:
-         self.__setitem__("full", val)
+         self.fulls[self.idx] = val
    def setCurrent(self, val: int):
       '''set the current value of the stat to "val". "val"
       must be positive (>= 0).'''
       if val >= 0:
-         self.__setitem__("current", val)
+         self.currents[self.idx] = val
 
    # overload addition operator
    def __add__(self, other) -> dict:
       '''adds this Stat object to another one by value:
       full added to full and current added to current.
-      return a new Stat object.'''
-      result = Stat() # new stat with zero
-      result.setCurrent(self.getCurrent() +
-         other.getCurrent())
-      result.setFull(self.getFull() +
-         other.getFull())
-      return result
+      negative sums are 0. return a new Stat object.'''
+      return Stat(max(0, self.getFull() + other.getFull()),
+         max(0, self.getCurrent() + other.getCurrent()))
+   
+   # old saves
+   def __setitem__(self, key: str, val: int):
+      '''set the "full" or "current" value. Stat used to be a
+      dict and this is how saves of that time are loaded.'''
+      if not hasattr(self, "idx"):
+         Stat.__init__(self)
+      if key == "full":
+         self.fulls[self.idx] = val
+      else:
+         self.currents[self.idx] = val
    
    # override tostring
    def __str__(self, ratio = False) -> str:
@@ -68,17 +91,20 @@ class Stat(dict):
 # possible stats list
 STATS = ["health", "attack", "defense", "special", 
    "resilience", "dexterity", "luck"]
+INDEX = {sName: i for i, sName in enumerate(STATS)}
 
 # UnitStats class
-class UnitStats(dict):
+class UnitStats:
    '''a unit needs a collection of attributes for combat
    purposes called stats: the health stat for durability,
    the attack stat for offense, the defense stat for 
    resilience, the dexterity stat for movement speed and
    evasion and the luck stat for fortune. this class
    represent that collection of these stats and methods
-   to modify them. this collection is based on python
-   lists thus it can be treated as such.'''
+   to modify them. the full and current values are kept in
+   two arrays in the order of STATS. the Stat views on them
+   are only made once asked for.'''
+   __slots__ = ("full", "current", "changes", "views")
    
    def __init__(self, stats: list):
       '''expect the full value of each 7 stat. each
@@ -86,66 +112,84 @@ class UnitStats(dict):
       value.'''
       if len(stats) != 7:
          raise ValueError
-      super().__init__({
-         STATS[0]: Stat(stats[0], stats[0]), # hp
-         STATS[1]: Stat(stats[1], stats[1]), # atk
-         STATS[2]: Stat(stats[2], stats[2]), # def
-         STATS[3]: Stat(stats[3], stats[3]), # spe
-         STATS[4]: Stat(stats[4], stats[4]), # res
-         STATS[5]: Stat(stats[5], stats[5]), # dext
-         STATS[6]: Stat(stats[6], stats[6])  # luck
-      })
+      self.full = list(stats)
+      self.current = list(stats)
+      self.changes = 0 # bumped on every change of a current value
    
    # getters
+   def getViews(self) -> tuple:
+      '''return the Stat views of all stats in the order of STATS.'''
+      try:
+         return self.views
+      except AttributeError: # first time
+         self.views = tuple(Stat.view(self.full, self.current, i)
+            for i in range(len(STATS)))
+         return self.views
    def getHealth(self) -> Stat:
       '''return the health stat.'''
-      return self.get(STATS[0])
+      return self.getViews()[0]
    def getStat(self, sName: str) -> Stat:
       '''return the stat associated with "sName". if sName
       is invalid, default to health.'''
-      if self.__contains__(sName):
-         return self.get(sName)
-      else:
-         self.getHealth()
+      return self.getViews()[INDEX.get(sName, 0)]
    def getFullStats(self) -> list:
       '''return a list of the full values of all stats.'''
-      return [self.getStat(STATS[0]).getFull(),
-         self.getStat(STATS[1]).getFull(),
-         self.getStat(STATS[2]).getFull(),
-         self.getStat(STATS[3]).getFull(),
-         self.getStat(STATS[4]).getFull(),
-         self.getStat(STATS[5]).getFull(),
-         self.getStat(STATS[6]).getFull()
-      ]
+      return list(self.full)
+   def items(self) -> list:
+      '''return the (name, Stat) pairs of all stats.'''
+      return list(zip(STATS, self.getViews()))
+   def __contains__(self, sName: str) -> bool:
+      return sName in INDEX
+   def __getitem__(self, sName: str) -> Stat:
+      return self.getViews()[INDEX[sName]]
    
    # setters
    def setStat(self, sName: str, val: int):
       '''set current value of the stat to "val".
       current health will have an extra test to not go
       over its full value.'''
-      if self.__contains__(sName): # can only set existing stat
+      i = INDEX.get(sName)
+      if i != None: # can only set existing stat
          if val < 0: # val must be positive
             val = -val
-         if (sName == STATS[0] and 
-            val > self.getHealth().getFull()):
+         if i == 0 and val > self.full[0]:
             # case of health so we go up to full health
-            val = self.getHealth().getFull()
-         self.getStat(sName).setCurrent(val) # set it
+            val = self.full[0]
+         self.current[i] = val # set it
+         self.changes += 1
    def changeBy(self, sName: str, dmg: int):
       '''set current value of a stat to its previous value
       added to "dmg". dmg is negative when its a loss,
       positive when its a gain.'''
-      old = self.getStat(sName).getCurrent()
-      new = old + dmg
+      new = self.current[INDEX[sName]] + dmg
       if new < 0:
          new = 0
       self.setStat(sName, new)
    def cleanse(self):
       '''remove any change in stats except for hp.'''
-      for key, stat in self.items():
-         if key != STATS[0]:
-            stat.reset()
+      self.current[1:] = self.full[1:]
+      self.changes += 1
+   def __setitem__(self, sName: str, stat: Stat):
+      '''copy the values of "stat" as the "sName" stat. UnitStats
+      used to be a dict and this is how saves of that time are
+      loaded.'''
+      if not hasattr(self, "changes"):
+         UnitStats.__init__(self, [0, 0, 0, 0, 0, 0, 0])
+      i = INDEX[sName]
+      self.full[i] = stat.getFull()
+      self.current[i] = stat.getCurrent()
    
+   # pickling
+   def __getstate__(self) -> tuple:
+      return (self.full, self.current)
+   def __setstate__(self, state):
+      '''load the arrays. the dict based saves have already set
+      their stats one by one and only bring their attributes.'''
+      if type(state) == tuple:
+         self.full, self.current = state
+      elif not hasattr(self, "changes"): # no stat at all
+         UnitStats.__init__(self, [0, 0, 0, 0, 0, 0, 0])
+      self.changes = 0
    
    # overload addition operator
    def __add__(self, other) -> dict:
@@ -153,12 +197,13 @@ class UnitStats(dict):
       together. the resulting object is a UnitStats
       object with full values and current values that
       are the full and current values of the unit and
-      the equipment.'''
-      result = UnitStats([0, 0, 0, 0, 0, 0, 0])
-      for sName, sObj in self.items():
-         result.__setitem__(sName,
-            self.getStat(sName) + other.getStat(sName)
-         )
+      the equipment. negative sums are 0.'''
+      result = UnitStats.__new__(UnitStats)
+      result.full = [max(0, a + b) for a, b in zip(self.full,
+         other.full)]
+      result.current = [max(0, a + b) for a, b in zip(self.current,
+         other.current)]
+      result.changes = 0
       return result   
    
    # override tostring
@@ -233,6 +278,11 @@ class Gauge:
       '''return the total number of exp amassed by this
       gauge.'''
       return self.level * 100 + self.current
+   def getExpSum(self) -> int:
+      '''return the sum of all the gains absorbed by this gauge
+      since level 1. two gauges are equal if they absorbed the same
+      sum whatever how it was split.'''
+      return 50 * self.level * (self.level - 1) + self.current
    
    # override tostring
    def __str__(self, short = True) -> str:
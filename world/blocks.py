@@ -93,8 +93,9 @@ class Block:
          print(l);
    
    # exploration
-   def explore(self, explorers: Party, haz: int):
-      '''sub classes must override this.'''
+   def explore(self, explorers: Party, haz: int, rng = rnd):
+      '''sub classes must override this. every roll made while
+      exploring the block is drawn from "rng".'''
       print("exploring {}".format(self))
    
    # toString
@@ -109,7 +110,7 @@ class EmptyBlock(Block):
       super().__init__("Empty", env)
    
    # exploration
-   def explore(self, explorers: Party, haz: int):
+   def explore(self, explorers: Party, haz: int, rng = rnd):
       '''just describes the block's environment.'''
       #self.printLook()
       return None # info = None
@@ -123,7 +124,7 @@ class ScavengingBlock(Block):
       super().__init__("Scavenging", env)
    
    # exploration
-   def explore(self, explorers: Party, haz: int):
+   def explore(self, explorers: Party, haz: int, rng = rnd):
       '''scavenging has two possible outcomes. as explorers
       try to gather the resource, they might get lucky and
       find something good. else depending on how dangerous
@@ -133,22 +134,22 @@ class ScavengingBlock(Block):
       '''
       #self.printLook()
       info = (list(), None)
-      if (rndGen(100) < rndGen(100)): # battle branch
+      if (rndGen(100, rng) < rndGen(100, rng)): # battle branch
          # DEBUG
          #print("\nyou were looking for goods but found monsters...")
          # scavenging monsters are just a group of a same
          # monster based on the hazard level
          hostile = self.env.get("hostile")
          monsters = list()
-         size = rndGen(min(5, rndGen(haz)))
+         size = rndGen(min(5, rndGen(haz, rng)), rng)
          for i in range(size):
-            m = hostile[0](rndGen(haz))
+            m = hostile[0](rndGen(haz, rng), rng)
             monsters.append(m)
-         battle = BattleState(explorers, Party(monsters))
+         battle = BattleState(explorers, Party(monsters), rng = rng)
          info = battle.run()
       # now that's out of the way, scavenge
       if explorers.stillStands(): # scavenging branch
-         qty, item = rndGen(5), rnd.choice(self.env.get("resource"))
+         qty, item = rndGen(5, rng), rng.choice(self.env.get("resource"))
          item = item() # spawn Item
          info = (info[0] + [('i', item.getName()),], info[1])
          # DEBUG
@@ -173,7 +174,7 @@ class WoodcuttingBlock(ScavengingBlock):
       self.name = "Woodcutting"
       
    # exploration override
-   def explore(self, explorers: Party, haz: int):
+   def explore(self, explorers: Party, haz: int, rng = rnd):
       '''test for presence of an axe in the explorers bags.
       if none can be located, rebuke the party. else, run a
       regular scavenging block exploration.
@@ -186,7 +187,7 @@ class WoodcuttingBlock(ScavengingBlock):
          if not found:
             i += 1
       if found:
-         info = super().explore(explorers, haz)
+         info = super().explore(explorers, haz, rng)
       else:
          info = ([('p', "you need an axe to chop trees!"),], None)
       return info
@@ -201,7 +202,7 @@ class MiningBlock(ScavengingBlock):
       self.name = "Mining"
       
    # exploration override
-   def explore(self, explorers: Party, haz: int):
+   def explore(self, explorers: Party, haz: int, rng = rnd):
       '''test for presence of a pickaxe in the explorers bags.
       if none can be located, rebuke the party. else, run a
       regular scavenging block exploration.
@@ -214,7 +215,7 @@ class MiningBlock(ScavengingBlock):
          if not found:
             i += 1
       if found:
-         info = super().explore(explorers, haz)
+         info = super().explore(explorers, haz, rng)
       else:
          info = ([('p', "you need a pickaxe to mine for ores!!!"),],
             None)
@@ -231,19 +232,20 @@ class BattleBlock(Block):
       super().__init__("Battle", env)
    
    # exploration
-   def explore(self, explorers: Party, haz: int):
+   def explore(self, explorers: Party, haz: int, rng = rnd):
       hostile = self.env.get("hostile")
-      maxLvl = rndGen(haz)
+      maxLvl = rndGen(haz, rng)
       # at most 5 monsters. danger level can raise chances of more
-      size = rndGen(3)
+      size = rndGen(3, rng)
       for i in range(2):
          if size < 5:
-            if rnd.choice(range(100)) < haz * 10: 
+            if rng.randrange(100) < haz * 10: 
                size += 1
-      levels = rnd.choices([x + 1 for x in range(maxLvl)], k = size)
-      monsters = rnd.choices(hostile, k = size)
-      monsters = [monsters[i](levels[i]) for i in range(len(monsters))]
-      battle = BattleState(explorers, Party(monsters))
+      levels = rng.choices([x + 1 for x in range(maxLvl)], k = size)
+      monsters = rng.choices(hostile, k = size)
+      monsters = [monsters[i](levels[i], rng)
+         for i in range(len(monsters))]
+      battle = BattleState(explorers, Party(monsters), rng = rng)
       #self.printLook() # DEBUG
       info = battle.run()
       return info
@@ -276,11 +278,11 @@ class BossBlock(StairsBlock):
       self.bossRoom = env
       
    # exploration
-   def explore(self, explorers: Party, haz: int):
+   def explore(self, explorers: Party, haz: int, rng = rnd):
       '''runs a battle against the forms of the boss one by one
       until the party falls or the boss runs out of forms.'''
       hostile = self.bossRoom.get("hostile")
-      boss = hostile[0](haz) # spawns boss
+      boss = hostile[0](haz, rng) # spawns boss
       summonable = hostile[1:] # strips out the boss
       if len(summonable) == 0: # no summonable
          summonable = None # empty it
@@ -289,7 +291,8 @@ class BossBlock(StairsBlock):
       while explorers.stillStands() and form < boss.getForms():
          print(self.bossRoom.get("look")[form]) # DEBUG
          bossParty = Party([boss.getNextForm(),])
-         battle = BattleState(explorers, bossParty, summonable)
+         battle = BattleState(explorers, bossParty, summonable,
+            retreat = False, rng = rng)
          roundInfo = battle.run()
          # only keep last battle report file
          info = (info[0] + roundInfo[0], roundInfo[1])
@@ -297,7 +300,7 @@ class BossBlock(StairsBlock):
             form += 1
       # end of boss battle
       if explorers.stillStands: # defeated the boss
-         super().explore(explorers, haz)
+         super().explore(explorers, haz, rng)
       # the else will be managed by the exploration code
       return info
 
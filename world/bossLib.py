@@ -13,10 +13,11 @@ from units import Monster, BossMonster
 import itemLib as il
 import skillLib as skl
 from monsterLib import choose, spawn
+import random
 
 # boss spawners
 # Butterfreak
-def s_Butterfreak(level = 1):
+def s_Butterfreak(level = 1, rng = random):
    '''return a level "level" Butterfreak.'''
    butterfreak = BossMonster()
    # cocoon form
@@ -24,18 +25,19 @@ def s_Butterfreak(level = 1):
       "Butterfreak (pupa)",
       level,
       [
-         30 + choose(6), # hp 30-35
-         5 + choose(3), 15 + choose(2), # atk 5-7|def 15-16
-         5 + choose(3), 15 + choose(2), # spe 5-7|res 15-16
-         10 + choose(3), # dext 10-12
-         choose(7) # luc 0-6
+         30 + choose(6, rng), # hp 30-35
+         5 + choose(3, rng), 15 + choose(2, rng), # atk 5-7|def 15-16
+         5 + choose(3, rng), 15 + choose(2, rng), # spe 5-7|res 15-16
+         10 + choose(3, rng), # dext 10-12
+         choose(7, rng) # luc 0-6
       ],
       skl.cocoon,
       "when a Caterkiller has gathered nutrients for a year, "
       "it wraps itself into its silk, making this pupa. the cocoon "
       "protect it while it reorganizes its organs into its adult "
       "form.",
-      AEOLA
+      AEOLA,
+      rng
    )
    # ability/critical
    pupa.getSkillSet().assign("ability", skl.whine)
@@ -47,18 +49,19 @@ def s_Butterfreak(level = 1):
       "Butterfreak (butterfly)",
       level,
       [
-         50 + choose(6), # hp 30-35
-         20 + choose(3), 12 + choose(4), # atk 20-22|def 12-15
-         18 + choose(3), 12 + choose(4), # spe 18-20|res 15-15
-         15 + choose(2), # dext 15-16
-         choose(7) # luc 0-6
+         50 + choose(6, rng), # hp 30-35
+         20 + choose(3, rng), 12 + choose(4, rng), # atk 20-22|def 12-15
+         18 + choose(3, rng), 12 + choose(4, rng), # spe 18-20|res 15-15
+         15 + choose(2, rng), # dext 15-16
+         choose(7, rng) # luc 0-6
       ],
       skl.sting,
       "a fully mature caterkiller. although quite short lived, this "
       "giant butterfly monster's presence wreaks havoc in the "
       "dungeon ecosystem. they feed on all they can find to fuel "
       "their egg-laying. this includes unlucky adventurers as well.",
-      AEOLA
+      AEOLA,
+      rng
    )
    # ability/critical
    butterfly.getSkillSet().assign("ability", skl.tornado)
@@ -16,7 +16,7 @@ from units import Playable
 from skillLib import blademanship, survivalist, conjuring, embers
 from itemLib import s_Arrow, s_ShortSword, s_Longbow, s_WalkingStick,\
    s_GoGetup, s_Gloves, s_LeatherBoots
-from random import choice
+import random
 from math import ceil
 
 # Adventurer object
@@ -105,6 +105,7 @@ class Adventurer(Playable):
 class Fighter(Adventurer):
    '''a Fighter is a basic adventurer class with all-round
    good physicals and a proficient in melee weapon handling.'''
+   DEV = [125, 125, 120, 110, 105, 115] # hp, ..., dext growth (%)
    
    def __init__(self, uName: str):
       # build adventurer
@@ -125,17 +126,18 @@ class Fighter(Adventurer):
       self.equip(s_Gloves()) # for dev use
  
    # stats development
-   def develup(self, expGain: int) -> bool:
+   def develup(self, expGain: int, rng = random) -> bool:
       '''absorbs the exp and develop the stats (full
       values) once for every new level gained. development
       only affect the unit's base stats not the combined
       stats taking gear add-ons into account. return
-      "True" if a level up occured.'''
+      "True" if a level up occured. the luck gains are drawn
+      from "rng".'''
       lvlGain = self.getLevel().levelup(expGain)
       if lvlGain[0]: # we have leveled up
          # development branch
          newStats = self.stats.getFullStats()
-         dev = [125, 125, 120, 110, 105, 115] 
+         dev = self.DEV
          for lvl in range(lvlGain[1]): # for each new lvl
             # hp, ..., dext
             newStats = [ceil(newStats[idx] * dev[idx] / 100) \
@@ -143,7 +145,7 @@ class Fighter(Adventurer):
             # append luck to the list
             newStats.append(self.stats.getStat("luck").getFull())
             # luck increases by at most 3
-            newStats[6] += rndGen(3)
+            newStats[6] += rndGen(3, rng)
          # assign new stats
          self.stats = UnitStats(newStats)
       return lvlGain[0]
@@ -154,6 +156,7 @@ class Ranger(Adventurer):
    mostly physical damage. derives from Adventurer 
    but adds a restriction on equipment as well as 
    physical development at level up.'''
+   DEV = [120, 120, 115, 110, 110, 125] # hp, ..., dext growth (%)
    
    def __init__(self, uName: str):
       # build adventurer
@@ -176,17 +179,18 @@ class Ranger(Adventurer):
       self.getBag().addMulti(s_Arrow(), 50)
  
    # stats development
-   def develup(self, expGain: int) -> bool:
+   def develup(self, expGain: int, rng = random) -> bool:
       '''absorbs the exp and develop the stats (full
       values) once for every new level gained. development
       only affect the unit's base stats not the combined
       stats taking gear add-ons into account. return
-      "True" if a level up occured.'''
+      "True" if a level up occured. the luck gains are drawn
+      from "rng".'''
       lvlGain = self.getLevel().levelup(expGain)
       if lvlGain[0]: # we have leveled up
          # development branch
          newStats = self.stats.getFullStats()
-         dev = [120, 120, 115, 110, 110, 125] 
+         dev = self.DEV
          for lvl in range(lvlGain[1]): # for each new lvl
             # hp, ..., dext
             newStats = [ceil(newStats[idx] * dev[idx] / 100) \
@@ -194,7 +198,7 @@ class Ranger(Adventurer):
             # append luck to the list
             newStats.append(self.stats.getStat("luck").getFull())
             # luck increases by at most 3
-            newStats[6] += rndGen(3)
+            newStats[6] += rndGen(3, rng)
          # assign new stats
          self.stats = UnitStats(newStats)
       return lvlGain[0]
@@ -203,6 +207,7 @@ class Ranger(Adventurer):
 class Elementalist(Adventurer):
    '''Elementalists perform the best at arcanes which
    allows them to conjure elemental magic.'''
+   DEV = [120, 105, 120, 125, 120, 110] # hp, ..., dext growth (%)
    
    def __init__(self, uName: str):
       # build adventurer
@@ -225,17 +230,18 @@ class Elementalist(Adventurer):
       self.equip(s_LeatherBoots())
  
    # stats development
-   def develup(self, expGain: int) -> bool:
+   def develup(self, expGain: int, rng = random) -> bool:
       '''absorbs the exp and develop the stats (full
       values) once for every new level gained. development
       only affect the unit's base stats not the combined
       stats taking gear add-ons into account. return
-      "True" if a level up occured.'''
+      "True" if a level up occured. the luck gains are drawn
+      from "rng".'''
       lvlGain = self.getLevel().levelup(expGain)
       if lvlGain[0]: # we have leveled up
          # development branch
          newStats = self.stats.getFullStats()
-         dev = [120, 105, 120, 125, 120, 110] 
+         dev = self.DEV
          for lvl in range(lvlGain[1]): # for each new lvl
             # hp, ..., dext
             newStats = [ceil(newStats[idx] * dev[idx] / 100) \
@@ -243,7 +249,7 @@ class Elementalist(Adventurer):
             # append luck to the list
             newStats.append(self.stats.getStat("luck").getFull())
             # luck increases by at most 3
-            newStats[6] += rndGen(3)
+            newStats[6] += rndGen(3, rng)
          # assign new stats
          self.stats = UnitStats(newStats)
       return lvlGain[0]
\ No newline at end of file
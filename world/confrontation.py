@@ -19,34 +19,122 @@
 '''
 
 # imports
-from helpers import fprint
+from helpers import fprint, BattleLog, percents
+from collectibles import genHash
+from skillLib import describe, hasWeapon, hasWeaponType,\
+   SinglePhysical, SingleSpecial, MultiPhysical, MultiSpecial, Counter,\
+   Strike, Shoot, Magic, Buff, Debuff
+from elements import NOELM
+import metrics
+from metrics import observe, count, clock
 from base import STATS
 from skills import State, Skill
-from units import Unit
+from units import Unit, Monster
 from time import sleep
 from copy import deepcopy
-from math import ceil
+from heapq import heapify, heappush, heappop, heapreplace
+from math import ceil, floor
 from math import exp as E
-from random import choice
+import random
 from sys import exit
-import os
 
 # helpers
 def getHP(unit):
    return unit.getStats().getHealth().getCurrent()
 
+# battle budgets
+# a battle that nobody can win (no damage dealt, endless buffs...)
+# must not hold the explorer forever. it is called a stalemate once
+# one of these budgets is exceeded and ends as a draw: the monsters
+# are left alone and the adventurers move on without any reward. a
+# guardian that can't be left alone (boss) instead wears the
+# adventurers out and they fall.
+# the rounds budgets are the limits: they end a seeded battle the same
+# way on any host. the wall time is only a last resort guard, far
+# above any battle, against a stuck host. the same seed may end
+# differently when it fires so the report says it did.
+MAX_ROUNDS = 100 # rounds in one battle
+MAX_TIME = 300 # sec of wall time for one battle (last resort)
+STALE_ROUNDS = 10 # rounds in a row without any health change
+
+# foregone battles
+# when the stats show that the monsters can't get a single hp
+# through the defenses of the adventurers and that any hit of the
+# adventurers kills a monster, the battle is resolved at once: a
+# hero revisiting the first floors sweeps them without playing
+# every turn. the bounds take the worst of every roll (critical
+# hit, element) and of every buff and debuff, as if each one
+# stacked for its whole duration. the shots of a hero only count
+# while their arrows last and the healing of the adventurers does
+# nothing to a battle they can't lose hp in. the battle only goes
+# on as usual if a monster could do something the bounds don't
+# cover: summons, healing.
+# the exp and the loot are drawn from their own generator, seeded
+# before the fight: a swept battle brings the same spoils as the
+# same battle played out.
+SWEEP = True # resolve the foregone battles at once
+SURE = 1e-6 # odds of a stalemate by dodges that are neglected
+ATTACKS = (SinglePhysical, SingleSpecial, MultiPhysical, MultiSpecial,
+   Counter) # skills that only deal damage through targetAttack
+
+def skillsOf(unit) -> list:
+   '''return the skills set in the skill set of "unit".'''
+   return [s for s in unit.getSkillSet().values() if s != None]
+def offense(skill) -> str:
+   '''return the stat the attack "skill" is made with.'''
+   if isinstance(skill, (SingleSpecial, MultiSpecial)):
+      return "special"
+   return "attack"
+def defense(ofs: str) -> str:
+   '''return the stat defending against the "ofs" stat.'''
+   if ofs == "special":
+      return "resilience"
+   return "defense"
+def boosted(dmg: int, elt, target) -> int:
+   '''return "dmg" after the elemental boost of targetAttack.'''
+   if elt > target.getElement():
+      return dmg * 4
+   elif elt < target.getElement():
+      return dmg // 2
+   elif elt != NOELM and elt == target.getElement():
+      return 0
+   return dmg
+def stacked(skill, unit, stat: str) -> int:
+   '''return the most the buff or debuff "skill" changes "stat" of
+   "unit" by when it stacks for its whole duration.'''
+   full = unit.stats.getStat(stat).getFull()
+   return floor(full * skill.power) * max(skill.dur, 1)
+def unfailing(hero, skill) -> bool:
+   '''return "True" if "skill" is an attack "hero" can always make
+   (the arrows left aside).'''
+   if not isinstance(skill, ATTACKS) or isinstance(skill, Counter):
+      return False # counters fail out of a reaction
+   if isinstance(skill, Strike):
+      return hasWeapon(hero)
+   if isinstance(skill, Shoot):
+      return hasWeaponType('r', hero)
+   if isinstance(skill, Magic):
+      return hasWeaponType('m', hero)
+   return True
+def arrows(hero) -> int:
+   '''return the number of arrows in the bag of "hero".'''
+   return len(hero.getBag().getStackOf(genHash("arrow")))
+
 # Party object
 class Party(list):
    '''a party is a group of units that are on the same
    side in combat situation. they consider each other
    allies. this object allows to track them and their
-   status more easily.'''
+   status more easily. the members are indexed by health in
+   a heap of (hp, order) and the members standing are counted.
+   the members tell the party when their hp changes through
+   suffer() or heal() so both stay up to date.'''
    
-   def __init__(self, unitsList: list):
+   def __init__(self, unitsList: list, rename = True):
       # create the party from the regular list
       super().__init__(unitsList)
       # add affixes to repeated names
-      if len(self) > 1:
+      if rename and len(self) > 1:
          for i, unit in enumerate(self):
             count = 0
             name = unit.getName()
@@ -54,6 +142,13 @@ class Party(list):
                if self[idx].getName() == name:
                   count += 1
                   self[idx].addLetter(count)
+      # health index
+      self.order = dict() # id(unit): order in the party
+      self.hps = list() # hp of each member as last indexed
+      self.heap = list() # (hp, order) of the members standing
+      self.standing = 0
+      for unit in self:
+         self.track(unit)
    
    # getters
    def getSize(self) -> int:
@@ -69,17 +164,18 @@ class Party(list):
       return self.__getitem__(unitOrder)
    def getWeakestMember(self):
       '''return the member of the party that has the
-      lowest current health stat if applicable.'''
-      # make a copy list
-      copy = [u for u in self]
-      # sort in ascending order
-      copy.sort(key = getHP)
-      # find unit alive with lowest HP
-      idx = 0
-      while idx < len(copy) and not copy[idx].isAlive():
-         idx += 1
-      # current copy[idx] unit is weakest
-      return copy[idx]
+      lowest current health stat if applicable. ties go to
+      the first member in the party.'''
+      heap, hps = self.heap, self.hps
+      while len(heap) > 0:
+         hp, idx = heap[0]
+         if hp != hps[idx]: # outdated entry
+            heappop(heap)
+         elif hp != getHP(self[idx]): # changed behind our back
+            self.update(self[idx])
+         else:
+            return self[idx]
+      raise IndexError("no member of the party stands.")
    def getMembers(self) -> list:
       '''return all the units members of the party as a
       simple python list variable.'''
@@ -87,18 +183,46 @@ class Party(list):
    def stillStands(self) -> bool:
       '''return "True" if any of the units of the Party
       are still alive (a.k.a has HP > 0).'''
-      idx = 0
-      alive = False
-      while idx < self.getSize() and not alive:
-         alive = self.__getitem__(idx).isAlive()
-         if not alive:
-            idx += 1
-      return alive
+      return self.standing > 0
    
    # setters
    def addMember(self, newMember: Unit):
       '''add a new unit to the party.'''
       self.append(newMember)
+      self.track(newMember)
+   def track(self, unit: Unit):
+      '''add the last member "unit" to the health index.'''
+      idx = len(self.hps)
+      hp = getHP(unit)
+      self.order[id(unit)] = idx
+      self.hps.append(hp)
+      if hp > 0:
+         self.standing += 1
+         heappush(self.heap, (hp, idx))
+      unit.watch(self)
+   def update(self, unit: Unit):
+      '''index the new hp of the member "unit". the old entries
+      are left in the heap and dropped once they reach the top.'''
+      idx = self.order[id(unit)]
+      old, hp = self.hps[idx], getHP(unit)
+      if hp != old:
+         self.hps[idx] = hp
+         if hp > 0:
+            if old == 0:
+               self.standing += 1
+            heappush(self.heap, (hp, idx))
+            if len(self.heap) > 4 * len(self) + 16: # too many old
+               self.heap = [(h, i) for i, h in enumerate(self.hps)
+                  if h > 0]
+               heapify(self.heap)
+         elif old > 0:
+            self.standing -= 1
+   
+   # pickling
+   def __reduce__(self):
+      '''only the members are saved. the health index is made
+      again from them when loaded.'''
+      return (self.__class__, (list(self), False))
    
    # override tostring
    def __str__(self) -> str:
@@ -119,14 +243,29 @@ class TurnOrder:
    '''a round stops only when all units in the battle have
    moved once. this object tracks each units and creates 
    an iterable list that returns the next to move, keeing
-   it updated.'''
+   it updated. the units are kept in a heap by their remaining
+   dexterity. the units tell the turn order when their hp or
+   dexterity change and only they are looked at again.'''
    
    def __init__(self, allUnits: list):
       '''create the attributes of the turn order object
       by receiving a list of all the units in battle.'''
       self.units = allUnits
    
-   # getters
+   # setters
+   def update(self, u: Unit):
+      '''update the remaining dexterity of the unit "u" whose
+      stats changed.'''
+      idx = self.order[id(u)]
+      old = self.mutDexts[idx]
+      nDext = u.getStats().getStat(STATS[5]).getCurrent()
+      new = old + nDext - self.oDexts[idx] # same diff
+      self.oDexts[idx] = nDext
+      if not u.isAlive(): # kick them out of the turn
+         new = -1
+      if new != old:
+         self.mutDexts[idx] = new
+         heappush(self.heap, (-new, idx))
    # iterator override
    # this object will now be iterable and the next() method
    # will return the next character that moves until none
@@ -136,61 +275,49 @@ class TurnOrder:
       # create an image of the current stats to
       # track dexts in case one changes.
       self.oDexts = list()
-      for u in self.units:
+      self.order = dict() # id(unit): order in the turn
+      for i, u in enumerate(self.units):
          self.oDexts.append(
             u.getStats().getStat(STATS[5]).getCurrent()
          )
-      # create a table that relate each unit to their dext
-      self.mutDexts = [(self.units[i], self.oDexts[i])\
-         for i in range(len(self.units))]
-      self.mutDexts = dict(self.mutDexts)
-      # create a field for round the lowest dext
+         self.order[id(u)] = i
+         u.watch(self)
+      # current dext of each unit and the heap of (-dext, order).
+      # the order breaks ties in favor of the first unit listed.
+      self.mutDexts = list(self.oDexts)
+      for i, u in enumerate(self.units):
+         if not u.isAlive():
+            self.mutDexts[i] = -1
+      self.heap = [(-d, i) for i, d in enumerate(self.mutDexts)]
+      heapify(self.heap)
+      # create a field for round the lowest dext. it can't be
+      # lower than 1 or the round would never end.
       low = max(self.oDexts)
       for i in range(len(self.units)):
          if self.units[i]. isAlive():
-            dext = self.units[i].getStats().getStat(STATS[5]).getCurrent()
+            dext = self.oDexts[i]
             if low > dext:
                low = dext
-      self.lowDext = low
+      self.lowDext = max(low, 1)
       return self
    def __next__(self):
       '''return the unit of this TurnOrder that moves
       next by doing arithmetic on their dexterity.'''
-      # compare recorded dexterities with currents
-      for idx in range(len(self.oDexts)):
-         u = self.units[idx]
-         nDext = u.getStats().getStat(STATS[5]).\
-            getCurrent()
-         oDext = self.oDexts[idx]
-         if nDext != oDext: # dext changed
-            # take the algebraic difference
-            diff = nDext - oDext
-            # find the unit and apply same diff
-            old = self.mutDexts[u]
-            self.mutDexts.__setitem__(u, old + diff)
-            # updtate entry
-            self.oDexts[idx] = nDext
-      # dext updates are completed
-      # checks for dead units
-      for u, d in self.mutDexts.items():
-         if not u.isAlive():
-            # kick them out of the turn
-            self.mutDexts.__setitem__(u, -1)
-      # look for fastest unit and its current dext
-      maxDext = 0
-      fastest = self.units[maxDext]
-      for u, d in self.mutDexts.items():
-         if d > maxDext:
-            maxDext = d
-            fastest = u
+      # drop the outdated entries of the fastest unit
+      heap = self.heap
+      while -heap[0][0] != self.mutDexts[heap[0][1]]:
+         heappop(heap)
+      maxDext, idx = heap[0]
+      maxDext = -maxDext
       # compare fastest dext to standard dext
       if maxDext < self.lowDext: # round over then
          raise StopIteration
       # else implied: fastest moves next
       # reduce their dext according to standard dext
-      self.mutDexts.__setitem__(fastest, maxDext - self.lowDext)
+      self.mutDexts[idx] = maxDext - self.lowDext
+      heapreplace(heap, (-self.mutDexts[idx], idx))
       # return them
-      return fastest
+      return self.units[idx]
    
    # override tostring
    def __str__(self):
@@ -205,12 +332,16 @@ class BattleState(State):
    to the state of a battle in one object and auto run
    it.'''
    
-   def __init__(self, advs: Party, mons: Party, summonable = None):
+   def __init__(self, advs: Party, mons: Party, summonable = None,
+      retreat = True, rng = random):
       '''create the state by getting the two opposing
       parties and initializing all other member variables.
       no PvP will be implemented so it will always be
       adventurers VS monsters. summonable is a field that
       contains units that could join any of the parties.
+      retreat says if the adventurers can leave the battle
+      in case of a stalemate. every roll of the battle is drawn
+      from "rng".
       '''
       self.advs = advs
       self.mons = mons
@@ -220,22 +351,34 @@ class BattleState(State):
       self.summonable = summonable
       self.oStream = None # none by default. created by run()
       self.info = list() # empty by default
+      self.stalemate = None # reason of the stalemate if any
+      self.retreat = retreat
+      self.rng = rng
+      self.spoils = rng # exp and loot rolls. seeded by run()
+      # side of every unit in battle. units compare by identity so
+      # they are tagged by id() and finding a side is one lookup.
+      self.sides = dict()
+      for u in advs:
+         self.sides[id(u)] = advs
+      for u in mons:
+         self.sides[id(u)] = mons
    
    # getters
    def getAllies(self, unit) -> Party:
       '''return the party that "unit" is part of.'''
-      party = self.advs
-      try:
-         party.index(unit)
-      except ValueError: # was not in that party
+      party = self.sides.get(id(unit))
+      if party == None: # not tagged: added to a party directly
          party = self.mons
+         if unit in self.advs:
+            party = self.advs
+         self.sides[id(unit)] = party
       return party
    def getOpponents(self, unit) -> Party:
       '''return the party that "unit" is NOT part of.'''
       party = self.getAllies(unit)
-      if party == self.advs:
+      if party is self.advs:
          party = self.mons
-      else: # party == self.mons
+      else: # party is self.mons
          party = self.advs
       return party
    def getTurnOrder(self) -> TurnOrder:
@@ -250,11 +393,95 @@ class BattleState(State):
       return self.summonable
    def isOver(self):
       '''return "True" if any of the two parties involved
-      has been defeated.'''
+      has been defeated or if the battle is a stalemate.'''
       return ((not self.advs.stillStands()) or 
-         (not self.mons.stillStands()))
+         (not self.mons.stillStands()) or self.stalemate != None)
+   def getHealths(self) -> tuple:
+      '''return the current health of every unit in battle.'''
+      return tuple(getHP(u) for u in self.advs + self.mons)
+   
+   def isForegone(self) -> bool:
+      '''return "True" if the adventurers are sure to win without
+      losing any hp: no monster can deal damage through their
+      defenses and any hit of the adventurers kills a monster.
+      only the dodges of the monsters can drag the battle on and
+      the odds they make it a stalemate must be under SURE.'''
+      heroes, mons = self.advs.getMembers(), self.mons.getMembers()
+      raised = [dict() for m in mons] # most raised stats per monster
+      lowered = [dict() for h in heroes] # most lowered per hero
+      for m, up in zip(mons, raised):
+         for s in skillsOf(m):
+            if isinstance(s, ATTACKS):
+               continue
+            if not isinstance(s, (Buff, Debuff)) or "health" in s.raised:
+               return False
+            for stat in s.raised:
+               if isinstance(s, Buff):
+                  up[stat] = up.get(stat, 0) + stacked(s, m, stat)
+               else:
+                  for h, down in zip(heroes, lowered):
+                     down[stat] = down.get(stat, 0) + stacked(s, h, stat)
+      # the monsters can't deal damage
+      for m, up in zip(mons, raised):
+         for s in skillsOf(m):
+            if not isinstance(s, ATTACKS):
+               continue
+            ofs = offense(s)
+            dmg = m.getStats().getStat(ofs).getCurrent() + up.get(ofs, 0)
+            dmg = floor(dmg * s.power)
+            dfs = defense(ofs)
+            for h, down in zip(heroes, lowered):
+               hit = boosted(dmg, s.getElement(), h) * 2 # critical
+               if hit > (h.getStats().getStat(dfs).getCurrent() -
+                  down.get(dfs, 0)):
+                  return False
+      # any hit of the adventurers kills
+      strikes = 0 # least attacks in STALE_ROUNDS turns of the heroes
+      for h, down in zip(heroes, lowered):
+         if not h.isAlive():
+            continue
+         killing = list()
+         actions = (h.getSkillSet().getSkill("base"),
+            h.getSkillSet().getSkill("ability"))
+         for s in actions:
+            kills = s != None and unfailing(h, s)
+            if kills:
+               ofs = offense(s)
+               dmg = (h.getStats().getStat(ofs).getCurrent() -
+                  down.get(ofs, 0))
+               dmg = floor(max(dmg, 0) * s.power)
+               dfs = defense(ofs)
+               for m, up in zip(mons, raised):
+                  hit = boosted(dmg, s.getElement(), m) - (
+                     m.getStats().getStat(dfs).getCurrent() +
+                     up.get(dfs, 0))
+                  kills = kills and hit >= getHP(m)
+            killing.append(kills)
+         # the ability is used every time it is ready
+         ability = actions[1]
+         uses = [STALE_ROUNDS, 0] # of the base and the ability
+         if ability != None:
+            period = ability.cd.getTime() + 1
+            uses = [STALE_ROUNDS - ceil(STALE_ROUNDS / period),
+               STALE_ROUNDS // period] # base whenever the ability isn't
+         uses = [n if kills else 0 for n, kills in zip(uses, killing)]
+         # the shots may run out of arrows: then only the rest count
+         shots = [getattr(s, "arrows", 0) for s in actions]
+         if sum(n * a for n, a in zip(uses, shots)) > arrows(h):
+            uses = [n if a == 0 else 0 for n, a in zip(uses, shots)]
+         strikes += sum(uses)
+      if strikes == 0:
+         return False
+      dodge = max((m.getStats().getStat("dexterity").getCurrent() +
+         up.get("dexterity", 0) + 1) / 100 for m, up in zip(mons, raised))
+      return dodge ** strikes <= SURE
    
    # setter
+   def join(self, unit, party: Party):
+      '''add "unit" to "party" during the battle. it only gets to
+      move from the next round on.'''
+      party.addMember(unit)
+      self.sides[id(unit)] = party
    # post battle stuff
    def awardExp(self):
       '''make adventurers gain experience from their fight.
@@ -270,38 +497,94 @@ class BattleState(State):
             for opp in self.getOpponents(u):
                oLvl = opp.getLevel().getCurrent()
                gain += (10 * ceil(E(oLvl - uLvl)))
-            fprint("{} gained {} exp. pts!".format(
-               u.getName(), gain), self.oStream)
-            if u.develup(gain): # leveled up
+            self.log("{} gained {} exp. pts!", u.getName(), gain)
+            if u.develup(gain, self.spoils): # leveled up
                lvlupMSG = "{} has reached lvl {}.".format(u.getName(),
                   u.getLevel().getCurrent())
                self.info.append(("t", lvlupMSG))
-               fprint(lvlupMSG, self.oStream)
-               fprint(str(u.getStats().getFullStats()), self.oStream)
+               self.log(lvlupMSG)
+               self.log(u.getStats().getFullStats())
    def collectLoot(self):
       '''allows adventurers to collect loot from monsters.'''
+      roll = percents(self.spoils)
       for m in self.mons:
          chances = 90
          for item in m.getBag():
             qty = 0
             for i in range(len(item)): # drops
-               if choice(range(100)) <= chances:
+               if roll() <= chances:
                   qty += 1
                chances -= 10 # reduces chances of getting next
             self.info.append(('i', item[0].getName())) # all drops names
-            fprint("got {} x {} from {}!".format(len(item), 
-               item[0].getName(), m.getName()), self.oStream)
+            self.log("got {} x {} from {}!", len(item), 
+               item[0].getName(), m.getName())
             for a in self.advs: # distribute
                a.getBag().addMulti(item[0], qty)
                #sleep(2)
    
+   def sweep(self):
+      '''resolve a foregone battle: the monsters all fall, each to
+      one hit of the heroes taking turns from the fastest. a hero
+      shooting spends an arrow on the hit and one more on every shot
+      the monster dodges, rolled like targetAttack.'''
+      heroes = sorted((h for h in self.advs if h.isAlive()),
+         key = lambda h: -h.getStats().getStat(STATS[5]).getCurrent())
+      roll = percents(self.rng)
+      for i, m in enumerate(self.mons):
+         hero = heroes[i % len(heroes)]
+         if isinstance(hero.getSkillSet().getBestAction(), Shoot):
+            dexterity = m.getStats().getStat(STATS[5]).getCurrent()
+            while len(hero.getBag().takeOut("arrow")) != 0 and\
+               roll() <= dexterity:
+               pass # dodged
+         m.suffer(getHP(m))
+      count("battle.swept")
+      self.log("the adventurers swept through {} monster(s).",
+         self.mons.getSize())
+   
+   # battle log
+   def log(self, msg, *args):
+      '''write "msg" formatted with "args" to the battle log. does
+      nothing in headless mode so the text is never made.'''
+      if self.oStream != None:
+         if len(args) > 0:
+            msg = msg.format(*args)
+         fprint(msg, self.oStream)
+   def logOutcome(self, outcome):
+      '''write the events of a skill "outcome" to the battle log.'''
+      if self.oStream != None:
+         if type(outcome) != list:
+            outcome = [outcome,]
+         for t, events in outcome:
+            fprint(describe(events), self.oStream)
+   
+   # profiling
+   def invoke(self, skill: Skill, unit, kind: str):
+      '''use "skill" as "unit" and time it by skill name, by kind of
+      use ("action", "critical" or "reaction") and by species for the
+      monsters. only called when metrics.PROFILE is set.'''
+      begin = clock()
+      result = skill(unit, self)
+      spent = clock() - begin
+      name = skill.getName()
+      observe("skill." + name, spent)
+      observe(kind + '.' + name, spent)
+      if isinstance(unit, Monster):
+         observe("species." + unit.getName().split()[0], spent)
+      return result
+   
    # battle method
    def run(self, verbose = True):
       '''runs a battle between the two parties involved in
       the encounter. a battle only stops if one party has
       been defeated meaning they have no more members
-      standing. the "verbose" flag allow for console print.'''
-      self.oStream = "records/temps/" + str(self.__hash__()) + ".btl"
+      standing. the "verbose" flag keeps a battle log, written
+      if the battle is lost. without it, the battle runs headless
+      and the returned log path is None.'''
+      self.oStream = None
+      if verbose: # only written if the battle is lost
+         self.oStream = BattleLog("records/temps/" +
+            str(self.__hash__()) + ".btl")
       for m in self.mons: # record monster names
          # get rif of Alphabet recordings.
          # this only works because monsters name are always in
@@ -311,39 +594,49 @@ class BattleState(State):
          name = name[0] # keep only the first part
          self.info.append(('m', name))
       roundNo = 0
-      fprint("a battle has started:\n", self.oStream) # DEBUG
+      self.log("a battle has started:\n") # DEBUG
       #sleep(1)                         # DEBUG
+      begin = clock() # metrics and time budget
+      profile = metrics.PROFILE # read once: costs nothing when off
+      self.spoils = random.Random(self.rng.getrandbits(32))
+      if SWEEP and self.isForegone(): # no need to play it out
+         self.sweep()
+      healths = self.getHealths()
+      stale = 0 # rounds in a row without health change
       while not self.isOver(): # battle loop
+         roundStart = clock()
          # dynamically update turn order
          self.turnOrder = TurnOrder(self.advs.getMembers() +
             self.mons.getMembers())
-         fprint(self.__str__(), self.oStream)                   # DEBUG
-         fprint("Round {}".format(roundNo + 1), self.oStream)  # DEBUG
+         self.log(self)                                  # DEBUG
+         self.log("Round {}", roundNo + 1)               # DEBUG
          #sleep(3)                      # DEBUG
          for unit in self.turnOrder: # round loop
             # update battle state
             self.moving = unit
             # cool skills
             unit.getSkillSet().tick()
-            # apply effects
-            unit.stats.cleanse() # base stats only
-            unit.getActiveEffects().tick() # countdown effects
-            unit.getActiveEffects().applyAll(unit) # re-apply
+            # expire and repeat effects
+            if profile:
+               applying = clock()
+               unit.getActiveEffects().tick(unit)
+               observe("effects", clock() - applying)
+            else:
+               unit.getActiveEffects().tick(unit)
             # action
             a = unit.getSkillSet().getBestAction()
-            fprint("\n{} attempts {}!".format(unit.getName(),
-               a.getName()), self.oStream)           # DEBUG
+            self.log("\n{} attempts {}!", unit.getName(),
+               a.getName())                          # DEBUG
             #sleep(2)                   # DEBUG
-            result = a(unit, self)
+            if profile:
+               result = self.invoke(a, unit, "action")
+            else:
+               result = a(unit, self)
             if type(result) != list:
                result = [result,] # convert to list
-            # DEBUG BLOC
-            for t, msg in result:
-               fprint(msg, self.oStream)
-               #sleep(2)
-            # END OF DEBUG BLOC
+            self.logOutcome(result) # DEBUG
             # critical actions or reactions
-            for t, msg in result:
+            for t, events in result:
                if t != None and t.isAlive():
                   c = t.getSkillSet().getSkill("critical")
                   r = t.getSkillSet().getSkill("reaction")
@@ -351,29 +644,65 @@ class BattleState(State):
                   if (t.isCritical() and c!= None and 
                      c.isReady()):
                      # critical reaction branch
-                     fprint("\ndesperate, {} attempts {}!".format(
-                        t.getName(), c.getName()), self.oStream)  # DEBUG
+                     self.log("\ndesperate, {} attempts {}!",
+                        t.getName(), c.getName())  # DEBUG
                      #sleep(2)             # DEBUG
-                     res = c(t, self)
+                     if profile:
+                        res = self.invoke(c, t, "critical")
+                     else:
+                        res = c(t, self)
                   elif r != None and r.isReady():
                      # reaction branch
-                     fprint("\n{} attempts {} in return!".format(
-                        t.getName(), r.getName()), self.oStream)  # DEBUG
+                     self.log("\n{} attempts {} in return!",
+                        t.getName(), r.getName())  # DEBUG
                      #sleep(2)             # DEBUG
-                     res = r(t, self)
+                     if profile:
+                        res = self.invoke(r, t, "reaction")
+                     else:
+                        res = r(t, self)
                   # else is implied
-                  # DEBUG BLOC
                   if res != None:
-                     fprint(res[1], self.oStream)
-                     #sleep(2)
-                  # END OF DEBUG BLOC
+                     self.logOutcome(res) # DEBUG
             # check for end of battle
             if self.isOver():
                break # out of round For loop
+            if clock() - begin > MAX_TIME: # out of time
+               self.stalemate = "time"
+               break
          # end of round loop
          if not self.isOver():
             roundNo += 1
+            current = self.getHealths()
+            if current == healths:
+               stale += 1
+            else:
+               stale = 0
+               healths = current
+            if stale >= STALE_ROUNDS:
+               self.stalemate = "stale"
+            elif roundNo >= MAX_ROUNDS:
+               self.stalemate = "rounds"
+         observe("round", clock() - roundStart)
       # end of battle loop
+      observe("battle", clock() - begin)
+      if self.stalemate != None:
+         count("battle.stalemate." + self.stalemate)
+         msg = "the fight against {} went nowhere ".format(
+            self.mons.getMember(0).getName())
+         if self.stalemate == "time": # not replayable: say it
+            msg = "the fight against {} ran past the {}s time guard ".format(
+               self.mons.getMember(0).getName(), MAX_TIME)
+         if self.retreat: # draw
+            msg += "so the party left it after {} rounds.".format(
+               roundNo)
+         else: # the adventurers fall
+            msg += "and the party collapsed after {} rounds.".format(
+               roundNo)
+            for u in self.advs:
+               u.suffer(getHP(u))
+            self.stalemate = None # regular defeat
+         self.info.append(('p', msg))
+         self.log("\n" + msg) # DEBUG
       # cleanse stats
       for u in self.advs:
          u.stats.cleanse()
@@ -384,13 +713,17 @@ class BattleState(State):
       if not self.advs.stillStands():
          winner = self.mons
          wName = "monsters"
-      fprint("\n{} won the battle!\n".format(wName), self.oStream) # DEBUG
+      self.log("\n{} won the battle!\n", wName) # DEBUG
       # award rewards
-      if winner == self.advs:
-         self.awardExp()
-         self.collectLoot()
-         os.remove(self.oStream) # erase it since not needed
-      return (self.info, self.oStream)
+      if self.stalemate == None: # somebody won
+         if winner == self.advs:
+            self.awardExp()
+            self.collectLoot()
+         elif self.oStream != None: # keep the report of the defeat
+            self.oStream.save()
+      if self.oStream == None: # headless
+         return (self.info, None)
+      return (self.info, self.oStream.path)
          
    # override tostring
    def __str__(self) -> str:
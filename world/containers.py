@@ -96,7 +96,7 @@ class Inventory:
    def addMulti(self, itm: Item, qt= 1):
       '''add multiple copies of the same item to
       the bag.'''
-      done = False
+      done = qt <= 0 # nothing to add
       i = 0
       while self.hasSpace() and not done:
          if self.add(itm.copy()): # different copies
@@ -177,6 +177,7 @@ SLOTS = ["WPN", "ARM", "ACC"]
 class Equipment(dict):
    '''the collection of the 3 gear that a playable can
    have at the time. based off a dict for convenience.'''
+   changes = 0 # bumped on every gear change
    
    def __init__(self):
       '''construction requires no actual gear. defines
@@ -222,6 +223,7 @@ class Equipment(dict):
          slot = gear.t
          old = self.get(slot)
          self.__setitem__(slot, gear)
+         self.changes += 1
       except AttributeError: # gear without a "t" attribute
          raise ValueError("passed gear is not a Weapon, Armor "
             "or Accessory type object.")
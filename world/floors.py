@@ -41,17 +41,18 @@ class Floor:
       return self.hazard
    
    # randomly generate floor
-   def build(self, debug = False) -> list:
+   def build(self, debug = False, rng = rnd) -> list:
       '''this uses the two lists to fill up the floor with
       blocks randomly choosen meaning "probs" contains how
       many of each block is needed to fill "size -1" slots 
       of this floor. this requires that 
       "len(pop) == len(probs)". if the debug argument is set to
       "True", the floor composition will be console printed.
-      the created list is returned.
+      the blocks are drawn from "rng". the created list is
+      returned.
       '''
       # build list
-      build = rnd.choices(self.pop, self.probs, k = self.size - 1)
+      build = rng.choices(self.pop, self.probs, k = self.size - 1)
       # deterministic alternative
       '''
       for bType in range(len(pop)):
@@ -65,7 +66,24 @@ class Floor:
             print("{}f: {}".format(no + 1, b))
             print('\n')
       return build
-      
+
+   # compact form of a built floor
+   def getLayout(self, build: list) -> list:
+      '''return the "build" list as the indexes of its blocks in the
+      population. the stairs are -1. it is small enough to be saved
+      with every checkpoint of an exploration.'''
+      layout = list()
+      for b in build:
+         if b is self.stairs:
+            layout.append(-1)
+         else:
+            layout.append(self.pop.index(b))
+      return layout
+   def rebuild(self, layout: list) -> list:
+      '''return the build list described by a "layout" made by
+      self.getLayout().'''
+      return [self.stairs if i == -1 else self.pop[i] for i in layout]
+
    # toString
    def __str__(self, all = False):
       '''return a string version of the floor for reference.'''
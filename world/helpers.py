@@ -7,23 +7,153 @@
 '''
 
 # imports
-from random import choice
-import sys
+import random
+from collections import deque
+from operator import length_hint
+from functools import partial
+import sys, os
 import time as tm
+try:
+   import numpy as np # fastest blocks of rolls
+except ModuleNotFoundError:
+   np = None
 
 # random gen 1 - maxValue
-def rndGen(max = 10):
+def rndGen(max = 10, rng = random):
    '''randomly allocates a number between 1 and max for
-   the luck stat.'''
-   return choice(range(max)) + 1
+   the luck stat. "rng" is the random generator drawn from.'''
+   return rng.randrange(max) + 1
+def percents(rng = random):
+   '''return the function drawing the percent rolls of "rng":
+   straight from the block of a Rolls, through randrange(100) for
+   any other generator. fetched once for many rolls (all the rolls
+   of a hit, of a loot...) it saves the randrange call of each.'''
+   percent = getattr(rng, "percent", None)
+   if percent == None: # not a Rolls
+      percent = partial(rng.randrange, 100)
+   return percent
+# random generator drawing its percent rolls in blocks
+ROLLS_BLOCK = 1024 # percent rolls drawn at once
+class Rolls:
+   '''a random generator for battles. most rolls are percents
+   (evasion, critical hits, drops) so they are served by percent()
+   from a block drawn at once instead of one call each. the block
+   is drawn by numpy if "fast" is set and numpy is there, else by
+   the python generator. any other draw goes to a random.Random.
+   both are seeded from "seed" so a seeded Rolls replays the same.'''
+   def __init__(self, seed = None, fast = True, size = ROLLS_BLOCK):
+      self.rng = random.Random(seed)
+      self.np = None
+      if fast and np != None:
+         self.np = np.random.default_rng(seed)
+      self.size = size
+      self.start(list())
+   
+   # draws
+   def start(self, rolls: list):
+      '''serve "rolls" before drawing the next blocks. percent() is
+      the next() of a generator so a roll is a single call.'''
+      self.rolls = rolls
+      self.left = iter(rolls)
+      self.percent = self.blocks().__next__
+   def blocks(self):
+      '''yield the rolls left then the rolls of new blocks.'''
+      while True:
+         yield from self.left
+         self.draw()
+   def randrange(self, n: int) -> int:
+      '''return a number from 0 to "n - 1".'''
+      if n == 100:
+         return self.percent()
+      return self.rng.randrange(n)
+   def draw(self):
+      '''draw the next block of percent rolls.'''
+      if self.np != None:
+         self.rolls = self.np.integers(0, 100, self.size).tolist()
+      else:
+         self.rolls = self.rng.choices(range(100), k = self.size)
+      self.left = iter(self.rolls)
+   def choice(self, seq):
+      return self.rng.choice(seq)
+   def choices(self, population, weights = None, k = 1) -> list:
+      return self.rng.choices(population, weights, k = k)
+   def random(self) -> float:
+      return self.rng.random()
+   def getrandbits(self, k: int) -> int:
+      return self.rng.getrandbits(k)
+   
+   # state
+   def getstate(self) -> tuple:
+      '''return the state of the generators and the rolls left in
+      the current block.'''
+      bits = None
+      if self.np != None:
+         bits = self.np.bit_generator.state
+      left = length_hint(self.left)
+      return (self.rng.getstate(), bits,
+         self.rolls[len(self.rolls) - left:])
+   def setstate(self, state: tuple):
+      '''go back to a "state" made by getstate().'''
+      py, bits, left = state
+      self.rng.setstate(py)
+      if bits != None and self.np != None:
+         self.np.bit_generator.state = bits
+      self.start(left)
+   
+   # pickling
+   def __getstate__(self) -> dict:
+      '''the generator behind percent() can't be pickled: only the
+      rolls left are.'''
+      state = dict(self.__dict__)
+      state["rolls"] = self.getstate()[2]
+      del state["left"], state["percent"]
+      return state
+   def __setstate__(self, state: dict):
+      rolls = state.pop("rolls")
+      self.__dict__.update(state)
+      self.start(rolls)
+# battle log kept in memory
+LOG_CAP = 64 * 1024 # characters kept by a BattleLog
+class BattleLog:
+   '''the lines printed during a battle. they stay in memory and
+   are only written to "path" by save(), when the battle report is
+   actually needed. past "cap" characters the oldest lines are
+   dropped since the end of a fight is what explains its outcome.'''
+   def __init__(self, path: str, cap = LOG_CAP):
+      self.path = path
+      self.cap = cap
+      self.lines = deque()
+      self.size = 0
+      self.dropped = 0 # number of lines dropped
+   
+   def write(self, msg: str):
+      '''add the line "msg" to the log.'''
+      self.lines.append(msg)
+      self.size += len(msg) + 1
+      while self.size > self.cap and len(self.lines) > 1:
+         self.size -= len(self.lines.popleft()) + 1
+         self.dropped += 1
+   def save(self) -> str:
+      '''write the log to its file and return its path.'''
+      os.makedirs(os.path.dirname(self.path) or '.', exist_ok = True)
+      with open(self.path, 'w') as log:
+         if self.dropped > 0:
+            log.write("[{} earlier lines were cut]\n".format(
+               self.dropped))
+         log.write('\n'.join(self.lines) + '\n')
+      return self.path
 # print to file instead of stdout
 def fprint(msg: str, stream = sys.stdout):
-   '''prints to the specified file.'''
+   '''prints to the specified file or BattleLog.'''
    if type(msg) != type(str()):
       msg = msg.__str__()
-   if stream != sys.stdout:
-      stream = open(stream, "a+")
-   print(msg, file = stream)
+   if isinstance(stream, BattleLog):
+      stream.write(msg)
+   elif stream != sys.stdout:
+      with open(stream, "a+") as out:
+         print(msg, file = out)
+   else:
+      print(msg, file = stream)
 # convert epoch to a time string
 def timeString(seconds: int) -> str:
    '''return a "XXhXXminXXs" format time string from the seconds.'''
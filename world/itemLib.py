@@ -390,4 +390,15 @@ def s_Gloves():
       [("attack", 1),]
    )
    gloves.setIco(GEAR + "Grey/Gloves/Hunter.png")
-   return gloves
\ No newline at end of file
+   return gloves
+
+# spawners by item ID
+SPAWNERS = dict()
+def spawn(itemID: int):
+   '''return a new item of ID "itemID". items are identified
+   by their ID in the exploration results.'''
+   if len(SPAWNERS) == 0: # index the spawners on first use
+      for name, spawner in list(globals().items()):
+         if name.startswith("s_"):
+            SPAWNERS[spawner().getID()] = spawner
+   return SPAWNERS[itemID]()
@@ -0,0 +1,90 @@
+'''
+# metrics.py
+# process wide instrumentation of the exploration engine. timings
+# are accumulated by name as count, total, min and max so recording
+# one is a handful of operations. counters are plain totals. the
+# worker processes collect their metrics after each job and send
+# them back to the explorer that merges them and exports them.
+# date: 10/18/26
+# author: dnglokpor
+'''
+
+# imports
+from time import perf_counter
+
+ENABLED = True # set to False to turn all recording off
+# skill profiling. off by default since it times every move of every
+# battle: skills by name and by use, monsters by species and effects.
+PROFILE = False
+PROFILED = ("skill.", "action.", "critical.", "reaction.", "species.",
+   "effects")
+TIMINGS = dict() # name: [count, total, min, max] (sec)
+COUNTS = dict() # name: total
+
+# recording
+def observe(name: str, value: float):
+   '''record a "value" seconds timing under "name".'''
+   if ENABLED:
+      t = TIMINGS.get(name)
+      if t == None:
+         TIMINGS[name] = [1, value, value, value]
+      else:
+         t[0] += 1
+         t[1] += value
+         if value < t[2]:
+            t[2] = value
+         if value > t[3]:
+            t[3] = value
+def count(name: str, n = 1):
+   '''add "n" to the counter "name".'''
+   if ENABLED:
+      COUNTS[name] = COUNTS.get(name, 0) + n
+def clock() -> float:
+   '''return the current time of the timings clock.'''
+   return perf_counter()
+
+# exchange
+def collect() -> tuple:
+   '''return the (timings, counts) recorded so far and start over.'''
+   global TIMINGS, COUNTS
+   out = (TIMINGS, COUNTS)
+   TIMINGS, COUNTS = dict(), dict()
+   return out
+def merge(collected: tuple):
+   '''add the (timings, counts) made by collect() in another process
+   to the ones of this process.'''
+   timings, counts = collected
+   for name, (n, total, low, high) in timings.items():
+      t = TIMINGS.get(name)
+      if t == None:
+         TIMINGS[name] = [n, total, low, high]
+      else:
+         t[0] += n
+         t[1] += total
+         t[2] = min(t[2], low)
+         t[3] = max(t[3], high)
+   for name, n in counts.items():
+      COUNTS[name] = COUNTS.get(name, 0) + n
+def report(collected = None) -> dict:
+   '''return the metrics recorded so far, or the (timings, counts)
+   "collected", in a json friendly format. timings are in
+   milliseconds.'''
+   if collected == None:
+      collected = (TIMINGS, COUNTS)
+   recorded, counted = collected
+   timings = dict()
+   for name, (n, total, low, high) in sorted(recorded.items()):
+      timings[name] = {
+         "count": n,
+         "total": round(total * 1000, 3),
+         "mean": round(total * 1000 / n, 3),
+         "min": round(low * 1000, 3),
+         "max": round(high * 1000, 3)
+      }
+   return {"timings": timings, "counts": dict(sorted(counted.items()))}
+def profile(collected: tuple) -> dict:
+   '''return the skill profile in the (timings, counts) "collected"
+   in the format of report().'''
+   timings = {name: t for name, t in collected[0].items()
+      if name.startswith(PROFILED)}
+   return report((timings, dict()))["timings"]
@@ -12,38 +12,39 @@ from skills import Skill
 from units import Monster
 import itemLib as il
 import skillLib as skl
-from random import seed, choice
+import random
 
 # helper 
-def choose(maxVal) -> int:
-   '''return a random value from 0 to "maxVal - 1".'''
-   seed() # seed rnd gen
-   return choice(range(maxVal))
+def choose(maxVal, rng = random) -> int:
+   '''return a random value from 0 to "maxVal - 1" drawn from
+   "rng".'''
+   return rng.randrange(maxVal)
 
 # default spawner
 def spawn(name: str, level: int, bStats: list,
-   bSkill: Skill, lore: str, elt = NOELM) -> Monster:
+   bSkill: Skill, lore: str, elt = NOELM, rng = random) -> Monster:
    '''spawn any monster provided with the right info.'''
-   return Monster(name, level, bStats, bSkill, lore, elt)
+   return Monster(name, level, bStats, bSkill, lore, elt, rng)
    
 # monster spawners
 # Raccoundrel
-def s_Raccoundrel(level = 1):
+def s_Raccoundrel(level = 1, rng = random):
    '''return a level "level" Raccoundrel (Monster).'''
    raccoundrel = spawn(
       "Raccoundrel",
       level, 
       [
-         15 + choose(3), # hp 15-17
-         20 + choose(2), 10 + choose(2), # atk 20-21|def 10-11
-         5 + choose(2), 7 + choose(3), # spe 5-6|res 7-9
-         6 + choose(2), # dext 6-7
-         choose(5) # luc 0-4
+         15 + choose(3, rng), # hp 15-17
+         20 + choose(2, rng), 10 + choose(2, rng), # atk 20-21|def 10-11
+         5 + choose(2, rng), 7 + choose(3, rng), # spe 5-6|res 7-9
+         6 + choose(2, rng), # dext 6-7
+         choose(5, rng) # luc 0-4
       ],
       skl.bite,
       "small raccoun like mob of early dungeon floors with an "
       "aggressive behaviour and a vicious bite.",
-      NOELM
+      NOELM,
+      rng
    )
    # ability/critical skills
    
@@ -55,22 +56,23 @@ def s_Raccoundrel(level = 1):
    return raccoundrel
 
 # Sparowl
-def s_Sparowl(level = 1):
+def s_Sparowl(level = 1, rng = random):
    '''return a level "level" Sparowl (Monster).'''
    sparowl = spawn(
       "Sparowl",
       level,
       [
-         12 + choose(5), # hp 10-14
-         20 + choose(2), 8 + choose(2), # atk 20-21|def 8-10
-         15 + choose(3), 9 + choose(3), # spe 15-17|res 9-11
-         10 + choose(2), # dext 10-11
-         choose(5) # luc 0-4
+         12 + choose(5, rng), # hp 10-14
+         20 + choose(2, rng), 8 + choose(2, rng), # atk 20-21|def 8-10
+         15 + choose(3, rng), 9 + choose(3, rng), # spe 15-17|res 9-11
+         10 + choose(2, rng), # dext 10-11
+         choose(5, rng) # luc 0-4
       ],
       skl.peck,
       "this giant dungeon owl is incredibly agile so watch out "
       "for its sharp beak and powerful wind bursts.",
-      AEOLA
+      AEOLA,
+      rng
    )
    # ability/critical skills
    if level >= 3:
@@ -84,23 +86,24 @@ def s_Sparowl(level = 1):
    return sparowl
 
 # Honeybeat
-def s_Honeybeat(level = 1):
+def s_Honeybeat(level = 1, rng = random):
    '''return a level "level" Honeybeat (Monster).'''
    honeybeat = spawn(
       "Honeybeat",
       level,
       [
-         12 + choose(5), # hp 10-14
-         18 + choose(5), 6 + choose(3), # atk 18-22|def 6-8
-         8 + choose(3), 15 + choose(3), # spe 8-10|res 15-17
-         15 + choose(4), # dext 15-18
-         choose(5) # luc 0-4
+         12 + choose(5, rng), # hp 10-14
+         18 + choose(5, rng), 6 + choose(3, rng), # atk 18-22|def 6-8
+         8 + choose(3, rng), 15 + choose(3, rng), # spe 8-10|res 15-17
+         15 + choose(4, rng), # dext 15-18
+         choose(5, rng) # luc 0-4
       ],
       skl.sting,
       "everyone likes honey but if you come accros a Honeybeat "
       "hive, you should run away unless being lethally stung "
       "is the last thing on your bucket list.",
-      AEOLA
+      AEOLA,
+      rng
    )
    # ability/critical skills
    if level >= 1:
@@ -115,23 +118,24 @@ def s_Honeybeat(level = 1):
    return honeybeat
 
 # Caterkiller
-def s_Caterkiller(level = 1):
+def s_Caterkiller(level = 1, rng = random):
    '''return a level "level" Caterkiller (Monster).'''
    caterkiller = spawn(
       "Caterkiller",
       level, 
       [
-         10 + choose(3), # hp 10-12
-         15 + choose(5), 13 + choose(2), # atk 15-19|def 13-14
-         10 + choose(2), 12 + choose(3), # spe 10-11|res 12-12
-         4 + choose(2), # dext 4-5
-         choose(5) # luc 0-4
+         10 + choose(3, rng), # hp 10-12
+         15 + choose(5, rng), 13 + choose(2, rng), # atk 15-19|def 13-14
+         10 + choose(2, rng), 12 + choose(3, rng), # spe 10-11|res 12-12
+         4 + choose(2, rng), # dext 4-5
+         choose(5, rng) # luc 0-4
       ],
       skl.bite,
       "don't let this giant caterpillar fool you. thanks to their "
       "speed debuffs and their persistence, they have claimed many "
       "adventurers lives.",
-      AEOLA
+      AEOLA,
+      rng
    )
    # ability/critical skills
    if level >= 1:
@@ -0,0 +1,746 @@
+'''
+# simulator.py
+# monte carlo estimation of the chances a party has to clear a
+# floor. instead of playing explorations one after the other with
+# units and skills, the simulator plays many of them side by side
+# on numpy arrays: each lane is one exploration and each step of a
+# battle moves one unit in every lane still fighting. it follows
+# the rules of confrontation and skillLib (targets, damage, evasion,
+# cooldowns, effects, turn order, stalemates and level ups) but
+# monsters are spawned once into pools by their real spawners and
+# the lanes draw their encounters from those pools.
+# date: 10/18/26
+# author: dnglokpor
+'''
+
+# imports
+import numpy as np
+import skillLib as skl
+from base import STATS
+from blocks import EmptyBlock, ScavengingBlock, WoodcuttingBlock,\
+   MiningBlock, BattleBlock, BossBlock
+from collectibles import Bow, Artillery, Staff, Tome, genHash
+from confrontation import MAX_ROUNDS, STALE_ROUNDS
+from contextlib import redirect_stdout
+from io import StringIO
+
+POOL = 256 # spawns kept for each (spawner, level)
+SIDE = 5 # most monsters in one battle, summons included
+EFFECTS = 16 # active effects tracked per unit. more are dropped
+HP, ATK, DEF, SPE, RES, DEX, LCK = range(7)
+WON, LOST, DRAW = 1, 2, 3 # battle results
+# what a skill does
+NOTHING, SINGLE, COMBO, MULTI, SHOTS, BUFF, DEBUFF, SUMMON, COUNTER =\
+   range(9)
+# what a skill needs and what a unit holds
+FREE, ARMED, RANGED, MAGIC = range(4)
+NOWPN, BOW, WAND, BLADE = range(4)
+
+# skills
+def profile(skill) -> tuple:
+   '''return the (kind, need, offense, hits) of "skill". subclasses
+   must be checked before the class they derive from.'''
+   if isinstance(skill, skl.TriShot):
+      return (SHOTS, RANGED, ATK, 3)
+   if isinstance(skill, skl.Shoot):
+      return (SHOTS, RANGED, ATK, 1)
+   if isinstance(skill, skl.ComboAttack):
+      return (COMBO, FREE, ATK, 5)
+   if isinstance(skill, skl.Strike):
+      return (SINGLE, ARMED, ATK, 1)
+   if isinstance(skill, skl.Magic):
+      return (SINGLE, MAGIC, SPE, 1)
+   if isinstance(skill, skl.SinglePhysical):
+      return (SINGLE, FREE, ATK, 1)
+   if isinstance(skill, skl.SingleSpecial):
+      return (SINGLE, FREE, SPE, 1)
+   if isinstance(skill, skl.MultiPhysical):
+      return (MULTI, FREE, ATK, 1)
+   if isinstance(skill, skl.MultiSpecial):
+      return (MULTI, FREE, SPE, 1)
+   if isinstance(skill, skl.TakeAim):
+      return (BUFF, RANGED, ATK, 1)
+   if isinstance(skill, (skl.MagicShield, skl.Cure)):
+      return (BUFF, MAGIC, ATK, 1)
+   if isinstance(skill, skl.Buff):
+      return (BUFF, FREE, ATK, 1)
+   if isinstance(skill, skl.Debuff):
+      return (DEBUFF, FREE, ATK, 1)
+   if isinstance(skill, skl.Summon):
+      return (SUMMON, FREE, ATK, 1)
+   if isinstance(skill, skl.Counter):
+      return (COUNTER, FREE, ATK, 1)
+   if type(skill).__call__ is skl.Skill.__call__:
+      return (NOTHING, FREE, ATK, 1)
+   raise ValueError("{} can't be simulated.".format(skill.getName()))
+
+class SkillTable:
+   '''numbers every skill met by a simulation. skills are told
+   apart by identity because that is what shares a cooldown. the
+   columns describing them are built by freeze() once they are all
+   numbered.'''
+   def __init__(self):
+      self.skills = list()
+      self.ids = dict() # id(skill): number
+   def number(self, skill) -> int:
+      '''return the number of "skill". -1 for an empty slot.'''
+      if skill == None:
+         return -1
+      n = self.ids.get(id(skill))
+      if n == None:
+         n = len(self.skills)
+         self.ids[id(skill)] = n
+         self.skills.append(skill)
+      return n
+   def freeze(self):
+      '''build the columns of the table.'''
+      rows = [profile(s) for s in self.skills]
+      self.kind = np.array([r[0] for r in rows], dtype = np.int64)
+      self.need = np.array([r[1] for r in rows], dtype = np.int64)
+      self.ofs = np.array([r[2] for r in rows], dtype = np.int64)
+      self.hits = np.array([r[3] for r in rows], dtype = np.int64)
+      self.power = np.array([float(s.power) for s in self.skills])
+      self.elt = np.array([s.getElement().value for s in self.skills],
+         dtype = np.int64)
+      self.cdTime = np.array([s.cd.getTime() for s in self.skills],
+         dtype = np.int64)
+      self.elapsed = np.array([s.cd.getElapsed() for s in self.skills],
+         dtype = np.int64)
+      self.dur = np.array([getattr(s, "dur", 0) for s in self.skills],
+         dtype = np.int64)
+      # stats touched by buffs and debuffs, in their order
+      self.raised = np.full((len(self.skills), 7), -1, dtype = np.int64)
+      for n, s in enumerate(self.skills):
+         for i, stat in enumerate(getattr(s, "raised", list())):
+            self.raised[n, i] = STATS.index(stat)
+
+# units
+def weaponOf(unit) -> int:
+   '''return what the weapon of "unit" allows.'''
+   wpn = None
+   if hasattr(unit, "getEquipped"):
+      wpn = unit.getEquipped().getGear("WPN")
+   if wpn == None:
+      return NOWPN
+   if isinstance(wpn, (Bow, Artillery)):
+      return BOW
+   if isinstance(wpn, (Staff, Tome)):
+      return WAND
+   return BLADE
+def encode(units: list, table: SkillTable) -> dict:
+   '''return the arrays describing "units" for the simulation.'''
+   keys = ("base", "ability", "reaction", "critical")
+   full, cur, bonus = list(), list(), list()
+   for u in units:
+      full.append(u.stats.full)
+      cur.append(u.stats.current)
+      if hasattr(u, "getEquipped"):
+         bonus.append(u.getEquipped().getEqtBonus())
+      else:
+         bonus.append([0] * 7)
+   return {
+      "full": np.array(full, dtype = np.int64).reshape(-1, 7),
+      "cur": np.array(cur, dtype = np.int64).reshape(-1, 7),
+      "bonus": np.array(bonus, dtype = np.int64).reshape(-1, 7),
+      "elt": np.array([u.getElement().value for u in units],
+         dtype = np.int64),
+      "level": np.array([u.getLevel().getCurrent() for u in units],
+         dtype = np.int64),
+      "skills": np.array([[table.number(u.getSkillSet().getSkill(k))
+         for k in keys] for u in units], dtype = np.int64).reshape(-1, 4),
+      "weapon": np.array([weaponOf(u) for u in units], dtype = np.int64)
+   }
+
+# Battle object
+class Battle:
+   '''a batch of battles played in lockstep, one per lane. the
+   adventurers hold the first slots of a lane and the monsters the
+   SIDE last ones. the slots of the monsters that can be summoned
+   are filled from the start but stay absent until called.'''
+   def __init__(self, sim, lanes: np.ndarray, mons: dict,
+      present: np.ndarray, summonable: bool, retreat: bool):
+      self.sim = sim
+      self.rng = sim.rng
+      self.table = sim.table
+      self.lanes = lanes
+      self.retreat = retreat
+      self.summonable = summonable
+      n, A = len(lanes), sim.size
+      self.A = A
+      self.U = U = A + SIDE
+      self.foe = np.array([False] * A + [True] * SIDE)
+      heroes = sim.heroes
+      join = lambda h, m: np.concatenate([h, m], axis = 1)
+      self.full = join(sim.full[lanes], mons["full"])
+      self.cur = join(sim.cur[lanes], mons["full"])
+      self.bonus = join(np.broadcast_to(heroes["bonus"], (n, A, 7)),
+         np.zeros((n, SIDE, 7), dtype = np.int64))
+      self.elt = join(np.broadcast_to(heroes["elt"], (n, A)), mons["elt"])
+      self.level = join(sim.level[lanes], mons["level"])
+      self.skills = join(np.broadcast_to(heroes["skills"], (n, A, 4)),
+         mons["skills"])
+      self.weapon = join(np.broadcast_to(heroes["weapon"], (n, A)),
+         np.full((n, SIDE), NOWPN, dtype = np.int64))
+      self.arrows = join(sim.arrows[lanes],
+         np.zeros((n, SIDE), dtype = np.int64))
+      self.present = join(np.ones((n, A), dtype = bool), present)
+      self.cd = sim.cd[lanes]
+      # active effects: stat, signed amount and duration
+      self.effN = np.zeros((n, U), dtype = np.int64)
+      self.effStat = np.zeros((n, U, EFFECTS), dtype = np.int64)
+      self.effAmt = np.zeros((n, U, EFFECTS), dtype = np.int64)
+      self.effDur = np.zeros((n, U, EFFECTS), dtype = np.int64)
+      # turn order
+      self.inTurn = np.zeros((n, U), dtype = bool)
+      self.oDexts = np.zeros((n, U), dtype = np.int64)
+      self.mutDexts = np.zeros((n, U), dtype = np.int64)
+      self.lowDext = np.ones(n, dtype = np.int64)
+
+   # getters
+   def comb(self, b, u, s):
+      '''return the combined current "s" stat of units "u".'''
+      return np.maximum(self.cur[b, u, s] + self.bonus[b, u, s], 0)
+   def combAll(self, b, s):
+      '''return the combined current "s" stat of every unit.'''
+      return np.maximum(self.cur[b, :, s] + self.bonus[b, :, s], 0)
+   def alive(self, b, u):
+      return self.present[b, u] & (self.comb(b, u, HP) > 0)
+   def aliveAll(self, b):
+      return self.present[b] & (self.combAll(b, HP) > 0)
+   def isCritical(self, b, u):
+      return self.cur[b, u, HP] < self.full[b, u, HP] // 5
+   def isReady(self, b, s):
+      '''return True where skill "s" is set and cooled.'''
+      safe = np.maximum(s, 0)
+      return (s >= 0) & (self.cd[b, safe] == self.table.cdTime[safe])
+   def isOver(self, b):
+      alive = self.aliveAll(b)
+      return ~alive[:, :self.A].any(1) | ~alive[:, self.A:].any(1)
+   def healths(self, b):
+      '''the healths compared to detect stalemates. absent units
+      count so that a summon is a change.'''
+      return np.where(self.present[b], self.combAll(b, HP), -1)
+   def weakest(self, b, a):
+      '''return the opponent of "a" with the lowest health. the
+      first one wins ties. -1 if none stands.'''
+      opp = self.foe[None, :] != self.foe[a][:, None]
+      cand = opp & self.aliveAll(b)
+      hp = np.where(cand, self.combAll(b, HP), np.iinfo(np.int64).max)
+      t = hp.argmin(1)
+      return np.where(cand.any(1), t, -1)
+   def chance(self, chances):
+      return self.rng.integers(0, 100, len(chances)) <= chances
+
+   # setters
+   def changeBy(self, b, u, s, amount):
+      '''UnitStats.changeBy for one stat per lane.'''
+      new = np.maximum(self.cur[b, u, s] + amount, 0)
+      new = np.where(s == HP, np.minimum(new, self.full[b, u, HP]), new)
+      self.cur[b, u, s] = new
+   def addEffect(self, b, u, s, amount, dur):
+      '''EffectList.apply: add the effects and apply them.'''
+      n = self.effN[b, u]
+      room = n < EFFECTS
+      if not room.all():
+         self.sim.dropped += int((~room).sum())
+         b, u, s, amount, n = b[room], u[room], s[room], amount[room],\
+            n[room]
+         dur = dur[room]
+      self.effStat[b, u, n] = s
+      self.effAmt[b, u, n] = amount
+      self.effDur[b, u, n] = np.maximum(dur, 1) # dur 0 lasts a turn
+      self.effN[b, u] = n + 1
+      hp = s == HP
+      self.changeBy(b[hp], u[hp], s[hp], amount[hp])
+      self.settle(b[~hp], u[~hp])
+   def settle(self, b, u):
+      '''set the stats but health of units "u" to their full value
+      plus the total of their effects, as EffectList.shift.'''
+      valid = np.arange(EFFECTS)[None, :] < self.effN[b, u][:, None]
+      stat = self.effStat[b, u]
+      on = valid & (stat != HP)
+      total = np.zeros((len(b), 7), dtype = np.int64)
+      np.add.at(total, (np.arange(len(b))[:, None], np.where(on, stat, 0)),
+         np.where(on, self.effAmt[b, u], 0))
+      self.cur[b, u, 1:] = np.maximum(self.full[b, u, 1:] +
+         total[:, 1:], 0)
+   def tickEffects(self, b, u):
+      '''EffectList.tick: count down the effects of units "u",
+      revert the expired ones and apply the health ones again.'''
+      n = self.effN[b, u]
+      some = n > 0
+      if not some.any():
+         return
+      b, u, n = b[some], u[some], n[some]
+      valid = np.arange(EFFECTS)[None, :] < n[:, None]
+      dur = np.where(valid, self.effDur[b, u] - 1, self.effDur[b, u])
+      keep = valid & (dur > 0)
+      order = np.argsort(~keep, axis = 1, kind = "stable")
+      stat = np.take_along_axis(self.effStat[b, u], order, 1)
+      amt = np.take_along_axis(self.effAmt[b, u], order, 1)
+      self.effStat[b, u] = stat
+      self.effAmt[b, u] = amt
+      self.effDur[b, u] = np.take_along_axis(dur, order, 1)
+      n = keep.sum(1)
+      self.effN[b, u] = n
+      self.settle(b, u)
+      for e in range(int(n.max())):
+         on = (e < n) & (stat[:, e] == HP)
+         self.changeBy(b[on], u[on], stat[on, e], amt[on, e])
+
+   # skills
+   def attack(self, b, a, t, ofs, elt, power):
+      '''skillLib.targetAttack. return where the target was hit.'''
+      hit = ~self.chance(self.comb(b, t, DEX))
+      b, a, t, ofs, elt, power = b[hit], a[hit], t[hit], ofs[hit],\
+         elt[hit], power[hit]
+      dmg = np.floor(self.comb(b, a, ofs) * power).astype(np.int64)
+      te = self.elt[b, t]
+      both = (elt != 0) & (te != 0)
+      dmg = np.where(both & (te == elt % 4 + 1), dmg * 4,
+         np.where(both & (te == (elt - 2) % 4 + 1), dmg // 2,
+         np.where((elt != 0) & (te == elt), 0, dmg)))
+      dmg = np.where(self.chance(self.comb(b, a, LCK)), dmg * 2, dmg)
+      dmg = np.maximum(dmg - self.comb(b, t, ofs + 1), 0)
+      self.cur[b, t, HP] = np.maximum(self.cur[b, t, HP] - dmg, 0)
+      return hit
+   def act(self, b, a, s, mover):
+      '''units "a" use skills "s" while "mover" has the turn. return
+      the targets of the results (-1 for none) in their order.'''
+      t = self.table
+      res = np.full((len(b), self.U), -1, dtype = np.int64)
+      kind, need, wpn = t.kind[s], t.need[s], self.weapon[b, a]
+      able = ((need == FREE) | ((need == ARMED) & (wpn != NOWPN)) |
+         ((need == RANGED) & (wpn == BOW)) | ((need == MAGIC) &
+         (wpn == WAND)))
+      # used or failed, a skill restarts its cooldown. shots only
+      # do it once an arrow is out.
+      reset = (kind != NOTHING) & ((kind != SHOTS) | ~able)
+      self.cd[b[reset], s[reset]] = 0
+      for k in np.unique(kind[able]):
+         sel = np.flatnonzero(able & (kind == k))
+         out = self.ACTIONS[k](self, b[sel], a[sel], s[sel], mover[sel])
+         if out is not None:
+            res[sel] = out
+      return res
+   def single(self, b, a, s, mover):
+      res = np.full((len(b), self.U), -1, dtype = np.int64)
+      t = self.weakest(b, a)
+      on = np.flatnonzero(t >= 0)
+      tab = self.table
+      hit = self.attack(b[on], a[on], t[on], tab.ofs[s[on]],
+         tab.elt[s[on]], tab.power[s[on]])
+      res[on[hit], 0] = t[on[hit]]
+      return res
+   def combo(self, b, a, s, mover):
+      res = np.full((len(b), self.U), -1, dtype = np.int64)
+      tab = self.table
+      on = np.arange(len(b))
+      for i in range(5):
+         t = self.weakest(b[on], a[on])
+         on, t = on[t >= 0], t[t >= 0]
+         hit = self.attack(b[on], a[on], t, tab.ofs[s[on]],
+            tab.elt[s[on]], tab.power[s[on]])
+         on, t = on[hit], t[hit]
+         res[on, i] = t
+         on = on[self.alive(b[on], t)] # the streak goes on
+      return res
+   def multi(self, b, a, s, mover):
+      res = np.full((len(b), self.U), -1, dtype = np.int64)
+      tab = self.table
+      for j in range(self.U):
+         on = np.flatnonzero((self.foe[j] != self.foe[a]) &
+            self.present[b, j])
+         t = np.full(len(on), j)
+         hit = self.attack(b[on], a[on], t, tab.ofs[s[on]],
+            tab.elt[s[on]], tab.power[s[on]])
+         res[on[hit], j] = j
+      return res
+   def shots(self, b, a, s, mover):
+      res = np.full((len(b), self.U), -1, dtype = np.int64)
+      tab = self.table
+      on = np.arange(len(b))
+      for i in range(int(tab.hits[s].max())):
+         on = on[tab.hits[s[on]] > i]
+         armed = self.arrows[b[on], a[on]] > 0
+         go = on[armed]
+         self.arrows[b[go], a[go]] -= 1
+         self.cd[b[go], s[go]] = 0
+         t = self.weakest(b[go], a[go])
+         go, t = go[t >= 0], t[t >= 0]
+         hit = self.attack(b[go], a[go], t, tab.ofs[s[go]],
+            tab.elt[s[go]], tab.power[s[go]])
+         res[go[hit], i] = t[hit]
+         on = on[~self.isOver(b[on])] # stop once the battle is over
+      return res
+   def buff(self, b, a, s, mover):
+      tab = self.table
+      for i in range(7):
+         stat = tab.raised[s, i]
+         on = stat >= 0
+         bb, aa, ss, stat = b[on], a[on], s[on], stat[on]
+         amount = np.floor(self.full[bb, aa, stat] *
+            tab.power[ss]).astype(np.int64)
+         self.addEffect(bb, aa, stat, amount, tab.dur[ss])
+      return None
+   def debuff(self, b, a, s, mover):
+      res = np.full((len(b), self.U), -1, dtype = np.int64)
+      tab = self.table
+      t = self.weakest(b, a)
+      rows = np.flatnonzero(t >= 0)
+      b, a, s, t = b[rows], a[rows], s[rows], t[rows]
+      for i in range(7):
+         stat = tab.raised[s, i]
+         on = stat >= 0
+         bb, aa, ss, tt, stat = b[on], a[on], s[on], t[on], stat[on]
+         amount = np.floor(self.full[bb, tt, stat] *
+            tab.power[ss]).astype(np.int64)
+         self.addEffect(bb, tt, stat, -amount, tab.dur[ss])
+      res[rows, 0] = t
+      return res
+   def summon(self, b, a, s, mover):
+      '''the next reserved slot of the monsters joins the battle.'''
+      count = self.present[b, self.A:].sum(1)
+      on = self.foe[a] & self.summonable[b] & (count < SIDE)
+      self.present[b[on], self.A + count[on]] = True
+      return None
+   def counter(self, b, a, s, mover):
+      res = np.full((len(b), self.U), -1, dtype = np.int64)
+      tab = self.table
+      on = np.flatnonzero(a != mover)
+      hit = self.attack(b[on], a[on], mover[on], np.full(len(on), ATK),
+         tab.elt[s[on]], tab.power[s[on]])
+      res[on[hit], 0] = mover[on[hit]]
+      return res
+   ACTIONS = {
+      SINGLE: single, COMBO: combo, MULTI: multi, SHOTS: shots,
+      BUFF: buff, DEBUFF: debuff, SUMMON: summon, COUNTER: counter
+   }
+
+   # turns
+   def startRound(self, b):
+      alive = self.aliveAll(b)
+      dext = self.combAll(b, DEX)
+      self.inTurn[b] = self.present[b]
+      self.oDexts[b] = dext
+      self.mutDexts[b] = np.where(alive, dext, -1)
+      low = np.where(alive & self.present[b], dext,
+         dext.max(1)[:, None]).min(1)
+      self.lowDext[b] = np.maximum(low, 1)
+   def nextUnit(self, b):
+      '''TurnOrder.__next__ for every lane. return the unit moving
+      in each lane and where the round goes on.'''
+      dext = self.combAll(b, DEX)
+      mut = self.mutDexts[b] + dext - self.oDexts[b]
+      mut = np.where(self.aliveAll(b), mut, -1)
+      self.oDexts[b] = dext
+      m = np.where(self.inTurn[b], mut, np.iinfo(np.int64).min).argmax(1)
+      rows = np.arange(len(b))
+      going = mut[rows, m] >= self.lowDext[b]
+      mut[rows[going], m[going]] -= self.lowDext[b[going]]
+      self.mutDexts[b] = mut
+      return m, going
+   def move(self, b, m):
+      '''one turn of units "m": cooling, effects, action and the
+      reactions to it.'''
+      tab = self.table
+      sk = self.skills[b, m]
+      for k in range(4):
+         s = sk[:, k]
+         on = s >= 0
+         bb, ss = b[on], s[on]
+         self.cd[bb, ss] = np.minimum(self.cd[bb, ss] + 1, tab.cdTime[ss])
+      self.tickEffects(b, m)
+      action = np.where(self.isReady(b, sk[:, 1]), sk[:, 1], sk[:, 0])
+      res = self.act(b, m, action, m)
+      for r in range(res.shape[1]):
+         t = res[:, r]
+         on = t >= 0
+         bb, tt, mm = b[on], t[on], m[on]
+         on = self.alive(bb, tt)
+         bb, tt, mm = bb[on], tt[on], mm[on]
+         if len(bb) == 0:
+            continue
+         crit, react = self.skills[bb, tt, 3], self.skills[bb, tt, 2]
+         desperate = self.isCritical(bb, tt) & self.isReady(bb, crit)
+         s = np.where(desperate, crit, np.where(self.isReady(bb, react),
+            react, -1))
+         on = s >= 0
+         self.act(bb[on], tt[on], s[on], mm[on])
+
+   # battle method
+   def run(self) -> np.ndarray:
+      '''play every battle to its end and return their results.'''
+      n = len(self.lanes)
+      result = np.zeros(n, dtype = np.int64)
+      going = np.ones(n, dtype = bool)
+      fresh = np.ones(n, dtype = bool) # lanes starting a round
+      rounds = np.zeros(n, dtype = np.int64)
+      stale = np.zeros(n, dtype = np.int64)
+      healths = self.healths(np.arange(n))
+      stalemate = np.zeros(n, dtype = bool)
+      while going.any():
+         b = np.flatnonzero(going & fresh)
+         if len(b) > 0:
+            self.startRound(b)
+            fresh[b] = False
+         b = np.flatnonzero(going)
+         m, on = self.nextUnit(b)
+         done = b[~on] # round over
+         if len(done) > 0:
+            rounds[done] += 1
+            current = self.healths(done)
+            same = (current == healths[done]).all(1)
+            stale[done] = np.where(same, stale[done] + 1, 0)
+            healths[done] = current
+            stuck = (stale[done] >= STALE_ROUNDS) |\
+               (rounds[done] >= MAX_ROUNDS)
+            stalemate[done[stuck]] = True
+            going[done[stuck]] = False
+            fresh[done] = True
+         b, m = b[on], m[on]
+         self.move(b, m)
+         going[b[self.isOver(b)]] = False
+      # stalemates: a draw or the adventurers fall
+      b = np.flatnonzero(stalemate)
+      if not self.retreat:
+         for h in range(self.A):
+            hp = self.comb(b, np.full(len(b), h), HP)
+            self.cur[b, h, HP] = np.maximum(self.cur[b, h, HP] - hp, 0)
+         stalemate[:] = False
+      standing = self.aliveAll(np.arange(n))[:, :self.A].any(1)
+      result = np.where(standing, WON, LOST)
+      result[stalemate] = DRAW
+      self.finish(result)
+      return result
+   def finish(self, result):
+      '''write the adventurers back to their lanes, cleansed, and
+      award the experience of the battles won.'''
+      A, lanes, sim = self.A, self.lanes, self.sim
+      cur = self.cur[:, :A].copy()
+      cur[:, :, 1:] = self.full[:, :A, 1:]
+      sim.cur[lanes] = cur
+      sim.arrows[lanes] = self.arrows[:, :A]
+      sim.cd[lanes] = self.cd
+      won = np.flatnonzero(result == WON)
+      alive = self.aliveAll(won)[:, :A]
+      gain = np.zeros((len(won), A), dtype = np.int64)
+      for j in range(A, self.U):
+         there = self.present[won, j]
+         diff = self.level[won, j][:, None] - self.level[won, :A]
+         gain += np.where(there[:, None],
+            10 * np.ceil(np.exp(diff)).astype(np.int64), 0)
+      sim.develup(lanes[won], np.where(alive, gain, 0))
+
+# Simulation object
+class Simulation:
+   '''"runs" explorations of the same party played together. the
+   party is encoded once and each lane keeps its own copy of what
+   changes: stats, levels, arrows and cooldowns.'''
+   def __init__(self, heroes: list, runs: int, rng = None):
+      self.rng = rng if rng != None else np.random.default_rng()
+      self.runs = runs
+      self.size = len(heroes)
+      self.table = SkillTable()
+      self.heroes = h = encode(heroes, self.table)
+      self.dev = np.array([u.DEV for u in heroes], dtype = np.int64)
+      self.tools = set()
+      for u in heroes:
+         for tool in ("Axe", "Pickaxe"):
+            if u.getBag().contains(tool):
+               self.tools.add(tool)
+      self.full = np.repeat(h["full"][None], runs, 0)
+      self.cur = np.repeat(h["cur"][None], runs, 0)
+      self.level = np.repeat(h["level"][None], runs, 0)
+      self.exp = np.repeat(np.array([[u.getLevel().current
+         for u in heroes]], dtype = np.int64), runs, 0)
+      self.arrows = np.repeat(np.array([[len(u.getBag().getStackOf(
+         genHash("arrow"))) for u in heroes]], dtype = np.int64), runs, 0)
+      self.pools = dict()
+      self.dropped = 0 # effects that did not fit
+
+   # monsters
+   def pool(self, spawner, level: int) -> dict:
+      '''return the encoded pool of "spawner" at "level". bosses
+      are pooled as the list of their encoded forms.'''
+      key = (spawner, level)
+      if key not in self.pools:
+         with redirect_stdout(StringIO()): # spawners print
+            spawns = [spawner(level) for i in range(POOL)]
+         if isinstance(spawns[0], list): # boss forms
+            self.pools[key] = [encode([b[f] for b in spawns], self.table)
+               for f in range(len(spawns[0]))]
+         else:
+            self.pools[key] = encode(spawns, self.table)
+      return self.pools[key]
+   def prepare(self, floor):
+      '''spawn the pools of every monster "floor" can hold.'''
+      haz = floor.getHazardLevel()
+      for b in floor.pop + [floor.stairs]:
+         if isinstance(b, BossBlock):
+            hostile = b.bossRoom.getHostile()
+            self.pool(hostile[0], haz)
+            for s in hostile[1:]:
+               for lvl in range(1, haz + 1):
+                  self.pool(s, lvl)
+         elif isinstance(b, (BattleBlock, ScavengingBlock)):
+            for s in b.env.getHostile():
+               for lvl in range(1, haz + 1):
+                  self.pool(s, lvl)
+      self.table.freeze()
+      self.cd = np.repeat(self.table.elapsed[None], self.runs, 0)
+   def draw(self, spawners: list, which, levels, present) -> dict:
+      '''return the monsters of a batch of battles. "which" and
+      "levels" give the spawner and the level of each slot.'''
+      n = len(which)
+      mons = {
+         "full": np.zeros((n, SIDE, 7), dtype = np.int64),
+         "elt": np.zeros((n, SIDE), dtype = np.int64),
+         "level": np.ones((n, SIDE), dtype = np.int64),
+         "skills": np.full((n, SIDE, 4), -1, dtype = np.int64)
+      }
+      for i, spawner in enumerate(spawners):
+         for lvl in np.unique(levels[present & (which == i)]):
+            rows, slots = np.nonzero(present & (which == i) &
+               (levels == lvl))
+            pool = self.pool(spawner, int(lvl))
+            pick = self.rng.integers(0, POOL, len(rows))
+            for key in mons:
+               mons[key][rows, slots] = pool[key][pick]
+      return mons
+   def rndGen(self, top, size = None):
+      '''helpers.rndGen for arrays.'''
+      return self.rng.integers(1, np.asarray(top) + 1, size)
+
+   # adventurers
+   def develup(self, lanes, gain):
+      '''absorb the "gain" of experience of every adventurer of
+      "lanes" like Gauge.levelup and the job classes develup.'''
+      level, exp = self.level[lanes], self.exp[lanes]
+      ups = np.zeros_like(level)
+      while (gain > 0).any():
+         need = level * 100 - exp
+         on = gain > 0
+         up = on & (gain >= need)
+         exp = np.where(up, 0, np.where(on, exp + gain, exp))
+         gain = np.where(up, gain - need, 0)
+         level += up
+         ups += up
+      self.level[lanes], self.exp[lanes] = level, exp
+      full = self.full[lanes]
+      for i in range(int(ups.max(initial = 0))):
+         grown = -(-full[:, :, :6] * self.dev[None] // 100) # ceil
+         full[:, :, :6] = np.where((ups > i)[:, :, None], grown,
+            full[:, :, :6])
+      full[:, :, 6] += np.where(ups > 0, self.rndGen(3, ups.shape), 0)
+      self.full[lanes] = full
+      cur = self.cur[lanes]
+      self.cur[lanes] = np.where((ups > 0)[:, :, None], full, cur)
+   def standing(self, lanes = None):
+      '''return where the party still stands.'''
+      if lanes is None:
+         lanes = np.arange(self.runs)
+      hp = self.cur[lanes, :, HP] + self.heroes["bonus"][None, :, HP]
+      return (hp > 0).any(1)
+
+   # blocks
+   def fight(self, lanes, mons, present, summonable = None,
+      retreat = True):
+      if len(lanes) == 0:
+         return
+      if summonable is None:
+         summonable = np.zeros(len(lanes), dtype = bool)
+      Battle(self, lanes, mons, present, summonable, retreat).run()
+   def scavenge(self, block, lanes, haz: int):
+      '''ScavengingBlock.explore: maybe a group of the first hostile
+      monster. the items found don't matter here.'''
+      lanes = lanes[self.rndGen(100, len(lanes)) <
+         self.rndGen(100, len(lanes))]
+      n = len(lanes)
+      size = self.rndGen(np.minimum(5, self.rndGen(haz, n)))
+      present = np.arange(SIDE)[None, :] < size[:, None]
+      which = np.zeros((n, SIDE), dtype = np.int64)
+      levels = self.rndGen(haz, (n, SIDE))
+      spawners = block.env.getHostile()[:1]
+      self.fight(lanes, self.draw(spawners, which, levels, present),
+         present)
+   def battle(self, block, lanes, haz: int):
+      '''BattleBlock.explore.'''
+      n = len(lanes)
+      hostile = block.env.getHostile()
+      maxLvl = self.rndGen(haz, n)
+      size = self.rndGen(3, n)
+      for i in range(2):
+         size += self.rng.integers(0, 100, n) < haz * 10
+      present = np.arange(SIDE)[None, :] < size[:, None]
+      which = self.rng.integers(0, len(hostile), (n, SIDE))
+      levels = self.rndGen(maxLvl[:, None], (n, SIDE))
+      self.fight(lanes, self.draw(hostile, which, levels, present),
+         present)
+   def boss(self, block, lanes, haz: int):
+      '''BossBlock.explore: each form in its own battle, the first
+      slot, with the summonable monsters waiting in the others.'''
+      n = len(lanes)
+      hostile = block.bossRoom.getHostile()
+      forms = self.pool(hostile[0], haz)
+      pick = self.rng.integers(0, POOL, n)
+      for form in forms:
+         up = self.standing(lanes)
+         lanes, pick = lanes[up], pick[up]
+         n = len(lanes)
+         present = np.zeros((n, SIDE), dtype = bool)
+         present[:, 0] = True
+         which = self.rng.integers(0, max(1, len(hostile) - 1), (n, SIDE))
+         levels = self.rndGen(haz, (n, SIDE))
+         mons = self.draw(hostile[1:], which, levels, ~present)
+         for key in mons:
+            mons[key][:, 0] = form[key][pick]
+         self.fight(lanes, mons, present, np.full(n, len(hostile) > 1),
+            False)
+   def explore(self, floor) -> np.ndarray:
+      '''play the exploration of "floor" in every lane. return where
+      the party cleared it.'''
+      self.prepare(floor)
+      # monsters of a kind share their skill objects so their
+      # cooldowns carry over from a battle to the next. the explorer
+      # starts them over with each exploration.
+      mons = np.setdiff1d(np.arange(len(self.table.skills)),
+         self.heroes["skills"])
+      self.cd[:, mons] = 0
+      return self.play(floor)
+   def play(self, floor) -> np.ndarray:
+      '''the explorations of "floor" once prepared.'''
+      haz = floor.getHazardLevel()
+      probs = np.array(floor.probs, dtype = float)
+      layout = self.rng.choice(len(floor.pop), (self.runs,
+         floor.getSize() - 1), p = probs / probs.sum())
+      layout = np.concatenate([layout, np.full((self.runs, 1),
+         len(floor.pop))], axis = 1)
+      blocks = floor.pop + [floor.stairs]
+      for i in range(floor.getSize()):
+         up = self.standing()
+         for k, block in enumerate(blocks):
+            lanes = np.flatnonzero(up & (layout[:, i] == k))
+            if len(lanes) == 0:
+               continue
+            if isinstance(block, BossBlock):
+               self.boss(block, lanes, haz)
+            elif isinstance(block, BattleBlock):
+               self.battle(block, lanes, haz)
+            elif isinstance(block, WoodcuttingBlock):
+               if "Axe" in self.tools:
+                  self.scavenge(block, lanes, haz)
+            elif isinstance(block, MiningBlock):
+               if "Pickaxe" in self.tools:
+                  self.scavenge(block, lanes, haz)
+            elif isinstance(block, ScavengingBlock):
+               self.scavenge(block, lanes, haz)
+            elif not isinstance(block, EmptyBlock):
+               raise ValueError("{} can't be simulated.".format(
+                  block.name))
+      return self.standing()
+
+def clearRate(heroes: list, floor, runs = 2000, rng = None) -> float:
+   '''return the estimated chances that "heroes" clear "floor".
+   the heroes are left untouched.'''
+   return float(Simulation(heroes, runs, rng).explore(floor).mean())
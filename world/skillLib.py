@@ -8,22 +8,21 @@
 '''
 
 # imports
-from helpers import rndGen
+from helpers import rndGen, percents
 from elements import Element, NOELM, AEOLA, GAIA, AQUA,\
 VULCAN
 from skills import State, Skill, Effect, Mastery
 from collectibles import Sword, Spear, Bow, Artillery,\
 Staff, Tome
 from units import Unit
-from random import seed, choice
+import random
 from math import floor
 
-# seeding rnd gen
-seed() 
-def chance(chances: int) -> bool:
+def chance(chances: int, rng = random) -> bool:
    '''return "True" if a randomly choosen number between
-   0 and 99 is lower than "chances".'''
-   return choice(range(100)) <= chances
+   0 and 99 is lower than "chances". the number is drawn from
+   "rng".'''
+   return rng.randrange(100) <= chances
 def hasWeapon(unit):
    '''return True if the unit weapon slot is not empty.'''
    return unit.getEquipped().getGear("WPN") != None
@@ -53,21 +52,22 @@ def singleTarget(perp: Unit, state: State):
    '''returns a target for a single target attack.'''
    return state.getOpponents(perp).getWeakestMember()
 def targetAttack(perp: Unit, target: Unit, ofs: int, 
-   elt: Element, dmgMult = 1.0) -> str:
+   elt: Element, dmgMult = 1.0, rng = random) -> tuple:
    '''deals STATS[offense] damage to one opponent defending
    with a stat selected based on the offense stat. the normal
    damage is multiplied by multiplier before critical or
    resistance computations. a tuple specifying which unit
-   was hit or missed and the desciption of the events.
+   was hit or missed and the outcome of the attack. the
+   evasion and critical rolls are drawn from "rng".
    '''
    descr = None
+   roll = percents(rng) # both rolls straight from the block
    # target has dext chances to avoid the hit 
-   if chance(target.getStats().getStat("dexterity").getCurrent()):
+   if roll() <= target.getStats().getStat("dexterity").getCurrent():
       # the target avoided the attack
-      hit = "missed {}!".format(target.getName())
-      descr = (None, hit)
+      descr = (None, [("miss", target)])
    else: # target was hit
-      hit = str()
+      eff = None
       # compute potential damage
       dmg = perp.getStats().getStat(ofs).getCurrent()
       dmg *= dmgMult
@@ -75,21 +75,19 @@ def targetAttack(perp: Unit, target: Unit, ofs: int,
       # elemental boost
       if elt > target.getElement():
          dmg *= 4 # quadruple potential damage
-         hit += "it's super effective!\n"
+         eff = "super"
       elif elt < target.getElement():
          dmg //= 2 # half potential damage
-         hit += "it's not very effective!\n"
+         eff = "weak"
       elif elt != NOELM and elt == target.getElement():
             dmg = 0  # immunity
-            hit += "it had no effect!\n"
+            eff = "immune"
       else: # no elemental bonus
          pass
       # perp has 5 + luck chances to deal crit damage
-      if chance(perp.getStats().getStat("luck").getCurrent()):
+      crit = roll() <= perp.getStats().getStat("luck").getCurrent()
+      if crit:
          dmg *= 2 # critical hit so double dmg
-         hit += "dealt {} hp crit. dmg. to {}"
-      else:
-         hit += "dealt {} hp dmg. to {}"
       # substract target's defense
       dfs = "defense"
       if ofs == "special":
@@ -99,30 +97,67 @@ def targetAttack(perp: Unit, target: Unit, ofs: int,
          dmg = 0 # can only deal positive damage (>= 0)
       # inflict damage
       target.suffer(dmg)
-      hit = hit.format(dmg, target.getName())
+      outcome = [("hit", target, dmg, crit, eff)]
       if not target.isAlive():
-         hit += "\n{} died!".format(target.getName())
-      descr = (target, hit)
-   # return outcome message
+         outcome.append(("died", target))
+      descr = (target, outcome)
+   # return outcome
    return descr
 
+# outcomes
+# skills don't write what they did. they return the list of the
+# events that happened, as tuples starting with their kind, and
+# describe() only makes the text when there is a log to write.
+EFFECTIVENESS = {
+   "super": "it's super effective!\n",
+   "weak": "it's not very effective!\n",
+   "immune": "it had no effect!\n"
+}
+def describe(outcome: list) -> str:
+   '''return the text of the events of a skill "outcome".'''
+   lines = list()
+   for event in outcome:
+      kind = event[0]
+      if kind == "hit":
+         target, dmg, crit, eff = event[1:]
+         lines.append("{}dealt {} hp {}dmg. to {}".format(
+            EFFECTIVENESS.get(eff, ""), dmg, "crit. " if crit else "",
+            target.getName()))
+      elif kind == "miss":
+         lines.append("missed {}!".format(event[1].getName()))
+      elif kind == "died":
+         lines.append("{} died!".format(event[1].getName()))
+      elif kind == "raised" or kind == "reduced":
+         unit, stat, value = event[1:]
+         lines.append("{} {}'s {} by {}!".format(kind, unit.getName(),
+            stat, value))
+      elif kind == "counter":
+         lines.append("{} attacks {} back!".format(event[1].getName(),
+            event[2].getName()))
+      elif kind == "summon":
+         perp, nu = event[1:]
+         lines.append("{} cries for help.".format(perp.getName()))
+         if nu == None: # too many units or no units to summon
+            lines.append("but there was no response.")
+         else:
+            lines.append("a {} responded to its call.".format(
+               nu.getName()))
+      elif kind == "failed": # (failed, unit, why)
+         lines.append(event[2].format(event[1].getName()))
+      else: # (text, message)
+         lines.append(event[1])
+   return '\n'.join(lines)
+
 # buffs and debuffs
-def raiseStat(unit: Unit, sName: str, mult) -> str:
-   '''raise a stat by its full value times the multiplier.
-   the value of buff decides if its a buff or a debuff. 
-   default to a buff.'''
-   old = unit.stats.getStat(sName).getFull()
-   value = floor(old * mult)
-   unit.stats.changeBy(sName, value)
-   return value
-def lowerStat(unit, sName, mult) -> str:
-   '''reduce a stat by its full value times the multiplier.
-   the value of buff decides if its a buff or a debuff. 
-   default to a buff.'''
-   old = unit.stats.getStat(sName).getFull()
-   value = floor(old * mult)
-   unit.stats.changeBy(sName, -value)
-   return value
+def raiseStat(unit: Unit, sName: str, mult) -> int:
+   '''return the gain of a stat by its full value times the
+   multiplier. the stat is changed by the EffectList.'''
+   return floor(unit.stats.getStat(sName).getFull() * mult)
+def lowerStat(unit, sName, mult) -> int:
+   '''return the loss of a stat by its full value times the
+   multiplier, as a negative change. the stat is changed by the
+   EffectList.'''
+   return -floor(unit.stats.getStat(sName).getFull() * mult)
 
 ##########################SKILLS LIBRARY#########################
 
@@ -140,7 +175,7 @@ class SinglePhysical(Skill):
       target = singleTarget(perp, state)
       restartCooldown(self)
       return targetAttack(perp, target, "attack", 
-         self.element, self.power)
+         self.element, self.power, state.rng)
 
 # single special attacks
 class SingleSpecial(Skill):
@@ -156,7 +191,7 @@ class SingleSpecial(Skill):
       # restart cooldown
       restartCooldown(self)
       return targetAttack(perp, target, "special", 
-         self.element, self.power)
+         self.element, self.power, state.rng)
 
 # multi opponent attacks
 class MultiPhysical(Skill):
@@ -168,16 +203,14 @@ class MultiPhysical(Skill):
    # action override
    def __call__(self, perp: Unit, state):
       '''executes the attack.'''
-      targets = list()
-      text = str()
+      results = list()
       for opp in state.getOpponents(perp):
          target = opp
          restartCooldown(self)
-         tgt, txt = targetAttack(perp, target, "attack", self.element, 
-            self.power)
-         targets.append(tgt)
-         text += txt + '\n'
-      return (targets, text)
+         result = targetAttack(perp, target, "attack", self.element, 
+            self.power, state.rng)
+         results.append(result)
+      return results
 
 class MultiSpecial(Skill):
    '''defines a special attack that hits a whole party.'''
@@ -193,7 +226,7 @@ class MultiSpecial(Skill):
          target = opp
          restartCooldown(self)
          result = targetAttack(perp, target, "special", self.element, 
-            self.power)
+            self.power, state.rng)
          results.append(result)
       return results
 
@@ -209,18 +242,16 @@ class Buff(Skill):
    
    def __call__(self, perp, state):
       '''implement the buffing.'''
-      txt = str()
+      outcome = list()
       for stat in self.raised:
          # create effect
          buff = Effect(self.dur, stat, raiseStat, self.power)
-         # add to active effects
-         perp.getActiveEffects().addEffect(buff)
-         # activate effect immediatly and return status
-         txt += "raised {}'s {} by {}! ".format(perp.getName(),
-            stat, buff(perp))
+         # add to active effects, activated immediatly
+         outcome.append(("raised", perp, stat,
+            perp.getActiveEffects().apply(buff, perp)))
       restartCooldown(self)
       # return status
-      return (None, txt)
+      return (None, outcome)
 
 # stat buff skill
 class Debuff(Skill):
@@ -234,19 +265,17 @@ class Debuff(Skill):
    
    def __call__(self, perp: Unit, state: State):
       '''implement the debuffing.'''
-      txt = str()
+      outcome = list()
       target = singleTarget(perp, state)
       for stat in self.raised:
          # create effect
          buff = Effect(self.dur, stat, lowerStat, self.power)
-         # add to active effects
-         target.getActiveEffects().addEffect(buff)
-         # activate effect immediatly and return status
-         txt += "reduced {}'s {} by {}! ".format(target.getName(),
-            stat, buff(perp))
+         # add to active effects, activated immediatly
+         outcome.append(("reduced", target, stat,
+            target.getActiveEffects().apply(buff, target)))
       restartCooldown(self)
       # return status
-      return (target, txt)
+      return (target, outcome)
 
 # single target magic attack
 class Magic(SingleSpecial):
@@ -265,8 +294,7 @@ class Magic(SingleSpecial):
       if hasWeaponType('m', perp):
          status = super().__call__(perp, state)
       else: # had no magic weapon so it is a miss
-         status = (None, "{} can't cast magic!".format(
-         perp.getName()))
+         status = (None, [("failed", perp, "{} can't cast magic!")])
          self.cd.reset() # restart cooldown
       return status
 
@@ -284,17 +312,17 @@ class Summon(Skill):
       perp. the level of the summoned monster is lower or equal
       to the level of the perp.'''
       party = state.getAllies(perp)
-      string = "{} cries for help.\n".format(perp.getName())
+      nu = None
       if len(party) >= 5 or state.getSummonable() == None: 
          # too many units or no units to summon
-         string += "but there was no response.\n"
+         pass
       else: # we have space
-         nu = choice(state.getSummonable()) # pick
-         nu = nu(rndGen(perp.getLevel().getCurrent())) # spawn
-         party.addMember(nu) # add
-         string += "a {} responded to its call.\n".format(nu.getName())
+         rng = state.rng
+         nu = rng.choice(state.getSummonable()) # pick
+         nu = nu(rndGen(perp.getLevel().getCurrent(), rng), rng) # spawn
+         state.join(nu, party) # add
       self.cd.reset() # restart cooldown
-      return (None, string)
+      return (None, [("summon", perp, nu)])
 
 ################## monsters
 # Sting
@@ -421,8 +449,7 @@ class Strike(SinglePhysical):
       if hasWeapon(perp):
          status = super().__call__(perp, state)
       else: # had no weapon so we count it as a miss
-         status = (None, "{} has no weapon.".format(
-         perp.getName()))
+         status = (None, [("failed", perp, "{} has no weapon.")])
          restartCooldown(self)
       return status
 strike = Strike()
@@ -461,14 +488,12 @@ class Counter(Skill):
       target = state.isMoving()
       # check for reaction move
       if perp != target: 
-         txt = "{} attacks {} back!".format(perp.getName(),
-            target.getName())
          restartCooldown(self)
          status = targetAttack(perp, target, "attack", self.element, 
-            self.power)
-         status = (status[0], txt + '\n' + status[1])
+            self.power, state.rng)
+         status = (status[0], [("counter", perp, target)] + status[1])
       else:
-         status = (None, "counter failed!")
+         status = (None, [("text", "counter failed!")])
       # reset CD
       restartCooldown(self)
       return status
@@ -526,6 +551,8 @@ comboAttack = ComboAttack()
 class Shoot(SinglePhysical):
    '''performs a single physical attack on a single target
    but only if the perpetrator has a ranged weapon.'''
+   arrows = 1 # spent by one use at most
+   
    def __init__(self, cd = 0):
       '''provides a way to change the cooldown value dynami-
       cally in case a skill based on it needs a different
@@ -551,11 +578,10 @@ class Shoot(SinglePhysical):
          if len(ammo) != 0: # we have ammo
             status = super().__call__(perp, state)
          else: # no arrows
-            status = (None, "{} has no arrows.".format(
-         perp.getName()))
+            status = (None, [("failed", perp, "{} has no arrows.")])
       else: # had no ranged weapon so it is a miss
-         status = (None, "{} has nothing to shoot with.".format(
-         perp.getName()))
+         status = (None, [("failed", perp,
+            "{} has nothing to shoot with.")])
          self.cd.reset() # restart cooldown
       return status
 shoot = Shoot()
@@ -582,8 +608,8 @@ class TakeAim(Buff):
       if hasWeaponType('r', perp):
          status = super().__call__(perp, state)
       else: # had no ranged weapon so it is a miss
-         status = (None, "{} has nothing to aim with.".format(
-         perp.getName()))
+         status = (None, [("failed", perp,
+            "{} has nothing to aim with.")])
          self.cd.reset() # restart cooldown
       return status
 takeAim = TakeAim()
@@ -613,6 +639,8 @@ firstAid = Buff(
 class TriShot(Shoot):
    '''attacks three times in a row with a ranged weapon.
    targets can be different each time.'''
+   arrows = 3 # spent by one use at most
+   
    def __init__(self):
       super().__init__(6)
       # update attributes
@@ -625,25 +653,18 @@ class TriShot(Shoot):
       '''implement the tri-shot attack skill.'''
       failed = False
       i = 0
-      targets = list
-      txt = str()
+      status = list()
       # combo loop
       while i < 3 and not failed:
          returned = super().__call__(perp, state)
          # stop if battle ended after a shot
          failed = state.isOver()
          # update status
-         targets.append(returned[0])
-         txt += returned[1]
+         status.append(returned)
          # set next attack
          if not failed:
             i += 1
-            status += '\n'
       # return
-      if i == 0: # no attack was successful
-         status = (None, status)
-      else:
-         status = (targets, status)
       return status
 triShot = TriShot()
 
@@ -717,8 +738,7 @@ class MagicShield(Buff):
       if hasWeaponType('m', perp):
          status = super().__call__(perp, state)
       else: # had no ranged weapon so it is a miss
-         status = (None, "{} can't cast magic!".format(
-         perp.getName()))
+         status = (None, [("failed", perp, "{} can't cast magic!")])
          self.cd.reset() # restart cooldown
       return status
 magicShield = MagicShield()
@@ -744,8 +764,7 @@ class Cure(Buff):
       if hasWeaponType('m', perp):
          status = super().__call__(perp, state)
       else: # had no ranged weapon so it is a miss
-         status = (None, "{} can't cast magic!".format(
-         perp.getName()))
+         status = (None, [("failed", perp, "{} can't cast magic!")])
          self.cd.reset() # restart cooldown
       return status
 cure = Cure()
@@ -774,6 +793,23 @@ conjuring = Mastery(
    ]
 )
 
+# shared cooldowns
+# every monster of a kind uses the same skill objects of this library
+# so their cooldowns carry over from a battle to the next. they are
+# started over with each exploration and saved with its checkpoints
+# so that it can be replayed.
+LIBRARY = [s for s in list(globals().values()) if isinstance(s, Skill)]
+def getCooldowns() -> list:
+   '''return the elapsed cooldown of every skill of the library.'''
+   return [s.cd.getElapsed() for s in LIBRARY]
+def setCooldowns(elapsed = None):
+   '''set the elapsed cooldowns of the library skills to "elapsed",
+   as returned by getCooldowns(). reset them all by default.'''
+   for i, s in enumerate(LIBRARY):
+      s.cd.reset()
+      if elapsed != None:
+         s.cd.currentCD = elapsed[i]
+
 # test run
 if __name__ == "__main__":
    print(triShot)
\ No newline at end of file
@@ -15,13 +15,17 @@
 '''
 
 # import
-from base import Cooldown
+from base import Cooldown, STATS, INDEX
 from elements import Element, NOELM
+import random
+
+DEXTERITY = INDEX["dexterity"] # the stat of the turn order
 
 # State base object
 class State:
    '''a dub for BattleState created in confrontation.
    used to avoid circular dependency.'''
+   rng = random # random generator of the battle
    def __init__(self):
       pass # do nothing
 
@@ -77,10 +81,10 @@ class Skill:
       occurs in battle, "state" refer to the current state
       of the battle as a whole which is used by the move
       to apply its effects. returns a a tuple containing
-      all successfully hit opponents and a string describing
-      the overall effect. this must be overriden by each
-      skill subclasses.'''
-      return (None, "nothing to see here.")
+      all successfully hit opponents and the list of events
+      describing the overall effect. this must be overriden
+      by each skill subclasses.'''
+      return (None, [("text", "nothing to see here.")])
       
    
    # override tostring
@@ -282,6 +286,7 @@ class Effect:
       self.impacted = impacted
       self.condition = cond # function that
       self.power = power
+      self.change = 0 # made to the stat, reverted on expiry
    
    # getters
    def isExpired(self):
@@ -311,18 +316,31 @@ class Effect:
       return not self.__eq__(other)
    
    # makes this callable to apply the condition
-   def __call__(self, unit) -> str:
-      '''apply self.condition to the unit. return the amount
-      by which the effect impacted the stats.'''
+   def __call__(self, unit) -> int:
+      '''return the change self.condition makes to the impacted
+      stat of the unit: positive for a gain, negative for a loss.
+      the stat itself is left as is.'''
       return self.condition(unit, self.impacted, self.power)
 
 # EffectList object
 class EffectList(list):
    '''a unit can be affect by more than one effect at
-   the time thus this object keeps track of them all.'''
+   the time thus this object keeps track of them all.
+   the effects are applied once when added and reverted once
+   when they expire: a running total of the changes is kept
+   per stat. the expirations are kept in a timing wheel
+   counted in the turns of the unit. health effects are
+   the exception: they are periodic and apply again on every
+   turn of the unit until they expire, never reverted.'''
+   # defaults of the lists pickled before the wheel existed
+   turn = 0 # turns of the unit since the effects were cleared
+   wheel = None # turn: effects expiring on that turn
+   totals = None # running total of the changes per stat
+   periodic = None # active health effects
    
    def __init__(self):
       super().__init__() # empty list
+      self.reset()
    
    # getters 
    def isEmpty(self):
@@ -330,30 +348,71 @@ class EffectList(list):
       return len(self) == 0
    
    # setters
+   def reset(self):
+      '''forget the turns, the expirations and the totals.'''
+      self.turn = 0
+      self.wheel = dict()
+      self.totals = [0] * len(INDEX)
+      self.periodic = list()
    def addEffect(self, ef: Effect):
-      '''add a new effect to the list of effects.'''
+      '''add a new effect to the list of effects without
+      applying it.'''
+      if self.wheel == None:
+         self.reset()
       self.append(ef)
-   def tick(self):
-      '''traverse the list and trigger the countdown
-      method of all the effects.'''
-      for effect in self:
-         effect.countDown()
-   def removeExpired(self):
-      '''clear any Effect from the list that is expired.'''
-      for effect in self:
-         if effect.isExpired():
-            self.remove(effect)   
+      expiry = self.turn + max(ef.dur, 1) # dur 0 lasts a turn
+      self.wheel.setdefault(expiry, list()).append(ef)
+   def apply(self, ef: Effect, unit) -> int:
+      '''add a new effect to the list and apply it to the unit
+      right away. return the amount it changed the stat by.'''
+      self.addEffect(ef)
+      if ef.impacted == "health":
+         self.periodic.append(ef)
+         return self.pulse(ef, unit)
+      ef.change = ef(unit)
+      self.shift(unit, INDEX[ef.impacted], ef.change)
+      return abs(ef.change)
+   def tick(self, unit):
+      '''start a new turn of the unit: revert the effects that
+      expire on it then apply the health effects again.'''
+      if self.wheel == None: # nothing added yet
+         self.reset()
+      self.turn += 1
+      expired = self.wheel.pop(self.turn, None)
+      if expired != None:
+         gone = {id(ef) for ef in expired}
+         self[:] = [ef for ef in self if id(ef) not in gone]
+         self.periodic = [ef for ef in self.periodic
+            if id(ef) not in gone]
+         for ef in expired:
+            if ef.impacted != "health":
+               self.shift(unit, INDEX[ef.impacted], -ef.change)
+      for ef in self.periodic:
+         self.pulse(ef, unit)
    def clearAll(self):
-      '''remove all effects.'''
+      '''remove all effects. the stats of the unit must be
+      cleansed apart.'''
       self.clear()
+      self.reset()
   
    # others
-   def applyAll(self, unit):
-      '''apply all still active effects'''
-      self.removeExpired() # remove expired
-      for e in self:
-         # apply the effects
-         e(unit)   
+   def shift(self, unit, i: int, change: int):
+      '''add "change" to the total of the stat at "i" and set the
+      stat to its full value plus that total. the watchers of the
+      unit hear of the dexterity changes for the turn order.'''
+      self.totals[i] += change
+      full = unit.stats.full[i]
+      unit.stats.setStat(STATS[i], max(full + self.totals[i], 0))
+      if i == DEXTERITY:
+         unit.statsChanged()
+   def pulse(self, ef: Effect, unit) -> int:
+      '''apply the health effect "ef" to the unit.'''
+      change = ef(unit)
+      if change < 0:
+         unit.suffer(-change)
+      else:
+         unit.heal(change)
+      return abs(change)
    
 # test platform
 if __name__ == "__main__":
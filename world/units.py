@@ -17,6 +17,8 @@ from elements import Element, NOELM
 from skills import Skill, SkillSet, EffectList
 from containers import Inventory, Equipment, Wallet
 from math import ceil
+import random
+from weakref import ref
 
 # Unit object
 class Unit:
@@ -86,14 +88,37 @@ class Unit:
       '''reduced the unit's hp by dmgAmount. ignore
       equipment.'''
       self.stats.changeBy("health", -dmgAmount)
+      self.statsChanged()
    def heal(self, healAmount: int):
       '''raise the unit's hp by healAmount. ignore 
       equipment.'''
       self.stats.changeBy("health", healAmount)
+      self.statsChanged()
+   def watch(self, watcher):
+      '''make "watcher" (a party, a turn order) hear of the hp and
+      dexterity changes of the unit. it is only weakly referred to
+      and only once.'''
+      watchers = [w for w in self.__dict__.get("watchers", ())
+         if w() != None and w() is not watcher]
+      watchers.append(ref(watcher))
+      self.watchers = watchers
+   def statsChanged(self):
+      '''tell the watchers of the unit that its stats changed.'''
+      for w in self.__dict__.get("watchers", ()):
+         watcher = w()
+         if watcher != None:
+            watcher.update(self)
    def resurrect(self):
       '''set the hp of the unit to 1 if they were dead.'''
       if self.isAlive():
          self.heal(1)
+   
+   # pickling
+   def __getstate__(self) -> dict:
+      '''leave the watchers out of the saves.'''
+      state = self.__dict__.copy()
+      state.pop("watchers", None)
+      return state
       
    # override tostring
    def __str__(self, short = True) -> str:
@@ -132,9 +157,16 @@ class Playable(Unit):
    def getStats(self) -> UnitStats:
       '''return the combined stats of the Playable. overrides
       the getStats() method of the Unit class to add bonuses
-      from equipped gear.'''
-      return (self.stats + 
-         UnitStats(self.equipment.getEqtBonus()))
+      from equipped gear. the combination is kept until the
+      stats or the equipment change so it must not be modified.'''
+      stats, eqt = self.stats, self.equipment
+      cached = self.__dict__.get("combined")
+      if (cached == None or cached[0] is not stats or 
+         cached[1] != stats.changes or cached[2] != eqt.changes):
+         cached = (stats, stats.changes, eqt.changes,
+            stats + UnitStats(eqt.getEqtBonus()))
+         self.combined = cached
+      return cached[3]
    def isAlive(self) -> bool:
       '''return "True" if the Playable's current health value
       is above zero. subclasses that add stats bonuses must
@@ -149,6 +181,13 @@ class Playable(Unit):
       old = self.equipment.setGear(gear)
       return old
    
+   # pickling
+   def __getstate__(self) -> dict:
+      '''leave the combined stats cache out of the saves.'''
+      state = super().__getstate__()
+      state.pop("combined", None)
+      return state
+   
    # override tostring
    def __str__(self, short = True):
       descr = super().__str__(short)
@@ -164,10 +203,10 @@ class Monster(Unit):
    any level desirable.'''
    
    def __init__(self, name: str, level: int, bStats: list,
-      bSkill: Skill, lore: str, elt = NOELM):
+      bSkill: Skill, lore: str, elt = NOELM, rng = random):
       super().__init__(name, level, bStats, 3, bSkill, elt)
       self.lore = lore
-      self.develup()
+      self.develup(rng)
    
    # getters
    def getLore(self) -> str:
@@ -175,7 +214,7 @@ class Monster(Unit):
       return self.lore
    
    # stats development
-   def develup(self) -> bool:
+   def develup(self, rng = random) -> bool:
       '''adjust the stats of the monster to match its
       level. basically, every stat is raised by its half 
       for every level after level 1. Luck is up to luck :)
@@ -191,7 +230,7 @@ class Monster(Unit):
          # append luck to the list
          newStats.append(self.stats.getStat("luck").getFull())
          # luck increases by at most 3
-         newStats[6] += rndGen(3)
+         newStats[6] += rndGen(3, rng)
       # assign new stats
       self.stats = UnitStats(newStats)
    